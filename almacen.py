@@ -0,0 +1,442 @@
+"""Almacén de análisis guardados (SQLite en modo WAL).
+
+Reemplaza la escritura en modo append de los CSV. Todas las sesiones comparten
+una instancia de `AlmacenAnalisis`: los guardados se encolan y un hilo escritor
+los agrupa en una sola transacción, así varias sesiones que guardan a la vez no
+intercalan filas ni compiten por el bloqueo de escritura. Las lecturas usan su
+propia conexión y no bloquean a los escritores (WAL).
+
+Los conteos por día, idioma y valor de cada atributo (y por par de atributos)
+se mantienen con triggers a medida que se insertan filas, así el panel docente
+no vuelve a agrupar todo el historial en cada consulta.
+
+Los atributos se guardan como IDs canónicos (opciones.py), así un mismo suelo
+guardado en ES y en PT cuenta como el mismo valor. Las bases anteriores, que
+guardaban el texto del idioma, se migran al abrirlas (PRAGMA user_version).
+
+Uso por línea de comandos:
+    python almacen.py importar analisis_suelos.csv analises_solos.csv
+    python almacen.py exportar-csv historial.csv
+"""
+import argparse
+import csv
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+
+from opciones import ATRIBUTOS, id_canonico
+from rutas import RAIZ
+
+# SUELOS_DB la cambia (p. ej. los bench/ usan una temporal).
+ARCHIVO_DB = os.environ.get("SUELOS_DB") or os.path.join(RAIZ, "analisis_suelos.db")
+
+COLUMNAS = (
+    "fecha", "idioma", "color", "textura", "estructura", "humedad", "raices",
+    "munsell", "imagen_sha256", "imagen_nombre", "origen", "id_externo",
+)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS analisis (
+    id            INTEGER PRIMARY KEY,
+    fecha         TEXT NOT NULL,          -- ISO 8601 (YYYY-MM-DD HH:MM:SS)
+    idioma        TEXT,
+    color         TEXT,
+    textura       TEXT,
+    estructura    TEXT,
+    humedad       TEXT,
+    raices        TEXT,
+    munsell       TEXT,
+    imagen_sha256 TEXT,
+    imagen_nombre TEXT,
+    origen        TEXT NOT NULL DEFAULT 'app',
+    id_externo    TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_analisis_fecha ON analisis(fecha);
+CREATE INDEX IF NOT EXISTS ix_analisis_color ON analisis(color);
+CREATE INDEX IF NOT EXISTS ix_analisis_textura ON analisis(textura);
+CREATE INDEX IF NOT EXISTS ix_analisis_estructura ON analisis(estructura);
+CREATE INDEX IF NOT EXISTS ix_analisis_imagen ON analisis(imagen_sha256);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_analisis_externo ON analisis(origen, id_externo)
+    WHERE id_externo IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS conteos (
+    dia      TEXT NOT NULL,               -- YYYY-MM-DD
+    idioma   TEXT NOT NULL,
+    atributo TEXT NOT NULL,
+    valor    TEXT NOT NULL,
+    n        INTEGER NOT NULL,
+    PRIMARY KEY (dia, idioma, atributo, valor)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coocurrencias (
+    dia     TEXT NOT NULL,
+    idioma  TEXT NOT NULL,
+    atr_a   TEXT NOT NULL,                -- atr_a precede a atr_b en ATRIBUTOS_AGREGADOS
+    valor_a TEXT NOT NULL,
+    atr_b   TEXT NOT NULL,
+    valor_b TEXT NOT NULL,
+    n       INTEGER NOT NULL,
+    PRIMARY KEY (dia, idioma, atr_a, atr_b, valor_a, valor_b)
+) WITHOUT ROWID;
+"""
+
+# Atributos con conteos incrementales (columnas de `analisis`).
+ATRIBUTOS_AGREGADOS = ATRIBUTOS
+PARES_AGREGADOS = tuple(
+    (a, b) for i, a in enumerate(ATRIBUTOS_AGREGADOS) for b in ATRIBUTOS_AGREGADOS[i + 1:]
+)
+
+
+def _sql_agregados(fuente: str, signo: str = "1") -> str:
+    """Sentencias que suman las filas de `fuente` a conteos y coocurrencias.
+
+    `fuente` es "NEW" dentro de un trigger o un alias de `analisis` en un SELECT.
+    """
+    dia, idioma = f"substr({fuente}.fecha, 1, 10)", f"COALESCE({fuente}.idioma, '')"
+    valores_conteo = ",\n".join(
+        f"({dia}, {idioma}, '{a}', COALESCE({fuente}.{a}, ''), {signo})" for a in ATRIBUTOS_AGREGADOS
+    )
+    valores_pares = ",\n".join(
+        f"({dia}, {idioma}, '{a}', COALESCE({fuente}.{a}, ''), '{b}', COALESCE({fuente}.{b}, ''), {signo})"
+        for a, b in PARES_AGREGADOS
+    )
+    return f"""
+    INSERT INTO conteos (dia, idioma, atributo, valor, n) VALUES
+    {valores_conteo}
+    ON CONFLICT (dia, idioma, atributo, valor) DO UPDATE SET n = n + excluded.n;
+    INSERT INTO coocurrencias (dia, idioma, atr_a, valor_a, atr_b, valor_b, n) VALUES
+    {valores_pares}
+    ON CONFLICT (dia, idioma, atr_a, atr_b, valor_a, valor_b) DO UPDATE SET n = n + excluded.n;
+    """
+
+
+TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS tr_analisis_agregados AFTER INSERT ON analisis BEGIN
+{_sql_agregados("NEW")}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_analisis_agregados_borrado AFTER DELETE ON analisis BEGIN
+{_sql_agregados("OLD", "-1")}
+END;
+"""
+
+
+def _reconstruir_agregados(con: sqlite3.Connection) -> None:
+    """Recalcula conteos y coocurrencias desde cero (dentro de la transacción de `con`)."""
+    dia, idioma = "substr(fecha, 1, 10)", "COALESCE(idioma, '')"
+    con.execute("DELETE FROM conteos")
+    con.execute("DELETE FROM coocurrencias")
+    for a in ATRIBUTOS_AGREGADOS:
+        con.execute(
+            f"INSERT INTO conteos SELECT {dia}, {idioma}, '{a}', COALESCE({a}, ''), COUNT(*) "
+            f"FROM analisis GROUP BY 1, 2, 4"
+        )
+    for a, b in PARES_AGREGADOS:
+        con.execute(
+            f"INSERT INTO coocurrencias SELECT {dia}, {idioma}, '{a}', COALESCE({a}, ''), '{b}', COALESCE({b}, ''), "
+            f"COUNT(*) FROM analisis GROUP BY 1, 2, 4, 6"
+        )
+
+
+# Versión de los datos guardados (PRAGMA user_version):
+#   1 = atributos como IDs canónicos en lugar del texto de cada idioma.
+VERSION_DATOS = 1
+
+
+def _migrar_a_ids(con: sqlite3.Connection) -> None:
+    """Reemplaza los textos localizados por IDs (los valores que no se reconocen quedan igual)."""
+    for a in ATRIBUTOS:
+        for (valor,) in con.execute(f"SELECT DISTINCT {a} FROM analisis WHERE {a} IS NOT NULL").fetchall():
+            nuevo = id_canonico(a, valor)
+            if nuevo and nuevo != valor:
+                con.execute(f"UPDATE analisis SET {a} = ? WHERE {a} = ?", (nuevo, valor))
+
+
+def _normalizar_atributos(valores: dict) -> None:
+    for a in ATRIBUTOS:
+        valores[a] = id_canonico(a, valores[a]) or valores[a]
+
+# Encabezados de los dos formatos CSV históricos.
+ENCABEZADOS_CSV_APP = ["Fecha", "Idioma", "Color", "Textura", "Estructura", "Humedad", "Raíces"]
+ENCABEZADOS_CSV_ANTIGUO = [
+    "Timestamp", "ID_Analisis", "Imagen_Cargada", "Color_Suelo", "Codigo_Munsell",
+    "Agregacion_Presente", "Forma_Agregado", "Clase_Textural", "Presencia_Raices", "Condicion_Humedad",
+]
+
+
+def _conectar(ruta: str) -> sqlite3.Connection:
+    con = sqlite3.connect(ruta, timeout=30, isolation_level=None, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA busy_timeout=30000")
+    return con
+
+
+def _fila_a_tupla(fila: dict) -> tuple:
+    valores = dict.fromkeys(COLUMNAS)
+    valores["origen"] = "app"
+    valores.update({k: v for k, v in fila.items() if k in valores})
+    _normalizar_atributos(valores)
+    if not valores["fecha"]:
+        valores["fecha"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return tuple(valores[c] for c in COLUMNAS)
+
+
+class AlmacenAnalisis:
+    """Repositorio de análisis. Seguro para usar desde varios hilos."""
+
+    def __init__(self, ruta: str = ARCHIVO_DB, tamano_lote: int = 200):
+        self.ruta = ruta
+        self.tamano_lote = tamano_lote
+        con = _conectar(ruta)
+        con.executescript(ESQUEMA)
+        sin_triggers = con.execute("SELECT name FROM sqlite_master WHERE name = 'tr_analisis_agregados'").fetchone() is None
+        if sin_triggers:
+            con.executescript(TRIGGERS)
+        if sin_triggers or self._version(con) < VERSION_DATOS:
+            con.execute("BEGIN IMMEDIATE")
+            # Se vuelve a leer con el bloqueo tomado: otro proceso pudo migrar mientras tanto.
+            if self._version(con) < 1:
+                _migrar_a_ids(con)
+            _reconstruir_agregados(con)
+            con.execute(f"PRAGMA user_version = {VERSION_DATOS}")
+            con.execute("COMMIT")
+        con.close()
+        self._cola = queue.Queue()
+        self._escritor = threading.Thread(target=self._escribir, name="almacen-escritor", daemon=True)
+        self._escritor.start()
+
+    @staticmethod
+    def _version(con) -> int:
+        return con.execute("PRAGMA user_version").fetchone()[0]
+
+    def version_datos(self) -> int:
+        """VERSION_DATOS con que están escritas las filas (cambia tras una migración)."""
+        return self._consultar("PRAGMA user_version", ())[0][0]
+
+    # ---------- escritura ----------
+    def guardar(self, fila: dict, timeout: float = 30) -> None:
+        """Guarda un análisis y espera a que su lote se confirme."""
+        self.guardar_lote([fila], timeout=timeout)
+
+    def guardar_lote(self, filas, timeout: float = None) -> int:
+        """Guarda varias filas (dicts con claves de COLUMNAS). Devuelve las insertadas."""
+        futuro = Future()
+        self._cola.put(([_fila_a_tupla(f) for f in filas], futuro))
+        return futuro.result(timeout)
+
+    def _escribir(self):
+        con = _conectar(self.ruta)
+        sql = f"INSERT OR IGNORE INTO analisis ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})"
+        while True:
+            pendientes = [self._cola.get()]
+            # Agrupa lo que ya esté en cola: una transacción para todos los guardados simultáneos.
+            while sum(len(p[0]) for p in pendientes) < self.tamano_lote:
+                try:
+                    pendientes.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                con.execute("BEGIN IMMEDIATE")
+                insertadas = []
+                for tuplas, _ in pendientes:
+                    # rowcount, no total_changes: este cuenta también lo que escriben los triggers de agregados.
+                    insertadas.append(con.executemany(sql, tuplas).rowcount)
+                con.execute("COMMIT")
+            except Exception as e:
+                if con.in_transaction:
+                    con.execute("ROLLBACK")
+                for _, futuro in pendientes:
+                    futuro.set_exception(e)
+            else:
+                for (_, futuro), n in zip(pendientes, insertadas):
+                    futuro.set_result(n)
+
+    # ---------- lectura ----------
+    def contar(self) -> int:
+        con = _conectar(self.ruta)
+        try:
+            return con.execute("SELECT COUNT(*) FROM analisis").fetchone()[0]
+        finally:
+            con.close()
+
+    def iterar(self, desde: str = None, hasta: str = None, idioma: str = None):
+        """Genera las filas (tuplas en el orden de COLUMNAS) ordenadas por fecha."""
+        condiciones, params = [], []
+        if desde:
+            condiciones.append("fecha >= ?")
+            params.append(desde)
+        if hasta:
+            condiciones.append("fecha < ?")
+            params.append(hasta)
+        if idioma:
+            condiciones.append("idioma = ?")
+            params.append(idioma)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        con = _conectar(self.ruta)
+        try:
+            cur = con.execute(f"SELECT {', '.join(COLUMNAS)} FROM analisis {where} ORDER BY fecha, id", params)
+            while True:
+                bloque = cur.fetchmany(1000)
+                if not bloque:
+                    break
+                yield from bloque
+        finally:
+            con.close()
+
+    def ultimo_id(self) -> int:
+        """Mayor id guardado (0 si no hay filas): cambia con cada guardado."""
+        return self._consultar("SELECT COALESCE(MAX(id), 0) FROM analisis", ())[0][0]
+
+    def iterar_desde(self, id_minimo: int = 0):
+        """Genera (id, *COLUMNAS) de las filas con id > `id_minimo`, en orden de id."""
+        con = _conectar(self.ruta)
+        try:
+            cur = con.execute(f"SELECT id, {', '.join(COLUMNAS)} FROM analisis WHERE id > ? ORDER BY id", (id_minimo,))
+            while True:
+                bloque = cur.fetchmany(5000)
+                if not bloque:
+                    break
+                yield from bloque
+        finally:
+            con.close()
+
+    # ---------- agregados (conteos incrementales) ----------
+    @staticmethod
+    def _filtro_dias(desde, hasta, idioma):
+        condiciones, params = [], []
+        if desde:
+            condiciones.append("dia >= ?")
+            params.append(str(desde))
+        if hasta:
+            condiciones.append("dia <= ?")
+            params.append(str(hasta))
+        if idioma:
+            condiciones.append("idioma = ?")
+            params.append(idioma)
+        return "".join(f" AND {c}" for c in condiciones), params
+
+    def _consultar(self, sql: str, params) -> list:
+        con = _conectar(self.ruta)
+        try:
+            return con.execute(sql, params).fetchall()
+        finally:
+            con.close()
+
+    def rango_dias(self):
+        """(primer día, último día) con análisis, o (None, None)."""
+        return tuple(self._consultar("SELECT MIN(dia), MAX(dia) FROM conteos", ())[0])
+
+    def conteos(self, atributo: str, desde=None, hasta=None, idioma=None) -> list:
+        """[(valor, n)] de un atributo entre dos días (inclusive), de mayor a menor."""
+        filtro, params = self._filtro_dias(desde, hasta, idioma)
+        return self._consultar(
+            f"SELECT valor, SUM(n) FROM conteos WHERE atributo = ?{filtro} GROUP BY valor HAVING SUM(n) > 0 ORDER BY 2 DESC",
+            [atributo, *params],
+        )
+
+    def serie(self, atributo: str, desde=None, hasta=None, idioma=None) -> list:
+        """[(día, valor, n)] de un atributo, ordenado por día."""
+        filtro, params = self._filtro_dias(desde, hasta, idioma)
+        return self._consultar(
+            f"SELECT dia, valor, SUM(n) FROM conteos WHERE atributo = ?{filtro} GROUP BY dia, valor HAVING SUM(n) > 0 ORDER BY dia",
+            [atributo, *params],
+        )
+
+    def coocurrencia(self, atr_a: str, atr_b: str, desde=None, hasta=None, idioma=None) -> list:
+        """[(valor de atr_a, valor de atr_b, n)] para dos atributos distintos."""
+        invertido = ATRIBUTOS_AGREGADOS.index(atr_a) > ATRIBUTOS_AGREGADOS.index(atr_b)
+        a, b = (atr_b, atr_a) if invertido else (atr_a, atr_b)
+        filtro, params = self._filtro_dias(desde, hasta, idioma)
+        filas = self._consultar(
+            f"SELECT valor_a, valor_b, SUM(n) FROM coocurrencias WHERE atr_a = ? AND atr_b = ?{filtro} "
+            f"GROUP BY valor_a, valor_b HAVING SUM(n) > 0",
+            [a, b, *params],
+        )
+        return [(vb, va, n) for va, vb, n in filas] if invertido else filas
+
+    # ---------- importación / exportación ----------
+    def importar_csv(self, ruta_csv: str) -> int:
+        """Importa un CSV en cualquiera de los dos formatos históricos.
+
+        Reimportar el mismo archivo no duplica filas (clave: origen + id externo).
+        """
+        return sum(self.guardar_lote(lote) for lote in _lotes(filas_csv_historico(ruta_csv), self.tamano_lote))
+
+    def exportar_csv(self, destino) -> int:
+        """Escribe el historial en CSV (ruta o archivo de texto abierto)."""
+        if isinstance(destino, str):
+            with open(destino, "w", newline="", encoding="utf-8") as f:
+                return self.exportar_csv(f)
+        writer = csv.writer(destino)
+        writer.writerow(COLUMNAS)
+        n = 0
+        for fila in self.iterar():
+            writer.writerow(fila)
+            n += 1
+        return n
+
+
+def filas_csv_historico(ruta_csv: str):
+    """Normaliza las filas de un CSV histórico al esquema del almacén.
+
+    El formato se detecta por fila (cantidad de columnas), porque la app escribía
+    filas de 7 columnas incluso en archivos que ya tenían el encabezado antiguo.
+    """
+    origen = f"csv:{os.path.basename(ruta_csv)}"
+    with open(ruta_csv, newline="", encoding="utf-8") as f:
+        for n, fila in enumerate(csv.reader(f), start=1):
+            if not fila or fila in (ENCABEZADOS_CSV_APP, ENCABEZADOS_CSV_ANTIGUO):
+                continue
+            if len(fila) == len(ENCABEZADOS_CSV_APP):
+                fecha, idioma, color, textura, estructura, humedad, raices = fila
+                yield {
+                    "fecha": fecha, "idioma": idioma, "color": color, "textura": textura,
+                    "estructura": estructura, "humedad": humedad, "raices": raices,
+                    "origen": origen, "id_externo": str(n),
+                }
+            elif len(fila) == len(ENCABEZADOS_CSV_ANTIGUO):
+                d = dict(zip(ENCABEZADOS_CSV_ANTIGUO, fila))
+                yield {
+                    "fecha": d["Timestamp"], "idioma": "es", "color": d["Color_Suelo"],
+                    "textura": d["Clase_Textural"], "estructura": d["Forma_Agregado"],
+                    "humedad": d["Condicion_Humedad"], "raices": d["Presencia_Raices"],
+                    "munsell": d["Codigo_Munsell"], "imagen_nombre": d["Imagen_Cargada"],
+                    "origen": origen, "id_externo": d["ID_Analisis"] or str(n),
+                }
+
+
+def _lotes(iterable, tamano: int):
+    lote = []
+    for item in iterable:
+        lote.append(item)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Almacén de análisis de suelos (SQLite).")
+    parser.add_argument("--db", default=ARCHIVO_DB)
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_imp = sub.add_parser("importar", help="importa CSV históricos (ambos formatos)")
+    p_imp.add_argument("csv", nargs="+")
+    p_exp = sub.add_parser("exportar-csv", help="exporta el historial a CSV")
+    p_exp.add_argument("destino")
+    args = parser.parse_args(argv)
+
+    almacen = AlmacenAnalisis(args.db)
+    if args.comando == "importar":
+        for ruta in args.csv:
+            print(f"{ruta}: {almacen.importar_csv(ruta)} filas nuevas")
+    else:
+        print(f"{almacen.exportar_csv(args.destino)} filas → {args.destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
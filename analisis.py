@@ -0,0 +1,84 @@
+"""Lógica de análisis sin dependencias de Streamlit.
+
+La usan la app (app4.py) y el análisis por lotes (analisis_lote.py): se puede
+importar sin efectos secundarios como st.set_page_config.
+"""
+import os
+
+from catalogo import construir_catalogo
+from color_munsell import estimar_munsell
+from exportar import excel_reporte
+from imagen_muestra import procesar_imagen
+from opciones import ATRIBUTOS, CATEGORIA_REFERENCIA, OPCIONES, etiqueta
+from raices_humedad import estimar_humedad, estimar_raices
+from reglas import recomendaciones
+from rutas import RAIZ
+from similitud import construir_indice, rasgos_imagen
+from textos import INTERP, TEXT_CONTENT
+
+REFERENCIAS_DIR = os.path.join(RAIZ, "referencias")
+# Las carpetas de referencia se llaman igual que los IDs de opciones.
+CARPETAS_REFERENCIA = {categoria: set(OPCIONES[atributo]) for atributo, categoria in CATEGORIA_REFERENCIA.items()}
+# Categorías cuyas referencias se ordenan por similitud con la imagen subida.
+CATEGORIAS_SIMILITUD = ("textura", "forma-estructura")
+
+
+# ================================
+# IMAGEN
+# ================================
+def analizar_imagen(datos: bytes) -> dict:
+    """Decodifica la imagen una vez y calcula todo lo automático.
+
+    Devuelve el dict de imagen_muestra.procesar_imagen con, además, "munsell"
+    (estimación de color o None), "raices" y "humedad" (estimaciones de
+    raices_humedad) y "rasgos" (vector para similitud).
+    Lanza imagen_muestra.ImagenInvalida si la imagen no se puede leer.
+    """
+    muestra = procesar_imagen(datos)
+    muestra["munsell"] = estimar_munsell(muestra["array"])
+    muestra["raices"] = estimar_raices(muestra["array"])
+    muestra["humedad"] = estimar_humedad(muestra["array"])
+    muestra["rasgos"] = rasgos_imagen(muestra["array"])
+    return muestra
+
+
+def indice_de_catalogo(catalogo: dict) -> dict:
+    """Índice de similitud (similitud.construir_indice) sobre las categorías de CATEGORIAS_SIMILITUD."""
+    return construir_indice(
+        (categoria, carpeta, ruta)
+        for (categoria, carpeta), rutas in sorted(catalogo["imagenes"].items())
+        if categoria in CATEGORIAS_SIMILITUD
+        for ruta in rutas
+    )
+
+
+def cargar_indice_referencias(base: str = REFERENCIAS_DIR) -> dict:
+    return indice_de_catalogo(construir_catalogo(base, CARPETAS_REFERENCIA))
+
+
+# ================================
+# REPORTE (3 bloques)
+# ================================
+ROTULOS = {
+    "color": "color_label", "textura": "texture_label", "estructura": "aggregation_label",
+    "humedad": "moisture_label", "raices": "roots_label",
+}
+
+
+def armar_reporte(lang_code, selecciones):
+    """(resumen, interpretación, recomendaciones) para los IDs de (color, textura, estructura, humedad, raíces)."""
+    t = TEXT_CONTENT[lang_code]
+    ids = dict(zip(ATRIBUTOS, selecciones))
+    resumen_list = [f"{t[ROTULOS[a]]}: {etiqueta(a, ids[a], lang_code)}" for a in ATRIBUTOS]
+    piezas = [INTERP[lang_code][a].get(ids[a], "") for a in ATRIBUTOS]
+    return resumen_list, piezas, recomendaciones(ids, lang_code)
+
+
+def excel_de_reporte(lang_code, selecciones, fecha) -> bytes:
+    t = TEXT_CONTENT[lang_code]
+    resumen, interpretacion, recomendaciones = armar_reporte(lang_code, selecciones)
+    return excel_reporte(t["app_title"], fecha, [
+        (t["summary_title"], resumen),
+        (t["interpret_block_title"], [p for p in interpretacion if p]),
+        (t["recs_title"], recomendaciones),
+    ])
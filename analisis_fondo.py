@@ -0,0 +1,59 @@
+"""Análisis de imágenes en segundo plano, compartido entre sesiones.
+
+Apenas se sube una foto se encola su análisis (analisis.analizar_imagen:
+decodificación, reducción, validación, color Munsell y rasgos de similitud) en
+un pool de hilos, con el hash del contenido como clave. Si otra sesión sube la
+misma imagen se reutiliza el mismo trabajo. Mientras tanto la app sigue
+respondiendo y el reporte toma el resultado cuando está listo.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from analisis import analizar_imagen
+from imagen_muestra import sha256_bytes
+
+
+class AnalisisEnFondo:
+    """Pool de hilos + resultados por hash (se conservan los `max_resultados` más recientes)."""
+
+    def __init__(self, funcion=analizar_imagen, hilos: int = None, max_resultados: int = 32):
+        self._funcion = funcion
+        self._pool = ThreadPoolExecutor(max_workers=hilos or min(4, os.cpu_count() or 1), thread_name_prefix="analisis")
+        self._futuros = OrderedDict()   # sha256 -> Future
+        self._max = max_resultados
+        self._lock = threading.Lock()
+
+    def enviar(self, datos: bytes, sha: str = None) -> str:
+        """Encola el análisis de `datos` (si no está ya encolado) y devuelve su sha256."""
+        sha = sha or sha256_bytes(datos)
+        with self._lock:
+            if sha in self._futuros:
+                self._futuros.move_to_end(sha)
+                return sha
+            self._futuros[sha] = self._pool.submit(self._funcion, datos)
+            # Se descartan los resultados más viejos ya terminados (los pendientes nunca).
+            for viejo in [s for s, f in self._futuros.items() if f.done()][: max(0, len(self._futuros) - self._max)]:
+                del self._futuros[viejo]
+        return sha
+
+    def __contains__(self, sha: str) -> bool:
+        with self._lock:
+            return sha in self._futuros
+
+    def listo(self, sha: str) -> bool:
+        """True si el análisis terminó (bien o con error)."""
+        with self._lock:
+            futuro = self._futuros.get(sha)
+        return futuro is not None and futuro.done()
+
+    def resultado(self, sha: str, timeout: float = None) -> dict:
+        """Espera y devuelve el resultado (compartido: no modificarlo).
+
+        Propaga imagen_muestra.ImagenInvalida; KeyError si `sha` no fue enviado
+        o ya se descartó.
+        """
+        with self._lock:
+            futuro = self._futuros[sha]
+        return futuro.result(timeout)
@@ -0,0 +1,198 @@
+"""Análisis por lotes de fotos de campo, sin la interfaz de Streamlit.
+
+    python analisis_lote.py fotos/ --atributos atributos.csv --excel campania.xlsx
+
+Cada imagen se decodifica, se reduce y se analiza (color Munsell, raíces,
+humedad, similitud con las referencias) en un pool de procesos. Los resultados
+se guardan en el almacén de análisis (los mismos registros que "Guardar
+análisis") y en un libro Excel que se escribe a medida que llegan, junto con la
+interpretación de 3 bloques.
+
+El CSV de atributos es opcional: columna `archivo` (nombre de la imagen) y
+cualquiera de `color`, `textura`, `estructura`, `humedad`, `raices`, con el ID
+de la opción (opciones.py, igual al nombre de la carpeta de referencia) o su
+texto en cualquier idioma. Lo que el CSV no indique se completa con la
+estimación automática (color, textura, estructura, humedad y raíces).
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from almacen import ARCHIVO_DB, AlmacenAnalisis
+from analisis import REFERENCIAS_DIR, analizar_imagen, armar_reporte, cargar_indice_referencias
+from catalogo import EXTENSIONES_IMAGEN
+from exportar import exportar_historial_xlsx
+from imagen_muestra import ImagenInvalida
+from opciones import ATRIBUTOS, CATEGORIA_REFERENCIA, OPCIONES, etiqueta, id_canonico
+from similitud import sugerir
+from textos import TEXT_CONTENT
+
+ENCABEZADOS = [
+    "Archivo", "SHA256", "Munsell", "Confianza color", "Color", "Textura", "Estructura",
+    "Humedad", "Raíces", "Interpretación", "Recomendaciones", "Error",
+]
+CATEGORIA_DE = {"textura": CATEGORIA_REFERENCIA["textura"], "estructura": CATEGORIA_REFERENCIA["estructura"]}
+TAMANO_LOTE_DB = 100
+
+
+# ================================
+# TRABAJO POR IMAGEN (en cada proceso)
+# ================================
+_indice = None
+
+
+def _inicializar(indice):
+    global _indice
+    _indice = indice
+
+
+def analizar_archivo(ruta: str) -> dict:
+    """Analiza una imagen. Devuelve solo datos livianos (sin arreglos de píxeles)."""
+    try:
+        with open(ruta, "rb") as f:
+            muestra = analizar_imagen(f.read())
+    except ImagenInvalida as e:
+        return {"ruta": ruta, "error": e.motivo}
+    except OSError as e:
+        return {"ruta": ruta, "error": str(e)}
+
+    sugerencias = {}
+    if _indice is not None and _indice["rutas"]:
+        for categoria, sug in sugerir(_indice, muestra["rasgos"]).items():
+            sugerencias[categoria] = (sug["carpeta"], sug["confianza"])
+    return {
+        "ruta": ruta, "sha256": muestra["sha256"], "munsell": muestra["munsell"], "sugerencias": sugerencias,
+        "humedad": muestra["humedad"], "raices": muestra["raices"],
+    }
+
+
+# ================================
+# ENTRADAS
+# ================================
+def listar_imagenes(directorio: str) -> list:
+    rutas = []
+    for raiz, _dirs, archivos in os.walk(directorio):
+        rutas.extend(os.path.join(raiz, a) for a in archivos if a.lower().endswith(EXTENSIONES_IMAGEN))
+    return sorted(rutas)
+
+
+def leer_atributos(ruta_csv: str) -> dict:
+    """{nombre_de_archivo: {atributo: valor}} a partir del CSV de atributos."""
+    if not ruta_csv:
+        return {}
+    with open(ruta_csv, newline="", encoding="utf-8") as f:
+        return {
+            os.path.basename(fila["archivo"]): {k: v for k, v in fila.items() if k in ATRIBUTOS and v}
+            for fila in csv.DictReader(f)
+            if fila.get("archivo")
+        }
+
+
+def selecciones_de(resultado: dict, atributos: dict) -> tuple:
+    """IDs de (color, textura, estructura, humedad, raíces): CSV primero, luego lo automático.
+
+    Un valor del CSV que no se reconoce queda tal cual (se muestra y se guarda como vino).
+    """
+    elegidas = {k: id_canonico(k, v) or v for k, v in atributos.items()}
+    if "color" not in elegidas and resultado.get("munsell"):
+        elegidas["color"] = resultado["munsell"]["clase"]
+    for atributo, categoria in CATEGORIA_DE.items():
+        sug = resultado.get("sugerencias", {}).get(categoria)
+        if atributo not in elegidas and sug and sug[0] in OPCIONES[atributo]:
+            elegidas[atributo] = sug[0]
+    for atributo in ("humedad", "raices"):
+        if atributo not in elegidas and resultado.get(atributo):
+            elegidas[atributo] = resultado[atributo]["clase"]
+    return tuple(elegidas.get(a) for a in ATRIBUTOS)
+
+
+# ================================
+# PROCESO COMPLETO
+# ================================
+def procesar_lote(rutas, atributos: dict, lang_code: str, procesos: int = None, almacen=None, progreso=None,
+                  indice: dict = None):
+    """Genera filas (según ENCABEZADOS) a medida que terminan las imágenes.
+
+    Si se pasa `almacen`, cada imagen válida se guarda también allí (en lotes).
+    Sin `indice` se usa el de las referencias de REFERENCIAS_DIR.
+    """
+    indice = indice if indice is not None else cargar_indice_referencias()
+    pendientes_db = []
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    procesos = procesos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar, initargs=(indice,)) as pool:
+        chunksize = max(1, len(rutas) // (4 * procesos))
+        for n, resultado in enumerate(pool.map(analizar_archivo, rutas, chunksize=chunksize), start=1):
+            nombre = os.path.basename(resultado["ruta"])
+            if "error" in resultado:
+                fila = [nombre, "", "", "", "", "", "", "", "", "", "", resultado["error"]]
+            else:
+                selecciones = selecciones_de(resultado, atributos.get(nombre, {}))
+                _, piezas, recs = armar_reporte(lang_code, selecciones)
+                munsell = resultado["munsell"] or {}
+                fila = [
+                    nombre, resultado["sha256"], munsell.get("munsell", ""), munsell.get("confianza", ""),
+                    *(etiqueta(a, v, lang_code) for a, v in zip(ATRIBUTOS, selecciones)),
+                    "\n".join(p for p in piezas if p), "\n".join(recs), "",
+                ]
+                if almacen is not None:
+                    pendientes_db.append({
+                        "fecha": fecha, "idioma": lang_code,
+                        **dict(zip(ATRIBUTOS, selecciones)),
+                        "munsell": munsell.get("munsell"), "imagen_sha256": resultado["sha256"],
+                        "imagen_nombre": nombre, "origen": "lote", "id_externo": resultado["sha256"],
+                    })
+                    if len(pendientes_db) >= TAMANO_LOTE_DB:
+                        almacen.guardar_lote(pendientes_db)
+                        pendientes_db = []
+            if progreso:
+                progreso(n)
+            yield fila
+    if almacen is not None and pendientes_db:
+        almacen.guardar_lote(pendientes_db)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Análisis por lotes de imágenes de suelo.")
+    parser.add_argument("directorio", help="carpeta con las fotos (se recorre recursivamente)")
+    parser.add_argument("--atributos", help="CSV con columna 'archivo' y atributos por imagen")
+    parser.add_argument("--idioma", choices=sorted(TEXT_CONTENT), default="es")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos en paralelo (por defecto, núcleos)")
+    parser.add_argument("--excel", default=f"analisis_lote_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx")
+    parser.add_argument("--db", default=ARCHIVO_DB)
+    parser.add_argument("--referencias", default=REFERENCIAS_DIR, help="carpeta de imágenes de referencia")
+    parser.add_argument("--sin-guardar", action="store_true", help="no registrar en el almacén de análisis")
+    args = parser.parse_args(argv)
+
+    rutas = listar_imagenes(args.directorio)
+    if not rutas:
+        print(f"No se encontraron imágenes en {args.directorio}", file=sys.stderr)
+        return 1
+    indice = cargar_indice_referencias(args.referencias)
+    if not indice["rutas"]:
+        # Sin referencias no hay sugerencias de textura ni estructura:
+        # mejor no guardar filas incompletas.
+        print(f"No hay imágenes de referencia en {args.referencias} (ver --referencias)", file=sys.stderr)
+        return 1
+    almacen = None if args.sin_guardar else AlmacenAnalisis(args.db)
+
+    def progreso(n):
+        if n % 50 == 0 or n == len(rutas):
+            print(f"  {n}/{len(rutas)}", file=sys.stderr)
+
+    inicio = time.perf_counter()
+    filas = procesar_lote(
+        rutas, leer_atributos(args.atributos), args.idioma, args.procesos, almacen, progreso, indice
+    )
+    n = exportar_historial_xlsx([("Análisis", ENCABEZADOS, filas)], args.excel)
+    duracion = time.perf_counter() - inicio
+    print(f"{n} imágenes en {duracion:.1f} s ({n / duracion:.1f} img/s) → {args.excel}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,22 @@
 import streamlit as st
-import os, csv, glob
+import os, io, tempfile, time
 from datetime import datetime
-from openpyxl import Workbook
+from functools import partial
+
+import metricas
+from almacen import COLUMNAS
+from analisis import REFERENCIAS_DIR, analizar_imagen, armar_reporte, excel_de_reporte
+from analisis_fondo import AnalisisEnFondo
+from catalogo import imagenes_de
+from exportar import MIME_XLSX, exportar_historial_xlsx
+from imagen_muestra import LIMITE_BYTES, LIMITE_PIXELES_ORIGEN, ImagenInvalida
+from opciones import CATEGORIA_REFERENCIA, OPCIONES, etiqueta
+from paquete_miniaturas import miniatura
+from recursos import (
+    acceso_docente, obtener_almacen, obtener_catalogo, obtener_estilos, obtener_indice_similitud, obtener_paquete, url_logo,
+)
+from similitud import ordenar_rutas, sugerir
+from textos import TEXT_CONTENT
 
 # ================================
 # CONFIG INICIAL
@@ -9,326 +24,308 @@ from openpyxl import Workbook
 st.set_page_config(page_title="Análisis de Suelos", page_icon="🌱", layout="wide")
 
 # ================================
-# ESTILOS (CSS)
+# MÉTRICAS (solo con SUELOS_METRICAS=1; ver metricas.py)
 # ================================
-st.markdown("""
-<link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&display=swap" rel="stylesheet">
-<style>
-html, body, [class*="css"] {
-    font-family: 'Poppins', sans-serif;
-}
-div.stButton > button {
-    background-color: #4CAF50;
-    color: white;
-    border-radius: 10px;
-    height: 3em;
-    width: 100%;
-    font-size: 16px;
-    font-weight: 600;
-    transition: 0.25s ease;
-    border: 0;
-}
-div.stButton > button:hover {
-    background-color: #3c9442;
-    color: #f9f9f9;
-    transform: translateY(-1px);
-}
-</style>
-""", unsafe_allow_html=True)
+_inicio_rerun = time.perf_counter() if metricas.ACTIVO else None
 
-# ================================
-# LOGO (sidebar)
-# ================================
-if os.path.exists("logo.png"):
-    st.sidebar.image("logo.png", use_container_width=True)
-else:
-    st.sidebar.markdown("**Kawsaypacha – Tierra Viva**")
+
+def _id_sesion():
+    if not metricas.ACTIVO:
+        return None
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+def _mostrar_imagen(destino, imagen, **kwargs):
+    """st.image que además cuenta los bytes de imagen enviados al navegador."""
+    if metricas.ACTIVO:
+        n = len(imagen) if isinstance(imagen, bytes) else os.path.getsize(imagen)
+        metricas.contar("bytes_imagenes", n, _id_sesion())
+    destino.image(imagen, **kwargs)
+
+
+def _fin_rerun():
+    if _inicio_rerun is None:
+        return
+    ms = (time.perf_counter() - _inicio_rerun) * 1000.0
+    metricas.observar("rerun", ms)
+    metricas.contar("reruns", 1, _id_sesion())
+    metricas.volcar_jsonl(os.environ.get("SUELOS_METRICAS_JSONL"), {"sesion": _id_sesion(), "rerun_ms": round(ms, 2)})
+
+
+def panel_admin():
+    """Panel de métricas en la barra lateral, solo con ?admin=<SUELOS_ADMIN_TOKEN>."""
+    if not (metricas.ACTIVO and acceso_docente()):
+        return
+    estado = metricas.resumen()
+    with st.sidebar.expander("📊 Métricas", expanded=False):
+        st.caption(f"Sesiones activas: {estado['sesiones_activas']} · ventana {metricas.VENTANA_S // 60} min")
+        st.dataframe(
+            [{"tramo": nombre, **datos} for nombre, datos in sorted(estado["tramos"].items())],
+            hide_index=True, width="stretch",
+        )
+        st.json(estado["contadores"])
+        st.download_button("metrics.txt", data=metricas.texto_prometheus(), file_name="metrics.txt", mime="text/plain")
+
+
+if metricas.ACTIVO and os.environ.get("SUELOS_METRICAS_PUERTO"):
+    metricas.iniciar_servidor(int(os.environ["SUELOS_METRICAS_PUERTO"]), os.environ.get("SUELOS_METRICAS_HOST", "127.0.0.1"))
 
 # ================================
-# MAPEOS DE CARPETAS
+# ESTILOS (CSS): static/estilos.css con fuentes locales, sin pedidos a Google Fonts
 # ================================
-COLOR_FOLDER_MAP = {
-    "es": {
-        "rojo-intenso": "rojo-intenso",
-        "rojo-amarillento": "rojo-amarillento",
-        "amarillo": "amarillo",
-        "marrón": "marron",
-        "pardo-marrón": "pardo-marron",
-        "negro": "negro",
-        "gris": "gris",
-        "blanco": "blanco",
-    },
-    "pt": {
-        "vermelho-intenso": "rojo-intenso",
-        "vermelho-amarelado": "rojo-amarillento",
-        "amarelo": "amarillo",
-        "marrom": "marron",
-        "pardo-marrom": "pardo-marron",
-        "preto": "negro",
-        "cinza": "gris",
-        "branco": "blanco",
-    },
-}
-
-TEXTURE_FOLDER_MAP = {
-    "es": {"arcilloso": "arcilloso", "arenoso": "arenoso", "franco": "franco", "limoso": "limoso"},
-    "pt": {"argiloso": "arcilloso", "arenoso": "arenoso", "franco": "franco", "siltoso": "limoso"},
-}
-
-STRUCTURE_FOLDER_MAP = {
-    "es": {
-        "granular": "granular",
-        "migajosa": "migajosa",
-        "bloques": "bloques",
-        "prismatica-columnar": "prismatica-columnar",
-        "laminar": "laminar",
-        "masiva": "masiva",
-        "suelto": "suelto",
-    },
-    "pt": {
-        "granular": "granular",
-        "migajosa": "migajosa",
-        "blocos": "bloques",
-        "prismática-colunar": "prismatica-columnar",
-        "laminar": "laminar",
-        "maciça": "masiva",
-        "solto": "suelto",
-    },
-}
+with metricas.tramo("css"):
+    st.markdown(obtener_estilos(), unsafe_allow_html=True)
 
 # ================================
-# TEXTOS
+# LOGO (sidebar)
 # ================================
-TEXT_CONTENT = {
-    "es": {
-        "app_title": "🌱 Análisis Visual de Suelos",
-        "start_btn": "🚀 Comenzar análisis",
-        "intro": """
-**Bienvenido/a a esta plataforma educativa para explorar el mundo del suelo de manera visual e interactiva.**
-Aquí podrás analizar algunas de sus principales características físicas y comprender cómo influyen en su interpretación.
-
-👉 Elige primero el **idioma que prefieras** y luego:
-1. **Sube una imagen de suelo** que quieras analizar.  
-2. **Selecciona sus características** (color, textura, estructura, humedad, raíces).  
-3. **Compara con las referencias visuales** que irán apareciendo en cada categoría.
-
-Tendrás una experiencia guiada paso a paso, como si fuera una “lupa virtual” para comprender mejor el suelo. 🚀
-""",
-        "upload_label": "📤 Subir imagen de suelo",
-        "uploaded_caption": "📸 Imagen subida",
-        "color_label": "🎨 Color del suelo",
-        "texture_label": "🌾 Textura del suelo",
-        "aggregation_label": "🧱 Forma / Estructura",
-        "moisture_label": "💧 Humedad",
-        "roots_label": "🌱 Presencia de raíces",
-        "select_phrase": "👉 Selecciona tu opción comparando con la referencia:",
-        "summary_title": "1️⃣ Resumen",
-        "interpret_block_title": "2️⃣ Interpretación técnica",
-        "recs_title": "3️⃣ Recomendaciones de manejo",
-        "save_button": "💾 Guardar análisis",
-        "excel_button": "📥 Descargar en Excel",
-        "csv_file": "analisis_suelos.csv",
-        "placeholder": "Seleccionar opción",
-        "moisture_opts": ["Seleccionar opción", "Baja", "Media", "Alta"],
-        "roots_opts": ["Seleccionar opción", "Ausentes", "Escasas", "Abundantes"],
-        "color_opts": ["Seleccionar opción", "rojo-intenso", "rojo-amarillento", "amarillo", "marrón", "pardo-marrón", "negro", "gris", "blanco"],
-        "texture_opts": ["Seleccionar opción", "arcilloso", "arenoso", "franco", "limoso"],
-        "structure_opts": ["Seleccionar opción", "granular", "migajosa", "bloques", "prismatica-columnar", "laminar", "masiva", "suelto"],
-        "no_images_msg": "No se encontraron imágenes en la carpeta",
-        "no_folder_msg": "No existe carpeta de referencia para",
-    },
-   "pt": {
-        "app_title": "🌱 Análise Visual de Solos",
-        "start_btn": "🚀 Iniciar análise",
-        "intro": """
-**Bem-vindo(a) a esta plataforma educativa para explorar o mundo do solo de forma visual e interativa.**
-Aqui você poderá analisar algumas de suas principais características físicas e entender como elas influenciam na interpretação do solo.
-
-👉 Primeiro, escolha o **idioma de sua preferência** e depois:
-1. **Envie uma imagem do solo** que deseja analisar.  
-2. **Selecione suas características** (cor, textura, estrutura, umidade, raízes).  
-3. **Compare com as referências visuais** que aparecerão em cada categoria.
-
-Você terá uma experiência guiada passo a passo, como uma “lupa virtual” para compreender melhor o solo. 🚀
-""",
-        "upload_label": "📤 Enviar imagem do solo",
-        "uploaded_caption": "📸 Imagem enviada",
-        "color_label": "🎨 Cor do solo",
-        "texture_label": "🌾 Textura do solo",
-        "aggregation_label": "🧱 Forma / Estrutura",
-        "moisture_label": "💧 Umidade",
-        "roots_label": "🌱 Presença de raízes",
-        "select_phrase": "👉 Selecione sua opção comparando com a referência:",
-        "summary_title": "1️⃣ Resumo",
-        "interpret_block_title": "2️⃣ Interpretação técnica",
-        "recs_title": "3️⃣ Recomendações de manejo",
-        "save_button": "💾 Salvar análise",
-        "excel_button": "📥 Baixar em Excel",
-        "csv_file": "analises_solos.csv",
-        "placeholder": "Selecionar opção",
-        "moisture_opts": ["Selecionar opção", "Baixa", "Média", "Alta"],
-        "roots_opts": ["Selecionar opção", "Ausentes", "Escassas", "Abundantes"],
-        "color_opts": ["Selecionar opção", "vermelho-intenso", "vermelho-amarelado", "amarelo", "marrom", "pardo-marrom", "preto", "cinza", "branco"],
-        "texture_opts": ["Selecionar opção", "argiloso", "arenoso", "franco", "siltoso"],
-        "structure_opts": ["Selecionar opção", "granular", "migajosa", "blocos", "prismática-colunar", "laminar", "maciça", "solto"],
-        "no_images_msg": "Não foram encontradas imagens na pasta",
-        "no_folder_msg": "Não existe pasta de referência para",
-    },
-}
+with metricas.tramo("logo"):
+    logo_url = url_logo()
+    if logo_url:
+        # Archivo estático ya reducido (python paquete_miniaturas.py): el navegador lo
+        # pide una vez y lo cachea; no pasa por el mensaje de cada rerun ni por /media.
+        st.sidebar.markdown(
+            f'<img src="{logo_url}" alt="Kawsaypacha – Tierra Viva" style="width:100%">', unsafe_allow_html=True,
+        )
+    elif os.path.exists("logo.png"):
+        _mostrar_imagen(st.sidebar, "logo.png", width="stretch")
+    else:
+        st.sidebar.markdown("**Kawsaypacha – Tierra Viva**")
+
 # ================================
-# INTERPRETACIONES DETALLADAS (ES/PT)
+# ANÁLISIS DE IMÁGENES EN SEGUNDO PLANO (compartido entre sesiones)
 # ================================
-INTERP = {
-    "es": {
-        "color": {
-            "rojo-intenso": "El color rojo intenso suele reflejar abundancia de óxidos de hierro (hematita), asociado a buen drenaje y ambientes bien aireados; puede indicar baja materia orgánica si los tonos son muy vivos.",
-            "rojo-amarillento": "El color rojo-amarillento indica presencia de óxidos de hierro hidratados (goethita) y condiciones de oxidación moderadas; sugiere drenaje de medio a bueno.",
-            "amarillo": "El color amarillo está vinculado a goethita y a veces a condiciones de drenaje menos eficientes; puede aparecer en suelos lixiviados con fertilidad moderada.",
-            "marrón": "El color marrón suele reflejar contenido moderado de materia orgánica y complejos Fe-Humus; frecuentemente asociado a fertilidad intermedia y actividad biológica moderada.",
-            "pardo-marrón": "El pardo-marrón es una transición con influencia tanto de compuestos férricos como de materia orgánica; sugiere fertilidad aceptable y buena estabilidad estructural superficial.",
-            "negro": "El color negro indica alto contenido de carbono orgánico y humificación avanzada; suelos fértiles, con alta capacidad de intercambio catiónico pero susceptibles a anegamiento si la estructura es deficiente.",
-            "gris": "El color gris sugiere condiciones reductoras por saturación de agua (gley), con hierro reducido; drenaje deficiente y posible anoxia radicular.",
-            "blanco": "El color blanco se relaciona con arenas muy lavadas o acumulación de sales/carbonatos; indica baja fertilidad y escasa capacidad de retener agua y nutrientes.",
-        },
-        "texture": {
-            "arcilloso": "Textura arcillosa: alta retención de agua y nutrientes; drenaje lento y riesgo de compactación; plasticidad y pegajosidad elevadas.",
-            "arenoso": "Textura arenosa: drenaje muy rápido, baja retención de agua y nutrientes; susceptible a sequía y lixiviación de fertilizantes.",
-            "franco": "Textura franca: equilibrio entre arena, limo y arcilla; buena aireación y retención, ideal para la mayoría de cultivos.",
-            "limoso": "Textura limosa: mayor retención de agua que arenosos, pero estructura menos estable; riesgo de encostramiento superficial.",
-        },
-        "structure": {
-            "granular": "Estructura granular: agregados pequeños y redondeados con alta porosidad; excelente para aireación, infiltración y crecimiento radicular (común en horizontes A ricos en MO).",
-            "migajosa": "Estructura migajosa: similar a la granular pero más porosa e irregular; muy deseable en suelos agrícolas por equilibrio aire-agua.",
-            "bloques": "Estructura en bloques (subangular/angular): agregados cúbicos/poliédricos; moderada a fuerte; puede restringir el crecimiento radicular si se compacta.",
-            "prismatica-columnar": "Estructura prismática/columnar: agregados verticales con tope plano (prismática) o redondeado (columnar); asociados a horizontes B con arcillas y/o sodicidad; drenaje limitado.",
-            "laminar": "Estructura laminar: agregados en láminas horizontales; muy restrictiva para infiltración y raíces; típica de compactación o horizontes E.",
-            "masiva": "Estructura masiva: sin agregación discernible; baja porosidad y drenaje deficiente; limita la aireación y el desarrollo radicular.",
-            "suelto": "Sin estructura (suelto): partículas individuales; alta permeabilidad pero baja fertilidad y escasa retención de agua (típico de suelos arenosos).",
-        },
-        "moisture": {
-            "Baja": "Humedad baja: potencial estrés hídrico, mayor esfuerzo para establecimiento de plántulas.",
-            "Media": "Humedad media: condición intermedia adecuada para la mayoría de cultivos si la estructura acompaña.",
-            "Alta": "Humedad alta: riesgo de anegamiento y anoxia; procesos reductores y pérdida de estructura.",
-        },
-        "roots": {
-            "Ausentes": "Raíces ausentes: puede indicar limitaciones físicas (compactación) o químicas (toxicidad, salinidad), o manejo reciente del suelo.",
-            "Escasas": "Raíces escasas: actividad biológica limitada y posible restricción de aireación o nutrientes.",
-            "Abundantes": "Raíces abundantes: condición favorable de aireación, porosidad y disponibilidad de agua/nutrientes.",
-        },
-    },
-    "pt": {
-        "color": {
-            "vermelho-intenso": "A cor vermelha intensa reflete abundância de óxidos de ferro (hematita), associada a boa drenagem e aeração; pode indicar baixa matéria orgânica quando os tons são muito vivos.",
-            "vermelho-amarelado": "A cor vermelho-amarelada indica presença de óxidos de ferro hidratados (goethita) e condições de oxidação moderadas; drenagem de média a boa.",
-            "amarelo": "A cor amarela está ligada à goethita e, às vezes, a drenagem menos eficiente; pode ocorrer em solos lixiviados com fertilidade moderada.",
-            "marrom": "A cor marrom reflete teor moderado de matéria orgânica e complexos Fe-Humus; frequentemente associada à fertilidade intermediária e atividade biológica moderada.",
-            "pardo-marrom": "O pardo-marrom é transicional com influência de compostos férricos e de MO; sugere fertilidade aceitável e boa estabilidade estrutural superficial.",
-            "preto": "A cor preta indica alto teor de carbono orgânico e humificação avançada; solos férteis, com alta CTC, porém suscetíveis a encharcamento se a estrutura for deficiente.",
-            "cinza": "A cor cinza sugere condições redutoras por saturação hídrica (glei), com ferro reduzido; drenagem deficiente e possível anoxia radicular.",
-            "branco": "A cor branca relaciona-se a areias muito lavadas ou acúmulo de sais/carbonatos; baixa fertilidade e fraca retenção de água e nutrientes.",
-        },
-        "texture": {
-            "argiloso": "Textura argilosa: alta retenção de água e nutrientes; drenagem lenta e risco de compactação; elevada plasticidade e pegajosidade.",
-            "arenoso": "Textura arenosa: drenagem muito rápida, baixa retenção de água e nutrientes; suscetível à seca e à lixiviação de fertilizantes.",
-            "franco": "Textura franca: equilíbrio entre areia, silte e argila; boa aeração e retenção, ideal para a maioria das culturas.",
-            "siltoso": "Textura siltosa: maior retenção de água que arenosos, mas estrutura menos estável; risco de formação de crostas superficiais.",
-        },
-        "structure": {
-            "granular": "Estrutura granular: agregados pequenos e arredondados com alta porosidade; excelente para aeração, infiltração e crescimento radicular.",
-            "migajosa": "Estrutura migajosa: semelhante à granular, porém mais porosa e irregular; muito desejável em solos agrícolas.",
-            "blocos": "Estrutura em blocos (subangular/angular): agregados cúbicos/poliedros; moderada a forte; pode restringir o crescimento radicular se compactada.",
-            "prismática-colunar": "Estrutura prismática/colunar: agregados verticais com topo plano (prismática) ou arredondado (colunar); associados a horizontes B argilosos e/ou sódicos; drenagem limitada.",
-            "laminar": "Estrutura laminar: agregados em lâminas horizontais; muito restritiva à infiltração e às raízes; típica de compactação ou horizontes E.",
-            "maciça": "Estrutura maciça: sem agregação discernível; baixa porosidade e drenagem deficiente; limita a aeração e o desenvolvimento radicular.",
-            "solto": "Sem estrutura (solto): partículas individuais; alta permeabilidade, baixa fertilidade e retenção de água (solos arenosos).",
-        },
-        "moisture": {
-            "Baixa": "Baixa umidade: potencial estresse hídrico e dificuldade de estabelecimento de plântulas.",
-            "Média": "Umidade média: condição intermediária adequada para a maioria das culturas se a estrutura ajudar.",
-            "Alta": "Alta umidade: risco de encharcamento e anoxia; processos redutores e perda de estrutura.",
-        },
-        "roots": {
-            "Ausentes": "Raízes ausentes: pode indicar limitações físicas (compactação) ou químicas (toxicidade, salinidade) ou manejo recente do solo.",
-            "Escassas": "Raízes escassas: atividade biológica limitada e possível restrição de aeração ou nutrientes.",
-            "Abundantes": "Raízes abundantes: condição favorável de aeração, porosidade e disponibilidade de água/nutrientes.",
-        },
-    },
-}
+def _analizar_medido(datos):
+    with metricas.tramo("analisis_imagen"):
+        return analizar_imagen(datos)
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_analizador():
+    return AnalisisEnFondo(_analizar_medido)
 
 
 # ================================
 # FUNCIÓN REFERENCIAS (carrusel)
 # ================================
-def mostrar_referencias(categoria: str, seleccion: str, lang_code: str):
-    if not seleccion or seleccion == TEXT_CONTENT[lang_code]["placeholder"]:
+def mostrar_referencias(atributo: str, carpeta: str, lang_code: str, ranking=None):
+    # La carpeta de referencias es el mismo ID de la opción elegida.
+    if not carpeta:
         return
 
-    if categoria == "color":
-        carpeta = COLOR_FOLDER_MAP[lang_code].get(seleccion, str(seleccion).lower())
-    elif categoria == "textura":
-        carpeta = TEXTURE_FOLDER_MAP[lang_code].get(seleccion, str(seleccion).lower())
-    elif categoria == "forma-estructura":
-        carpeta = STRUCTURE_FOLDER_MAP[lang_code].get(seleccion, str(seleccion).lower())
-    else:
-        carpeta = str(seleccion).lower()
-
-    base_path = os.path.join("referencias", categoria, carpeta)
+    categoria = CATEGORIA_REFERENCIA[atributo]
+    seleccion = etiqueta(atributo, carpeta, lang_code)
+    base_path = os.path.join(REFERENCIAS_DIR, categoria, carpeta)
+    with metricas.tramo("catalogo"):
+        imagenes = imagenes_de(obtener_catalogo(categoria, carpeta), categoria, carpeta)
 
-    if os.path.exists(base_path):
-        imagenes = sorted(
-            glob.glob(os.path.join(base_path, "*.png")) +
-            glob.glob(os.path.join(base_path, "*.jpg")) +
-            glob.glob(os.path.join(base_path, "*.jpeg"))
-        )
+    if imagenes is not None:
         if imagenes:
-            key_carousel = f"carousel_{categoria}_{carpeta}"
-            if key_carousel not in st.session_state:
-                st.session_state[key_carousel] = 0
-
-            col1, col2, col3 = st.columns([1, 3, 1])
-            with col1:
-                if st.button("⬅️", key=f"prev_{key_carousel}"):
-                    st.session_state[key_carousel] = (st.session_state[key_carousel] - 1) % len(imagenes)
-            with col3:
-                if st.button("➡️", key=f"next_{key_carousel}"):
-                    st.session_state[key_carousel] = (st.session_state[key_carousel] + 1) % len(imagenes)
-
-            img_path = imagenes[st.session_state[key_carousel]]
-            st.image(img_path, caption=f"{seleccion} ({st.session_state[key_carousel]+1}/{len(imagenes)})", width=320)
+            if ranking:
+                # Primero las referencias más parecidas a la imagen subida.
+                imagenes = ordenar_rutas(imagenes, ranking)
+            _carrusel(f"carousel_{categoria}_{carpeta}", imagenes, seleccion)
         else:
             st.warning(f"{TEXT_CONTENT[lang_code]['no_images_msg']}: {base_path}")
     else:
         st.info(f"{TEXT_CONTENT[lang_code]['no_folder_msg']} «{seleccion}» → {base_path}")
 
+
+@st.fragment
+def _carrusel(key_carousel: str, imagenes: list, seleccion: str):
+    # Fragmento: ⬅️/➡️ solo vuelven a ejecutar este bloque, no todo el script.
+    if key_carousel not in st.session_state or st.session_state[key_carousel] >= len(imagenes):
+        st.session_state[key_carousel] = 0
+
+    col1, col2, col3 = st.columns([1, 3, 1])
+    with col1:
+        if st.button("⬅️", key=f"prev_{key_carousel}"):
+            st.session_state[key_carousel] = (st.session_state[key_carousel] - 1) % len(imagenes)
+    with col3:
+        if st.button("➡️", key=f"next_{key_carousel}"):
+            st.session_state[key_carousel] = (st.session_state[key_carousel] + 1) % len(imagenes)
+
+    img_path = imagenes[st.session_state[key_carousel]]
+    # La miniatura JPEG ya tiene el ancho de pantalla: st.image la envía sin decodificarla.
+    with metricas.tramo("carrusel"):
+        _mostrar_imagen(st, miniatura(obtener_paquete(), img_path) or img_path, caption=f"{seleccion} ({st.session_state[key_carousel]+1}/{len(imagenes)})", width=320)
+
+# ================================
+# FUNCIÓN: Preselección a partir de la imagen
+# ================================
+def preseleccionar(key: str, opcion, marca):
+    # Solo una vez por imagen y sin pisar lo que el estudiante eligió
+    # mientras se analizaba la imagen: después manda su elección.
+    previa = st.session_state.get(f"{key}_preseleccion")
+    if opcion and (previa is None or previa[0] != marca):
+        actual = st.session_state.get(key)
+        if actual is None or (previa is not None and actual == previa[1]):
+            st.session_state[key] = opcion
+        st.session_state[f"{key}_preseleccion"] = (marca, opcion)
+
+
+def mostrar_sugerencia(sugerencia, atributo: str, lang_code: str):
+    """Leyenda con la clase de referencia más parecida a la imagen subida."""
+    if sugerencia and sugerencia["carpeta"] in OPCIONES[atributo]:
+        t_lang = TEXT_CONTENT[lang_code]
+        opcion = etiqueta(atributo, sugerencia["carpeta"], lang_code)
+        st.caption(f"{t_lang['similar_hint']}: **{opcion}** · {t_lang['confidence']} {sugerencia['confianza']:.0%}")
+
+
+def mostrar_estimacion(estimacion, atributo: str, clave_texto: str, lang_code: str):
+    """Leyenda con la clase estimada desde la imagen (raíces o humedad) y su confianza."""
+    if estimacion:
+        t_lang = TEXT_CONTENT[lang_code]
+        opcion = etiqueta(atributo, estimacion["clase"], lang_code)
+        st.caption(f"{t_lang[clave_texto]}: **{opcion}** · {t_lang['confidence']} {estimacion['confianza']:.0%}")
+
+
+def selector(atributo: str, etiqueta_campo: str, lang_code: str):
+    """Selectbox de IDs canónicos: la clave no depende del idioma, así que la
+    elección se conserva al cambiarlo; solo cambia el texto mostrado."""
+    return st.selectbox(
+        etiqueta_campo, OPCIONES[atributo], index=None, key=atributo,
+        placeholder=TEXT_CONTENT[lang_code]["placeholder"],
+        format_func=partial(etiqueta, atributo, lang_code=lang_code),
+    )
+
+# ================================
+# FUNCIÓN: Imagen subida (analizada en segundo plano)
+# ================================
+def enviar_muestra(uploaded_file, lang_code: str):
+    """Encola el análisis de la imagen subida y devuelve su sha256 (None si es demasiado grande).
+
+    Solo se lee y se hashea el archivo cuando cambia; los reruns siguientes
+    reutilizan el hash guardado en la sesión.
+    """
+    if uploaded_file.size > LIMITE_BYTES:
+        st.error(f"{TEXT_CONTENT[lang_code]['upload_too_big']} ({LIMITE_BYTES // (1024 * 1024)} MB).")
+        return None
+
+    analizador = obtener_analizador()
+    sha = st.session_state.get("muestra_sha") if st.session_state.get("muestra_file_id") == uploaded_file.file_id else None
+    muestra = st.session_state.get("muestra")
+    if sha is None or (sha not in analizador and (muestra is None or muestra["sha256"] != sha)):
+        sha = analizador.enviar(uploaded_file.getvalue(), sha)
+        st.session_state["muestra_file_id"] = uploaded_file.file_id
+        st.session_state["muestra_sha"] = sha
+    return sha
+
+
+def obtener_muestra(sha: str, nombre: str, lang_code: str, esperar: bool = False):
+    """Imagen procesada (ver analisis.analizar_imagen) o None si el análisis no terminó.
+
+    Con `esperar=True` bloquea hasta que termine. El resultado se copia a la
+    sesión: el del analizador es compartido con otras sesiones.
+    """
+    muestra = st.session_state.get("muestra")
+    if muestra is not None and muestra["sha256"] == sha:
+        muestra["nombre"] = nombre
+        return muestra
+
+    analizador = obtener_analizador()
+    if not esperar and not analizador.listo(sha):
+        return None
+    try:
+        muestra = dict(analizador.resultado(sha))
+    except ImagenInvalida as e:
+        t_lang = TEXT_CONTENT[lang_code]
+        if e.motivo == "tamano":
+            st.error(f"{t_lang['upload_too_big']} ({LIMITE_BYTES // (1024 * 1024)} MB).")
+        elif e.motivo == "dimensiones":
+            st.error(f"{t_lang['upload_too_many_pixels']} ({e} px; máx. {LIMITE_PIXELES_ORIGEN // 1_000_000} MP).")
+        else:
+            st.error(t_lang["upload_invalid"])
+        return None
+    muestra["nombre"] = nombre
+    st.session_state["muestra"] = muestra
+    return muestra
+
+
+@st.fragment(run_every=0.5)
+def esperar_analisis(sha: str, lang_code: str):
+    # Mientras el análisis corre, solo este bloque se repite; al terminar se
+    # vuelve a ejecutar la app para mostrar la vista previa y las sugerencias.
+    if obtener_analizador().listo(sha):
+        st.rerun()
+    st.caption(TEXT_CONTENT[lang_code]["analyzing"])
+
 # ================================
 # FUNCIÓN: Generar Excel
 # ================================
-def generar_excel(lang_code, resumen, interpretacion, recomendaciones):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Análisis de suelo"
+@st.cache_data(show_spinner=False, max_entries=256)
+def generar_excel(lang_code, selecciones, fecha) -> bytes:
+    """Excel del reporte, en memoria. Se memoiza por (idioma, selecciones, fecha)."""
+    metricas.contar("excel_generados", 1, _id_sesion())
+    with metricas.tramo("excel"):
+        return excel_de_reporte(lang_code, selecciones, fecha)
+
+
+def generar_historial_excel() -> bytes:
+    """Historial completo de análisis guardados (modo streaming, sin cargarlo en memoria)."""
+    with tempfile.TemporaryFile() as tmp:
+        exportar_historial_xlsx([("Historial", COLUMNAS, obtener_almacen().iterar())], tmp)
+        tmp.seek(0)
+        return tmp.read()
+
+def generar_historial_csv() -> str:
+    buf = io.StringIO()
+    obtener_almacen().exportar_csv(buf)
+    return buf.getvalue()
+
+# ================================
+# FUNCIÓN: Reporte (resumen, interpretación, recomendaciones)
+# ================================
+@st.fragment
+def mostrar_reporte(lang_code, muestra, color, textura, estructura, humedad, raices):
+    # Fragmento: guardar o descargar no vuelve a ejecutar selectores ni carruseles.
+    with metricas.tramo("reporte"):
+        _reporte(lang_code, muestra, color, textura, estructura, humedad, raices)
+
 
-    ws.append([TEXT_CONTENT[lang_code]["app_title"]])
-    ws.append([datetime.now().strftime("%d/%m/%Y %H:%M")])
-    ws.append([])
+def _reporte(lang_code, muestra, color, textura, estructura, humedad, raices):
+    t = TEXT_CONTENT[lang_code]
+    selecciones = (color, textura, estructura, humedad, raices)
+    resumen_list, piezas, recs = armar_reporte(lang_code, selecciones)
 
-    ws.append([TEXT_CONTENT[lang_code]["summary_title"]])
-    for item in resumen:
-        ws.append([item])
-    ws.append([])
+    # --- Mostrar en pantalla ---
+    st.markdown(f"### {t['summary_title']}")
+    _mostrar_imagen(st, muestra["resumen"], caption="🖼️ Imagen analizada", width=250)
+    for r in resumen_list:
+        st.write(f"- {r}")
 
-    ws.append([TEXT_CONTENT[lang_code]["interpret_block_title"]])
-    for parrafo in interpretacion:
-        ws.append([parrafo])
-    ws.append([])
+    st.markdown(f"### {t['interpret_block_title']}")
+    for p in piezas:
+        if p:
+            st.write(f"- {p}")
 
-    ws.append([TEXT_CONTENT[lang_code]["recs_title"]])
-    for rec in recomendaciones:
-        ws.append([rec])
+    st.markdown(f"### {t['recs_title']}")
+    for r in recs: 
+        st.write(f"- {r}")
 
-    out = f"analisis_suelo_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
-    wb.save(out)
-    return out
+    # Guardar análisis
+    if st.button(t["save_button"]):
+        obtener_almacen().guardar({
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "idioma": lang_code,
+            "color": color, "textura": textura, "estructura": estructura,
+            "humedad": humedad, "raices": raices,
+            "munsell": muestra["munsell"]["munsell"] if muestra.get("munsell") else None,
+            "imagen_sha256": muestra["sha256"], "imagen_nombre": muestra.get("nombre"),
+        })
+        st.success(t["saved_msg"])
+
+    # Descargar Excel (se genera en memoria recién al hacer clic)
+    ahora = datetime.now()
+    st.download_button(
+        t["excel_button"],
+        data=partial(generar_excel, lang_code, selecciones, ahora.strftime("%d/%m/%Y")),
+        file_name=f"analisis_suelo_{ahora.strftime('%Y%m%d_%H%M')}.xlsx",
+        mime=MIME_XLSX,
+        on_click="ignore",
+    )
 
 # ================================
 # CONTROL DE PANTALLA INTRO
@@ -339,12 +336,31 @@ if "show_intro" not in st.session_state:
 lang = st.sidebar.radio("🌍 Idioma / Language", ["es", "pt"], index=0)
 t = TEXT_CONTENT[lang]
 
+# El historial completo (todas las muestras de todos los estudiantes) es solo para docentes.
+if acceso_docente():
+    st.sidebar.download_button(
+        t["history_button"],
+        data=generar_historial_excel,
+        file_name=f"historial_suelos_{datetime.now().strftime('%Y%m%d')}.xlsx",
+        mime=MIME_XLSX,
+        on_click="ignore",
+    )
+    st.sidebar.download_button(
+        t["history_csv_button"],
+        data=generar_historial_csv,
+        file_name=f"historial_suelos_{datetime.now().strftime('%Y%m%d')}.csv",
+        mime="text/csv",
+        on_click="ignore",
+    )
+panel_admin()
+
 if st.session_state["show_intro"]:
     st.title(t["app_title"])
     st.markdown(t["intro"])
     if st.button(t["start_btn"]):
         st.session_state["show_intro"] = False
         st.rerun()
+    _fin_rerun()
     st.stop()
 
 # ================================
@@ -353,87 +369,60 @@ if st.session_state["show_intro"]:
 st.title(t["app_title"])
 
 uploaded_file = st.file_uploader(t["upload_label"], type=["jpg","jpeg","png"])
-if uploaded_file:
-    st.image(uploaded_file, caption=t["uploaded_caption"], use_container_width=True)
+with metricas.tramo("subida"):
+    sha_muestra = enviar_muestra(uploaded_file, lang) if uploaded_file else None
+    muestra = obtener_muestra(sha_muestra, uploaded_file.name, lang) if sha_muestra else None
+    if muestra:
+        _mostrar_imagen(st, muestra["vista"], caption=t["uploaded_caption"], width="stretch")
+    elif sha_muestra and not obtener_analizador().listo(sha_muestra):
+        esperar_analisis(sha_muestra, lang)
 
 # Color
 st.markdown(f"**{t['select_phrase']}**")
-color = st.selectbox(t["color_label"], t["color_opts"])
+estimado = muestra["munsell"] if muestra else None
+if estimado:
+    preseleccionar("color", estimado["clase"], muestra["sha256"])
+color = selector("color", t["color_label"], lang)
+if estimado:
+    st.caption(f"{t['munsell_estimate']}: **{estimado['munsell']}** · {t['confidence']} {estimado['confianza']:.0%}")
 mostrar_referencias("color", color, lang)
 
+with metricas.tramo("similitud"):
+    similares = sugerir(obtener_indice_similitud(), muestra["rasgos"]) if muestra else {}
+
+
 # Textura
 st.markdown(f"**{t['select_phrase']}**")
-textura = st.selectbox(t["texture_label"], t["texture_opts"])
-mostrar_referencias("textura", textura, lang)
+textura = selector("textura", t["texture_label"], lang)
+mostrar_sugerencia(similares.get("textura"), "textura", lang)
+mostrar_referencias("textura", textura, lang, similares.get("textura", {}).get("ranking"))
 
 # Estructura
 st.markdown(f"**{t['select_phrase']}**")
-estructura = st.selectbox(t["aggregation_label"], t["structure_opts"])
-mostrar_referencias("forma-estructura", estructura, lang)
-
-# Humedad y raíces
-humedad = st.selectbox(t["moisture_label"], t["moisture_opts"])
-raices = st.selectbox(t["roots_label"], t["roots_opts"])
-
-ready = uploaded_file and color!=t["placeholder"] and textura!=t["placeholder"] and estructura!=t["placeholder"] and humedad!=t["placeholder"] and raices!=t["placeholder"]
+estructura = selector("estructura", t["aggregation_label"], lang)
+mostrar_sugerencia(similares.get("forma-estructura"), "estructura", lang)
+mostrar_referencias("estructura", estructura, lang, similares.get("forma-estructura", {}).get("ranking"))
+
+# Humedad y raíces (estimadas desde la imagen; el estudiante puede corregirlas)
+estimaciones = {a: muestra.get(a) if muestra else None for a in ("humedad", "raices")}
+for atributo, estimacion in estimaciones.items():
+    if estimacion:
+        preseleccionar(atributo, estimacion["clase"], muestra["sha256"])
+humedad = selector("humedad", t["moisture_label"], lang)
+mostrar_estimacion(estimaciones["humedad"], "humedad", "moisture_estimate", lang)
+raices = selector("raices", t["roots_label"], lang)
+mostrar_estimacion(estimaciones["raices"], "raices", "roots_estimate", lang)
+
+ready = sha_muestra and None not in (color, textura, estructura, humedad, raices)
+
+if ready and muestra is None:
+    if not obtener_analizador().listo(sha_muestra):
+        # El formulario se completó antes que el análisis: recién acá se espera.
+        with st.spinner(t["analyzing"]):
+            muestra = obtener_muestra(sha_muestra, uploaded_file.name, lang, esperar=True)
+    ready = muestra is not None
 
 if ready:
-    resumen_list = [
-        f"{t['color_label']}: {color}",
-        f"{t['texture_label']}: {textura}",
-        f"{t['aggregation_label']}: {estructura}",
-        f"{t['moisture_label']}: {humedad}",
-        f"{t['roots_label']}: {raices}",
-    ]
-
-    interp = INTERP[lang]
-    piezas = [
-        interp["color"].get(color, ""),
-        interp["texture"].get(textura, ""),
-        interp["structure"].get(estructura, ""),
-        interp["moisture"].get(humedad, ""),
-        interp["roots"].get(raices, ""),
-    ]
-    recs = ["Mantener buenas prácticas de conservación."]
-
-    # --- Mostrar en pantalla ---
-    st.markdown(f"### {t['summary_title']}")
-    st.image(uploaded_file, caption="🖼️ Imagen analizada", width=250)
-    for r in resumen_list:
-        st.write(f"- {r}")
-
-    st.markdown(f"### {t['interpret_block_title']}")
-    for p in piezas:
-        if p:
-            st.write(f"- {p}")
-
-    st.markdown(f"### {t['recs_title']}")
-    for r in recs: 
-        st.write(f"- {r}")
-
-    # Guardar CSV
-    if st.button(t["save_button"]):
-        file_csv = t["csv_file"]
-        headers_exist = os.path.exists(file_csv) and os.path.getsize(file_csv)>0
-        with open(file_csv,"a",newline="",encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if not headers_exist: 
-                writer.writerow(["Fecha","Idioma","Color","Textura","Estructura","Humedad","Raíces"])
-            writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"),lang,color,textura,estructura,humedad,raices])
-        st.success("✅ Análisis guardado en CSV")
-
-    # Descargar Excel
-    excel_file = generar_excel(lang, resumen_list, piezas, recs)
-    with open(excel_file,"rb") as f:
-        st.download_button(t["excel_button"], f, file_name=excel_file, mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-
-
-
-
-
-
-
-
-
-
+    mostrar_reporte(lang, muestra, color, textura, estructura, humedad, raices)
 
+_fin_rerun()
@@ -0,0 +1,208 @@
+"""Arranque en frío: tiempo hasta la primera pintura de una sesión nueva.
+
+    python bench/arranque.py                         # 3 arranques por modo
+    python bench/arranque.py --repeticiones 5 --salida arranque.json
+
+Compara dos modos, cada arranque en un proceso de servidor nuevo:
+"streamlit run app4.py" (sin precalentar) y "python servidor.py" (precalienta
+antes de aceptar conexiones). Las sesiones se abren como lo hace el navegador:
+websocket a /_stcore/stream y un pedido de rerun. Por arranque se mide
+
+  listo        lanzamiento → /_stcore/health responde
+  pintura      conexión de una sesión nueva → primer elemento de la página
+  completa     conexión → fin del script (script_finished)
+
+para la primera sesión (proceso recién levantado) y para una segunda (ya
+caliente). Aparte, en un proceso nuevo por modo, se mide el primer análisis
+(foto de 12 MP → sugerencias de similitud): lo que espera el primer estudiante
+que sube una foto.
+
+Se ejecuta en un directorio temporal con enlaces a referencias/, miniaturas/,
+static/ y logo.png, y con SUELOS_DB apuntando a una base allí: el almacén que
+se crea al arrancar no toca la base de datos real.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENLACES = ("referencias", "miniaturas", "static", "logo.png", ".streamlit")
+MODOS = {
+    "streamlit run": [sys.executable, "-m", "streamlit", "run", os.path.join(RAIZ, "app4.py")],
+    "servidor.py": [sys.executable, os.path.join(RAIZ, "servidor.py")],
+}
+ESPERA_MAXIMA_S = 120
+
+
+# ================================
+# ENTORNO
+# ================================
+def preparar_directorio() -> str:
+    directorio = tempfile.mkdtemp(prefix="arranque_suelos_")
+    for nombre in ENLACES:
+        origen = os.path.join(RAIZ, nombre)
+        if os.path.exists(origen):
+            os.symlink(origen, os.path.join(directorio, nombre))
+    return directorio
+
+
+def entorno(directorio: str) -> dict:
+    return {**os.environ, "SUELOS_DB": os.path.join(directorio, "analisis_suelos.db")}
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ================================
+# SESIONES (protocolo del navegador)
+# ================================
+async def _sesion(puerto: int) -> dict:
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from websockets.asyncio.client import connect
+
+    inicio = time.perf_counter()
+    pintura = None
+    async with connect(f"ws://127.0.0.1:{puerto}/_stcore/stream", subprotocols=["streamlit"], max_size=None) as ws:
+        pedido = BackMsg()
+        pedido.rerun_script.query_string = ""
+        pedido.rerun_script.page_script_hash = ""
+        await ws.send(pedido.SerializeToString())
+        while True:
+            mensaje = ForwardMsg()
+            mensaje.ParseFromString(await asyncio.wait_for(ws.recv(), ESPERA_MAXIMA_S))
+            tipo = mensaje.WhichOneof("type")
+            if tipo == "delta" and pintura is None:
+                pintura = time.perf_counter() - inicio
+            if tipo == "script_finished":
+                return {"pintura_ms": round(pintura * 1000.0, 1), "completa_ms": round((time.perf_counter() - inicio) * 1000.0, 1)}
+
+
+def medir_arranque(comando: list, directorio: str) -> dict:
+    puerto = puerto_libre()
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [*comando, "--server.headless", "true", "--server.port", str(puerto), "--browser.gatherUsageStats", "false"],
+        cwd=directorio, env=entorno(directorio), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if proceso.poll() is not None or time.perf_counter() - inicio > ESPERA_MAXIMA_S:
+                raise RuntimeError(f"el servidor no arrancó: {' '.join(comando)}")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{puerto}/_stcore/health", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.05)
+        listo = time.perf_counter() - inicio
+        primera = asyncio.run(_sesion(puerto))
+        segunda = asyncio.run(_sesion(puerto))
+    finally:
+        proceso.terminate()
+        proceso.wait()
+    return {"listo_ms": round(listo * 1000.0, 1), "primera": primera, "segunda": segunda}
+
+
+# ================================
+# PRIMER ANÁLISIS (en un proceso nuevo)
+# ================================
+def primer_analisis(foto: str, precalentar: bool) -> float:
+    """ms desde la foto hasta las sugerencias, como en la primera subida de app4.py."""
+    import importlib
+
+    importlib.import_module("streamlit")   # ya importado en el servidor: fuera del reloj
+    sys.path.insert(0, RAIZ)
+    import recursos
+    from analisis import analizar_imagen
+    from similitud import sugerir
+
+    if precalentar:
+        recursos.precalentar()
+    with open(foto, "rb") as f:
+        datos = f.read()
+    inicio = time.perf_counter()
+    muestra = analizar_imagen(datos)
+    sugerir(recursos.obtener_indice_similitud(), muestra["rasgos"])
+    return round((time.perf_counter() - inicio) * 1000.0, 1)
+
+
+def _resumen(valores: list) -> dict:
+    return {"mediana": round(statistics.median(valores), 1), "min": min(valores), "max": max(valores)}
+
+
+# ================================
+# CLI
+# ================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo hasta la primera pintura, con y sin precalentamiento.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="arranques por modo")
+    parser.add_argument("--salida", help="guardar los resultados en este JSON")
+    parser.add_argument("--_primer-analisis", dest="primer_analisis", metavar="FOTO", help=argparse.SUPPRESS)
+    parser.add_argument("--_precalentar", dest="precalentar", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.primer_analisis:
+        print(json.dumps(primer_analisis(args.primer_analisis, args.precalentar)))
+        return 0
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from carga_app import generar_fotos
+
+    dir_fotos = os.path.join(tempfile.gettempdir(), "carga_suelos_fotos")
+    os.makedirs(dir_fotos, exist_ok=True)
+    foto = generar_fotos(dir_fotos, 1)[0]
+
+    directorio = preparar_directorio()
+    resultados = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "maquina": {"python": platform.python_version(), "cpus": os.cpu_count(), "sistema": platform.platform()},
+        "modos": {},
+    }
+    try:
+        for modo, comando in MODOS.items():
+            print(f"▶ {modo}...", file=sys.stderr)
+            arranques = [medir_arranque(comando, directorio) for _ in range(args.repeticiones)]
+            analisis = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--_primer-analisis", foto,
+                 *(["--_precalentar"] if modo == "servidor.py" else [])],
+                cwd=directorio, env=entorno(directorio), capture_output=True, text=True, check=True,
+            )
+            resultados["modos"][modo] = {
+                "listo_ms": _resumen([a["listo_ms"] for a in arranques]),
+                "primera_pintura_ms": _resumen([a["primera"]["pintura_ms"] for a in arranques]),
+                "primera_completa_ms": _resumen([a["primera"]["completa_ms"] for a in arranques]),
+                "segunda_pintura_ms": _resumen([a["segunda"]["pintura_ms"] for a in arranques]),
+                "primer_analisis_ms": json.loads(analisis.stdout.strip().splitlines()[-1]),
+            }
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    print(f"{'':<16}{'listo':>9}{'1ª pintura':>12}{'1ª completa':>13}{'2ª pintura':>12}{'1er análisis':>14}  (ms, mediana)")
+    for modo, r in resultados["modos"].items():
+        print(
+            f"{modo:<16}{r['listo_ms']['mediana']:>9.0f}{r['primera_pintura_ms']['mediana']:>12.0f}"
+            f"{r['primera_completa_ms']['mediana']:>13.0f}{r['segunda_pintura_ms']['mediana']:>12.0f}"
+            f"{r['primer_analisis_ms']:>14.0f}"
+        )
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""Prueba de carga de app4.py con varias sesiones simultáneas contra un servidor real.
+
+    python bench/carga_app.py --sesiones 1 4 8 --guardar-base    # registra la base
+    python bench/carga_app.py --sesiones 1 4 8                   # compara con la base
+
+Cada sesión recorre el flujo real: intro → subida de una foto tipo celular →
+los cinco selectores → clics en el carrusel → guardar → descargar Excel.
+Cada escenario levanta un servidor nuevo (`streamlit run app4.py`) y abre N
+sesiones simultáneas como N pestañas del navegador: websockets a
+/_stcore/stream, subida por /_stcore/upload_file y descarga por /media
+(bench/cliente.py). Comparten cache_resource, catálogo y almacén dentro del
+servidor, como en clase, y un escenario no hereda la memoria del anterior.
+
+Por escenario se registra latencia de rerun p50/p95 (total y por paso), RSS
+máximo del servidor por sesión ((pico - base tras el calentamiento) / N) y throughput
+(flujos y reruns por segundo). Con una base guardada, termina con código 1 si
+p95 o RSS por sesión suben, o el throughput baja, más de --tolerancia.
+
+Las descargas que siguen en 404 tras los reintentos (Streamlit borró el archivo
+generado antes del GET, ver Sesion.descargar) se informan aparte como
+descargas_perdidas: dependen de cuántas ejecuciones terminan a la vez, no del flujo.
+
+Se ejecuta en un directorio temporal con enlaces a referencias/, miniaturas/,
+static/ y logo.png y con SUELOS_DB apuntando a una base allí, así los análisis
+guardados no van a la base de datos real.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.error import HTTPError
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from arranque import RAIZ, preparar_directorio  # noqa: E402
+from cliente import abrir_sesion, servidor  # noqa: E402
+
+sys.path.insert(0, RAIZ)
+APP = os.path.join(RAIZ, "app4.py")
+BASE_POR_DEFECTO = os.path.join(RAIZ, "bench", "base_carga.json")
+TAMANO_FOTO = (4032, 3024)   # 12 MP, como una cámara de celular
+
+
+# ================================
+# FOTOS SINTÉTICAS
+# ================================
+def generar_fotos(destino: str, cantidad: int, semilla: int = 0) -> list:
+    """JPEG de tamaño celular con textura de suelo procedimental (deterministas)."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(semilla)
+    ancho, alto = TAMANO_FOTO
+    paleta = np.array([(92, 64, 45), (120, 85, 55), (150, 110, 70), (70, 60, 55), (160, 80, 50), (180, 150, 100)], np.float32)
+    rutas = []
+    for i in range(cantidad):
+        ruta = os.path.join(destino, f"foto_{i:02d}.jpg")
+        rutas.append(ruta)
+        if os.path.exists(ruta):
+            continue
+        base = paleta[i % len(paleta)]
+        # Ruido de baja frecuencia (terrones) + grano fino.
+        grueso = cv2.resize(rng.normal(0, 1, (alto // 64, ancho // 64)).astype(np.float32), (ancho, alto), interpolation=cv2.INTER_CUBIC)
+        fino = rng.normal(0, 1, (alto // 2, ancho // 2)).astype(np.float32)
+        fino = cv2.resize(fino, (ancho, alto), interpolation=cv2.INTER_LINEAR)
+        luz = 1.0 + 0.18 * grueso + 0.08 * fino
+        rgb = np.clip(base[None, None, :] * luz[..., None], 0, 255).astype(np.uint8)
+        cv2.imwrite(ruta, cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return rutas
+
+
+# ================================
+# MEMORIA (del proceso servidor)
+# ================================
+def rss_proceso(pid: int) -> int:
+    """RSS del proceso en bytes (Linux: /proc; en otros sistemas, ps)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        salida = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True).stdout
+        return int(salida.strip() or 0) * 1024
+
+
+class MonitorRSS(threading.Thread):
+    def __init__(self, pid: int, intervalo: float = 0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.intervalo = intervalo
+        self.pico = rss_proceso(pid)
+        self._fin = threading.Event()
+
+    def run(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, rss_proceso(self.pid))
+
+    def detener(self) -> int:
+        self._fin.set()
+        self.join()
+        return max(self.pico, rss_proceso(self.pid))
+
+
+# ================================
+# SESIÓN (flujo de un estudiante)
+# ================================
+async def flujo(puerto: int, foto: str, semilla: int, clics: int, tiempos: list) -> int:
+    """Recorre el flujo completo en una sesión nueva y agrega (paso, segundos) a `tiempos`.
+
+    Devuelve 1 si la descarga del Excel se perdió (404 en todos los intentos), si no 0.
+    """
+    from opciones import ATRIBUTOS
+    from textos import TEXT_CONTENT
+
+    rng = random.Random(semilla)
+    t = TEXT_CONTENT["es"]
+    with open(foto, "rb") as f:
+        datos = f.read()
+
+    async with abrir_sesion(puerto) as sesion:
+        async def paso(nombre, accion):
+            inicio = time.perf_counter()
+            resultado = await accion
+            tiempos.append((nombre, time.perf_counter() - inicio))
+            if sesion.excepciones:
+                raise RuntimeError(f"{nombre}: {sesion.excepciones[0]}")
+            return resultado
+
+        await paso("inicio", sesion.rerun())
+        comenzar, _ = sesion.buscar("button")
+        await paso("intro", sesion.rerun(disparar=comenzar.id))
+        subida, _ = sesion.buscar("file_uploader")
+        await paso("subida", sesion.subir(subida, os.path.basename(foto), datos, "image/jpeg"))
+        for atributo in ATRIBUTOS:
+            # Los selectores tienen key=atributo: el id del widget termina en "-<key>".
+            selector, _ = sesion.buscar("selectbox", lambda s: s.id.endswith(f"-{atributo}"))
+            sesion.elegir(selector, rng.choice(list(selector.options)))
+            await paso("seleccion", sesion.rerun())
+        for _ in range(clics):
+            botones = sesion.todos("button", lambda b: "-next_" in b.id or "-prev_" in b.id)
+            if botones:
+                boton, fragmento = rng.choice(botones)
+                await paso("carrusel", sesion.rerun(disparar=boton.id, fragmento=fragmento))
+        guardar, fragmento = sesion.buscar("button", lambda b: b.label == t["save_button"])
+        if guardar is None:
+            raise RuntimeError("el reporte no se mostró (falta el botón de guardar)")
+        await paso("guardar", sesion.rerun(disparar=guardar.id, fragmento=fragmento))
+        excel, _ = sesion.buscar("download_button", lambda b: b.label == t["excel_button"])
+        try:
+            recibidos = await paso("descarga", sesion.descargar(excel))
+        except HTTPError as e:
+            if e.code != 404:
+                raise
+            return 1
+        if not recibidos:
+            raise RuntimeError("descarga: el Excel llegó vacío")
+        return 0
+
+
+# ================================
+# ESCENARIO (un servidor nuevo)
+# ================================
+def _percentil(valores, q):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(q * len(valores)))] if valores else None
+
+
+def _estadisticas(segundos) -> dict:
+    ms = [s * 1000.0 for s in segundos]
+    return {"n": len(ms), "p50_ms": round(_percentil(ms, 0.5), 2), "p95_ms": round(_percentil(ms, 0.95), 2)}
+
+
+def correr_escenario(sesiones: int, repeticiones: int, clics: int, fotos: list) -> dict:
+    tiempos, errores, perdidas = [], [], []
+
+    async def trabajador(puerto, n):
+        for r in range(repeticiones):
+            try:
+                perdidas.append(await flujo(puerto, fotos[(n + r) % len(fotos)], n * 1000 + r, clics, tiempos))
+            except Exception as e:  # se informa y sigue el resto de las sesiones
+                errores.append(f"sesión {n}: {e}")
+
+    async def todas(puerto):
+        await asyncio.gather(*(trabajador(puerto, n) for n in range(sesiones)))
+
+    directorio = preparar_directorio()
+    try:
+        with servidor(APP, directorio) as (puerto, pid):
+            # Calentamiento: una sesión completa llena los caches del servidor, como uno en uso.
+            # Usa una foto aparte para que el análisis de las demás no salga ya hecho.
+            asyncio.run(flujo(puerto, fotos[-1], -1, clics, []))
+            fotos = fotos[:-1]
+            base = rss_proceso(pid)
+            monitor = MonitorRSS(pid)
+            monitor.start()
+
+            inicio = time.perf_counter()
+            asyncio.run(todas(puerto))
+            duracion = time.perf_counter() - inicio
+            pico = monitor.detener()
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    flujos = sesiones * repeticiones - len(errores)
+    por_paso = {}
+    for nombre, s in tiempos:
+        por_paso.setdefault(nombre, []).append(s)
+    reruns = [s for nombre, s in tiempos if nombre != "descarga"]
+    return {
+        "sesiones": sesiones,
+        "flujos": flujos,
+        "errores": errores,
+        "descargas_perdidas": sum(perdidas),
+        "duracion_s": round(duracion, 2),
+        "flujos_por_s": round(flujos / duracion, 3),
+        "reruns_por_s": round(len(reruns) / duracion, 2),
+        "rerun": _estadisticas(reruns),
+        "pasos": {nombre: _estadisticas(s) for nombre, s in por_paso.items()},
+        "rss_base_mb": round(base / 2**20, 1),
+        "rss_pico_mb": round(pico / 2**20, 1),
+        "rss_por_sesion_mb": round(max(0, pico - base) / 2**20 / sesiones, 1),
+    }
+
+
+# ================================
+# COMPARACIÓN CON LA BASE
+# ================================
+def regresiones(actual: dict, base: dict, tolerancia: float) -> list:
+    problemas = []
+    for clave, esc in actual["escenarios"].items():
+        ref = base.get("escenarios", {}).get(clave)
+        if ref is None:
+            continue
+        subir = (("p95 rerun (ms)", esc["rerun"]["p95_ms"], ref["rerun"]["p95_ms"]),
+                 ("RSS por sesión (MB)", esc["rss_por_sesion_mb"], ref["rss_por_sesion_mb"]))
+        for nombre, valor, limite in subir:
+            if limite and valor > limite * (1 + tolerancia):
+                problemas.append(f"{clave} sesiones: {nombre} {valor} > base {limite}")
+        if esc["flujos_por_s"] < ref["flujos_por_s"] * (1 - tolerancia):
+            problemas.append(f"{clave} sesiones: flujos/s {esc['flujos_por_s']} < base {ref['flujos_por_s']}")
+    return problemas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga multi-sesión de app4.py.")
+    parser.add_argument("--sesiones", type=int, nargs="+", default=[1, 4, 8], help="escenarios: sesiones simultáneas")
+    parser.add_argument("--repeticiones", type=int, default=2, help="flujos completos por sesión")
+    parser.add_argument("--clics", type=int, default=4, help="clics de carrusel por flujo")
+    parser.add_argument("--fotos", type=int, default=6, help="fotos sintéticas distintas")
+    parser.add_argument("--base", default=BASE_POR_DEFECTO, help="JSON con la base de comparación")
+    parser.add_argument("--guardar-base", action="store_true", help="guardar los resultados como nueva base")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="regresión admitida (0.25 = 25%%)")
+    parser.add_argument("--salida", help="guardar también los resultados en este JSON")
+    args = parser.parse_args(argv)
+
+    dir_fotos = os.path.join(tempfile.gettempdir(), "carga_suelos_fotos")
+    os.makedirs(dir_fotos, exist_ok=True)
+    fotos = generar_fotos(dir_fotos, args.fotos + 1)   # + la del calentamiento
+
+    resultados = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "maquina": {"python": platform.python_version(), "cpus": os.cpu_count(), "sistema": platform.platform()},
+        "parametros": {"repeticiones": args.repeticiones, "clics": args.clics, "fotos": args.fotos},
+        "escenarios": {},
+    }
+    for n in args.sesiones:
+        print(f"▶ {n} sesiones...", file=sys.stderr)
+        esc = correr_escenario(n, args.repeticiones, args.clics, fotos)
+        resultados["escenarios"][str(n)] = esc
+        print(
+            f"  rerun p50 {esc['rerun']['p50_ms']} ms · p95 {esc['rerun']['p95_ms']} ms · "
+            f"{esc['flujos_por_s']} flujos/s · {esc['rss_por_sesion_mb']} MB/sesión"
+            + (f" · {esc['descargas_perdidas']} descargas perdidas" if esc["descargas_perdidas"] else "")
+            + (f" · {len(esc['errores'])} errores" if esc["errores"] else ""),
+            file=sys.stderr,
+        )
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    if args.guardar_base:
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"Base guardada en {args.base}", file=sys.stderr)
+        return 0
+
+    errores = [e for esc in resultados["escenarios"].values() for e in esc["errores"]]
+    if not os.path.exists(args.base):
+        print(f"Sin base en {args.base} (usar --guardar-base); no se compara.", file=sys.stderr)
+        return 1 if errores else 0
+    with open(args.base, encoding="utf-8") as f:
+        problemas = regresiones(resultados, json.load(f), args.tolerancia) + errores
+    for p in problemas:
+        print(f"✗ {p}", file=sys.stderr)
+    if not problemas:
+        print("✓ sin regresiones respecto de la base", file=sys.stderr)
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Costo de un clic en el carrusel de referencias: tiempo de servidor y bytes.
+
+    python bench/clics_carrusel.py                          # app4.py de este árbol, 30 clics
+    python bench/clics_carrusel.py --app /tmp/viejo/app4.py # otra versión (p. ej. un git worktree)
+
+Levanta el servidor real en un puerto libre y lo maneja como el navegador
+(bench/cliente.py): websocket a /_stcore/stream, estados de widgets en cada
+pedido de rerun y, si el botón está dentro de un fragmento, su fragment_id. Recorre
+intro → "Comenzar" → color (la primera opción que muestre el carrusel)
+y hace --clics clics en ➡️ del carrusel de color. Por clic se mide
+
+  ida y vuelta   envío del clic → script_finished
+  bytes          tamaño de los mensajes del servidor recibidos para ese clic
+
+y además los bytes de un rerun completo de la misma página, como referencia.
+Se ejecuta en un directorio temporal con enlaces a referencias/, miniaturas/,
+static/ y logo.png, y una base de datos propia (ver bench/arranque.py).
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from arranque import RAIZ, preparar_directorio  # noqa: E402
+from cliente import abrir_sesion, servidor  # noqa: E402
+
+
+async def medir(puerto: int, clics: int) -> dict:
+    async with abrir_sesion(puerto) as sesion:
+        await sesion.rerun()
+        comenzar, _ = sesion.buscar("button")
+        await sesion.rerun(disparar=comenzar.id)
+
+        siguiente, fragmento = sesion.buscar("button", lambda b: b.label == "➡️")
+        color, _ = sesion.buscar("selectbox")
+        for opcion in color.options:
+            if siguiente is not None:
+                break
+            # Selector sin valor o con un texto de ayuda: primera opción que muestre el carrusel.
+            sesion.elegir(color, opcion)
+            await sesion.rerun()
+            siguiente, fragmento = sesion.buscar("button", lambda b: b.label == "➡️")
+        if siguiente is None:
+            raise RuntimeError("no apareció el carrusel de color")
+
+        completo = await sesion.rerun()
+        medidas = [await sesion.rerun(disparar=siguiente.id, fragmento=fragmento) for _ in range(clics)]
+    return {
+        "fragmento": bool(fragmento),
+        "clic_p50_ms": round(statistics.median(m["ms"] for m in medidas), 1),
+        "clic_p95_ms": round(sorted(m["ms"] for m in medidas)[int(0.95 * (len(medidas) - 1))], 1),
+        "clic_kb": round(statistics.median(m["bytes"] for m in medidas) / 1024, 1),
+        "rerun_completo_kb": round(completo["bytes"] / 1024, 1),
+    }
+
+
+# ================================
+# CLI
+# ================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo y bytes por clic en el carrusel de app4.py.")
+    parser.add_argument("--app", default=os.path.join(RAIZ, "app4.py"), help="script de la app a medir")
+    parser.add_argument("--clics", type=int, default=30)
+    parser.add_argument("--salida", help="guardar los resultados en este JSON")
+    args = parser.parse_args(argv)
+
+    directorio = preparar_directorio()
+    try:
+        with servidor(args.app, directorio) as (puerto, _):
+            resultado = asyncio.run(medir(puerto, args.clics))
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    print(
+        f"{'fragmento' if resultado['fragmento'] else 'rerun completo'} · clic p50 {resultado['clic_p50_ms']} ms · "
+        f"p95 {resultado['clic_p95_ms']} ms · {resultado['clic_kb']} KB por clic · "
+        f"rerun completo {resultado['rerun_completo_kb']} KB"
+    )
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Cliente del protocolo de Streamlit para los bench/: un servidor real y sesiones
+que hablan con él como el navegador.
+
+    with servidor(APP, directorio) as (puerto, pid):
+        async with abrir_sesion(puerto) as sesion:
+            await sesion.rerun()
+            boton, fragmento = sesion.buscar("button")
+            await sesion.rerun(disparar=boton.id, fragmento=fragmento)
+
+Cada sesión es un websocket a /_stcore/stream. Guarda los estados de widget que
+fijó (se reenvían en cada pedido de rerun, como hace el navegador) y los
+elementos de la última ejecución con su fragment_id. Subidas y descargas usan
+las mismas rutas HTTP que el navegador (/_stcore/upload_file, /media). Los
+fragmentos con run_every no se repiten solos: solo se ejecuta lo que se pide.
+"""
+import asyncio
+import contextlib
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from arranque import ESPERA_MAXIMA_S, entorno, puerto_libre  # noqa: E402
+
+
+# ================================
+# SERVIDOR
+# ================================
+@contextlib.contextmanager
+def servidor(app: str, directorio: str):
+    """`streamlit run app` en un puerto libre, listo para conexiones; da (puerto, pid)."""
+    puerto = puerto_libre()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.abspath(app), "--server.headless", "true",
+         "--server.port", str(puerto), "--browser.gatherUsageStats", "false",
+         # El navegador toma el token XSRF de una cookie; el cliente no la maneja.
+         "--server.enableXsrfProtection", "false"],
+        cwd=directorio, env=entorno(directorio), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        inicio = time.perf_counter()
+        while True:
+            if proceso.poll() is not None or time.perf_counter() - inicio > ESPERA_MAXIMA_S:
+                raise RuntimeError(f"el servidor no arrancó: {app}")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{puerto}/_stcore/health", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.05)
+        yield puerto, proceso.pid
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+@contextlib.asynccontextmanager
+async def abrir_sesion(puerto: int):
+    from websockets.asyncio.client import connect
+
+    async with connect(f"ws://127.0.0.1:{puerto}/_stcore/stream", subprotocols=["streamlit"], max_size=None) as ws:
+        yield Sesion(ws, puerto)
+
+
+# ================================
+# SESIÓN (una pestaña del navegador)
+# ================================
+class Sesion:
+    def __init__(self, ws, puerto: int):
+        self.ws = ws
+        self.url = f"http://127.0.0.1:{puerto}/"
+        self.id_sesion = None
+        self.estados = {}        # id → WidgetState (valores que se reenvían en cada rerun)
+        self.elementos = []      # (tipo, proto del elemento, fragment_id) de la última ejecución
+        self.excepciones = []    # mensajes de st.exception de la última ejecución
+
+    async def _enviar(self, pedido) -> None:
+        await self.ws.send(pedido.SerializeToString())
+
+    async def _recibir(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        crudo = await asyncio.wait_for(self.ws.recv(), ESPERA_MAXIMA_S)
+        mensaje = ForwardMsg()
+        mensaje.ParseFromString(crudo)
+        if mensaje.WhichOneof("type") == "new_session":
+            self.id_sesion = mensaje.new_session.initialize.session_id or self.id_sesion
+        return mensaje, len(crudo)
+
+    async def rerun(self, disparar: str = None, fragmento: str = "") -> dict:
+        """Pide un rerun (con un botón disparado, opcional) y espera el fin del script.
+
+        Devuelve {"ms": envío → script_finished, "bytes": recibidos en ese lapso}.
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        pedido = BackMsg()
+        pedido.rerun_script.query_string = ""
+        pedido.rerun_script.page_script_hash = ""
+        pedido.rerun_script.fragment_id = fragmento
+        pedido.rerun_script.widget_states.widgets.extend(self.estados.values())
+        if disparar is not None:
+            pedido.rerun_script.widget_states.widgets.append(WidgetState(id=disparar, trigger_value=True))
+
+        inicio = time.perf_counter()
+        await self._enviar(pedido)
+        recibidos, elementos, excepciones = 0, [], []
+        while True:
+            mensaje, largo = await self._recibir()
+            recibidos += largo
+            tipo = mensaje.WhichOneof("type")
+            if tipo == "new_session":
+                # Una ejecución nueva (p. ej. tras st.rerun) reemplaza a la anterior.
+                elementos, excepciones = [], []
+            elif tipo == "delta" and mensaje.delta.WhichOneof("type") == "new_element":
+                elemento = mensaje.delta.new_element
+                if elemento.WhichOneof("type") == "exception":
+                    excepciones.append(f"{elemento.exception.type}: {elemento.exception.message}")
+                elementos.append((elemento.WhichOneof("type"), elemento, mensaje.delta.fragment_id))
+            elif tipo == "script_finished" and mensaje.script_finished != mensaje.FINISHED_EARLY_FOR_RERUN:
+                if fragmento:
+                    # Solo se volvió a ejecutar el fragmento: el resto de la página sigue igual.
+                    elementos = [e for e in self.elementos if e[2] != fragmento] + elementos
+                self.elementos, self.excepciones = elementos, excepciones
+                return {"ms": (time.perf_counter() - inicio) * 1000.0, "bytes": recibidos}
+
+    def buscar(self, tipo: str, condicion=lambda e: True):
+        """(proto, fragment_id) del primer elemento `tipo` que cumple `condicion`, o (None, None)."""
+        for t, elemento, fragmento in self.elementos:
+            if t == tipo and condicion(getattr(elemento, tipo)):
+                return getattr(elemento, tipo), fragmento
+        return None, None
+
+    def todos(self, tipo: str, condicion=lambda e: True) -> list:
+        return [(getattr(e, tipo), f) for t, e, f in self.elementos if t == tipo and condicion(getattr(e, tipo))]
+
+    def elegir(self, selectbox, opcion: str) -> None:
+        """Fija un st.selectbox; `opcion` es el texto mostrado (salida de format_func)."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        self.estados[selectbox.id] = WidgetState(id=selectbox.id, string_value=opcion)
+
+    async def subir(self, uploader, nombre: str, datos: bytes, mime: str) -> dict:
+        """Sube un archivo a un st.file_uploader y pide el rerun, como el navegador."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        inicio = time.perf_counter()
+        pedido = BackMsg()
+        pedido.file_urls_request.request_id = uuid.uuid4().hex
+        pedido.file_urls_request.session_id = self.id_sesion
+        pedido.file_urls_request.file_names.append(nombre)
+        await self._enviar(pedido)
+        while True:
+            mensaje, _ = await self._recibir()
+            if mensaje.WhichOneof("type") == "file_urls_response":
+                urls = mensaje.file_urls_response.file_urls[0]
+                break
+
+        limite = uuid.uuid4().hex
+        cuerpo = (
+            f'--{limite}\r\nContent-Disposition: form-data; name="UploadedFile"; filename="{nombre}"\r\n'
+            f"Content-Type: {mime}\r\n\r\n"
+        ).encode() + datos + f"\r\n--{limite}--\r\n".encode()
+        put = urllib.request.Request(
+            urljoin(self.url, urls.upload_url), data=cuerpo, method="PUT",
+            headers={"Content-Type": f"multipart/form-data; boundary={limite}"},
+        )
+        await asyncio.to_thread(urllib.request.urlopen, put, timeout=ESPERA_MAXIMA_S)
+
+        estado = WidgetState(id=uploader.id)
+        info = estado.file_uploader_state_value.uploaded_file_info.add()
+        info.name, info.size, info.file_id = nombre, len(datos), urls.file_id
+        info.file_urls.CopyFrom(urls)
+        self.estados[uploader.id] = estado
+        resultado = await self.rerun()
+        resultado["ms"] = (time.perf_counter() - inicio) * 1000.0
+        return resultado
+
+    async def descargar(self, boton, intentos: int = 5) -> int:
+        """Genera la descarga diferida de un st.download_button y la baja; devuelve los bytes.
+
+        Streamlit borra el archivo generado cuando terminan dos ejecuciones de cualquier
+        sesión sin que lo haya pedido nadie: con varias sesiones activas puede dar 404
+        antes del GET. Se vuelve a pedir, como quien hace clic otra vez (el tiempo cuenta).
+        """
+        from urllib.error import HTTPError
+
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        for intento in range(intentos):
+            pedido = BackMsg()
+            pedido.backend_operation_request.request_id = uuid.uuid4().hex
+            pedido.backend_operation_request.session_id = self.id_sesion
+            pedido.backend_operation_request.deferred_file.file_id = boton.deferred_file_id
+            await self._enviar(pedido)
+            while True:
+                mensaje, _ = await self._recibir()
+                if mensaje.WhichOneof("type") == "backend_operation_response":
+                    respuesta = mensaje.backend_operation_response
+                    if respuesta.error_msg:
+                        raise RuntimeError(respuesta.error_msg)
+                    break
+            try:
+                url = urljoin(self.url, respuesta.deferred_file.url)
+                with await asyncio.to_thread(urllib.request.urlopen, url) as r:
+                    return len(r.read())
+            except HTTPError as e:
+                if e.code != 404 or intento == intentos - 1:
+                    raise
@@ -0,0 +1,296 @@
+"""Exactitud y latencia de la estimación de raíces y humedad (raices_humedad.py).
+
+    python bench/exactitud_raices_humedad.py                        # exactitud y latencia
+    python bench/exactitud_raices_humedad.py --calibrar             # sugiere pesos y umbrales
+    python bench/exactitud_raices_humedad.py --guardar muestras/    # escribe las muestras (JPEG + etiquetas.csv)
+
+Las muestras rotuladas se generan con semilla fija, así son las mismas en cada
+corrida sin guardar imágenes en el repositorio. Cada una es un suelo
+sintético de 1600×1200 (el tamaño que deja imagen_muestra.procesar_imagen):
+color base de suelo seco, textura en varias escalas, terrones y sombras,
+granos claros y grietas oscuras como distractores, raíces como trazos claros
+y ramificados (0, 2-5 o 12-25 según la clase), y la humedad como
+oscurecimiento, más croma y brillos (como en la carta Munsell, un suelo
+húmedo baja 1-2 valores). Pasan por JPEG como una foto real.
+
+`--calibrar` ajusta los umbrales (y los pesos de humedad) sobre un conjunto y
+reporta la exactitud sobre otro, generado con semillas distintas.
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import raices_humedad as rh  # noqa: E402
+from opciones import OPCIONES  # noqa: E402
+
+TAMANO = (1600, 1200)
+SEMILLA_EVALUACION = 0
+SEMILLA_CALIBRACION = 100_000
+RAICES_POR_CLASE = {"ausentes": (0, 0), "escasas": (2, 5), "abundantes": (12, 25)}
+# (baja de L*, factor de croma, brillos) por clase de humedad.
+HUMEDAD_POR_CLASE = {"baja": ((0, 0), 1.0, 0), "media": ((7, 11), 1.1, 0), "alta": ((15, 21), 1.2, 40)}
+
+
+# ================================
+# MUESTRAS SINTÉTICAS ROTULADAS
+# ================================
+def _ruido(rng, alto, ancho, sigmas=(2, 8, 32), pesos=(1.0, 1.5, 2.0)):
+    import cv2
+
+    campo = np.zeros((alto, ancho), np.float32)
+    for sigma, peso in zip(sigmas, pesos):
+        capa = cv2.GaussianBlur(rng.standard_normal((alto, ancho)).astype(np.float32), (0, 0), sigma)
+        campo += peso * capa / max(float(capa.std()), 1e-6)
+    return campo / float(campo.std())
+
+
+def _trazo(rng, alto, ancho, pasos, paso_px):
+    # Camino con dirección que cambia suavemente (raíz o grieta).
+    punto = np.array([rng.uniform(0, ancho), rng.uniform(0, alto)])
+    angulo = rng.uniform(0, 2 * np.pi)
+    puntos = [punto.copy()]
+    for _ in range(pasos):
+        angulo += rng.normal(0, 0.25)
+        punto += paso_px * np.array([np.cos(angulo), np.sin(angulo)])
+        puntos.append(punto.copy())
+    return np.round(np.array(puntos)).astype(np.int32)
+
+
+def generar_muestra(raices: str, humedad: str, semilla: int, tamano=TAMANO) -> np.ndarray:
+    """Imagen RGB uint8 de un suelo sintético con las clases indicadas."""
+    import cv2
+
+    rng = np.random.default_rng(semilla)
+    ancho, alto = tamano
+    l_seco, tono, croma = rng.uniform(50, 72), np.radians(rng.uniform(40, 85)), rng.uniform(12, 30)
+    (baja_min, baja_max), factor_croma, n_brillos = HUMEDAD_POR_CLASE[humedad]
+    l_base = l_seco - rng.uniform(baja_min, baja_max) if baja_max else l_seco
+    croma *= factor_croma
+
+    l = l_base + 5.0 * _ruido(rng, alto, ancho)
+    sombras = np.zeros((alto, ancho), np.float32)
+    for _ in range(30):   # terrones: sombras suaves
+        centro = (int(rng.uniform(0, ancho)), int(rng.uniform(0, alto)))
+        cv2.circle(sombras, centro, int(rng.uniform(10, 40)), float(rng.uniform(5, 12)), -1)
+    l -= cv2.GaussianBlur(sombras, (0, 0), 6)
+
+    claros = np.zeros((alto, ancho), np.float32)
+    for _ in range(int(rng.integers(100, 400))):   # granos de arena claros
+        cv2.circle(claros, (int(rng.uniform(0, ancho)), int(rng.uniform(0, alto))), int(rng.integers(1, 4)), float(rng.uniform(8, 18)), -1)
+    oscuros = np.zeros((alto, ancho), np.float32)
+    for _ in range(int(rng.integers(0, 5))):       # grietas
+        cv2.polylines(oscuros, [_trazo(rng, alto, ancho, int(rng.integers(20, 80)), 8)], False, float(rng.uniform(10, 18)), int(rng.integers(2, 5)))
+
+    trazos = np.zeros((alto, ancho), np.float32)
+    for _ in range(int(rng.integers(RAICES_POR_CLASE[raices][0], RAICES_POR_CLASE[raices][1] + 1))):
+        principal = _trazo(rng, alto, ancho, int(rng.integers(20, 120)), 8)
+        contraste = float(rng.uniform(12, 25))
+        cv2.polylines(trazos, [principal], False, contraste, int(rng.integers(2, 6)))
+        for _ in range(int(rng.integers(0, 4))):   # raíces laterales, más finas
+            x, y = principal[rng.integers(len(principal))]
+            lateral = _trazo(rng, alto, ancho, int(rng.integers(5, 30)), 6) - _trazo(rng, alto, ancho, 0, 0)[0] + (x, y)
+            cv2.polylines(trazos, [lateral.astype(np.int32)], False, contraste * 0.8, 2)
+    l += cv2.GaussianBlur(claros + trazos, (0, 0), 0.7) - cv2.GaussianBlur(oscuros, (0, 0), 0.7)
+
+    # Las raíces y los granos son claros y poco saturados.
+    desaturar = 1.0 - 0.6 * np.clip((trazos + claros) / 20.0, 0, 1)
+    variacion = 1.0 + 0.08 * _ruido(rng, alto, ancho, sigmas=(4, 16), pesos=(1.0, 1.0))
+    a = croma * np.cos(tono) * desaturar * variacion
+    b = croma * np.sin(tono) * desaturar * variacion
+    lab = np.dstack([np.clip(l, 0, 100), a, b]).astype(np.float32)
+    rgb = cv2.cvtColor(lab, cv2.COLOR_Lab2RGB)
+
+    for _ in range(n_brillos):   # brillo de la película de agua
+        centro = (int(rng.uniform(0, ancho)), int(rng.uniform(0, alto)))
+        cv2.ellipse(rgb, centro, (int(rng.integers(2, 7)), int(rng.integers(1, 4))), float(rng.uniform(0, 180)), 0, 360, (1.0, 1.0, 1.0), -1)
+
+    rgb = (np.clip(rgb, 0, 1) * 255 + 0.5).astype(np.uint8)
+    ok, jpeg = cv2.imencode(".jpg", rgb[..., ::-1], [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return np.ascontiguousarray(cv2.imdecode(jpeg, cv2.IMREAD_COLOR)[..., ::-1])
+
+
+def muestras(por_combinacion: int, semilla_base: int):
+    """Genera (raíces, humedad, semilla, rgb) para cada combinación de clases."""
+    n = 0
+    for raices, humedad in itertools.product(OPCIONES["raices"], OPCIONES["humedad"]):
+        for _ in range(por_combinacion):
+            yield raices, humedad, semilla_base + n, generar_muestra(raices, humedad, semilla_base + n)
+            n += 1
+
+
+# ================================
+# MEDICIÓN
+# ================================
+def _percentil(valores, q):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(q * len(valores)))] if valores else None
+
+
+def _matriz(etiquetas, predichas, clases) -> list:
+    pos = {c: i for i, c in enumerate(clases)}
+    m = np.zeros((len(clases), len(clases)), dtype=int)
+    for e, p in zip(etiquetas, predichas):
+        m[pos[e], pos[p]] += 1
+    return m.tolist()
+
+
+def evaluar(por_combinacion: int, semilla_base: int = SEMILLA_EVALUACION) -> dict:
+    filas, tiempos = [], {"raices": [], "humedad": []}
+    for raices, humedad, semilla, rgb in muestras(por_combinacion, semilla_base):
+        inicio = time.perf_counter()
+        est_raices = rh.estimar_raices(rgb)
+        medio = time.perf_counter()
+        est_humedad = rh.estimar_humedad(rgb)
+        fin = time.perf_counter()
+        tiempos["raices"].append(medio - inicio)
+        tiempos["humedad"].append(fin - medio)
+        filas.append((raices, humedad, semilla, est_raices, est_humedad))
+
+    resultado = {"muestras": len(filas)}
+    for k, atributo in ((0, "raices"), (1, "humedad")):
+        etiquetas = [f[k] for f in filas]
+        estimaciones = [f[3 + k] for f in filas]
+        aciertos = [e == est["clase"] for e, est in zip(etiquetas, estimaciones)]
+        confianzas = np.array([est["confianza"] for est in estimaciones])
+        ms = [s * 1000 for s in tiempos[atributo]]
+        resultado[atributo] = {
+            "exactitud": round(float(np.mean(aciertos)), 3),
+            "confusion": _matriz(etiquetas, [est["clase"] for est in estimaciones], OPCIONES[atributo]),
+            "confianza_aciertos": round(float(confianzas[aciertos].mean()), 3) if any(aciertos) else None,
+            "confianza_errores": round(float(confianzas[~np.array(aciertos)].mean()), 3) if not all(aciertos) else None,
+            "p50_ms": round(_percentil(ms, 0.5), 1),
+            "p95_ms": round(_percentil(ms, 0.95), 1),
+        }
+    return resultado
+
+
+def medir_foto_grande(lado=(4032, 3024)) -> dict:
+    """Latencia y pico de memoria de NumPy con una foto de 12 MP sin reducir."""
+    import cv2
+
+    rgb = cv2.resize(generar_muestra("escasas", "media", 7), lado, interpolation=cv2.INTER_CUBIC)
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    rh.estimar_raices(rgb)
+    rh.estimar_humedad(rgb)
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"lado": list(lado), "ms": round(duracion * 1000, 1), "pico_numpy_mb": round(pico / 2**20, 1)}
+
+
+# ================================
+# CALIBRACIÓN
+# ================================
+def _mejores_umbrales(valores, etiquetas) -> tuple:
+    """Par de umbrales (u1 < u2) que maximiza los aciertos de clases ordenadas 0 < 1 < 2."""
+    valores, etiquetas = np.asarray(valores, float), np.asarray(etiquetas)
+    orden = np.sort(np.unique(valores))
+    candidatos = np.concatenate([[orden[0] - 1], (orden[1:] + orden[:-1]) / 2, [orden[-1] + 1]])
+    mejor = (-1, None)
+    for u1, u2 in itertools.combinations(candidatos, 2):
+        aciertos = int((np.searchsorted([u1, u2], valores, side="right") == etiquetas).sum())
+        if aciertos > mejor[0]:
+            mejor = (aciertos, (float(u1), float(u2)))
+    return mejor[1], mejor[0] / len(valores)
+
+
+def calibrar(por_combinacion: int) -> dict:
+    def rasgos(semilla_base):
+        datos = []
+        for raices, humedad, _, rgb in muestras(por_combinacion, semilla_base):
+            est = rh.estimar_raices(rgb)
+            datos.append((OPCIONES["raices"].index(raices), OPCIONES["humedad"].index(humedad),
+                          np.log(max(est["indice"], 1e-3)), rh.rasgos_humedad(rgb)))
+        return datos
+
+    ajuste, prueba = rasgos(SEMILLA_CALIBRACION), rasgos(SEMILLA_EVALUACION)
+    (u1, u2), exactitud_ajuste = _mejores_umbrales([d[2] for d in ajuste], [d[0] for d in ajuste])
+    aciertos = np.searchsorted([u1, u2], [d[2] for d in prueba], side="right") == [d[0] for d in prueba]
+    salida = {"raices": {
+        "UMBRALES_RAICES": (round(float(np.exp(u1)), 3), round(float(np.exp(u2)), 3)),
+        "exactitud_ajuste": round(exactitud_ajuste, 3), "exactitud_prueba": round(float(aciertos.mean()), 3),
+    }}
+
+    def indices(datos, ps, pb):
+        return [-d[3]["l"] + ps * d[3]["saturacion"] + pb * d[3]["brillo"] for d in datos]
+
+    mejor = None
+    for ps, pb in itertools.product((0, 10, 20, 40, 60, 80), (0, 2, 4, 6, 10, 20)):
+        umbrales, exactitud = _mejores_umbrales(indices(ajuste, ps, pb), [d[1] for d in ajuste])
+        if mejor is None or exactitud > mejor[0]:
+            mejor = (exactitud, ps, pb, umbrales)
+    exactitud, ps, pb, (u1, u2) = mejor
+    aciertos = np.searchsorted([u1, u2], indices(prueba, ps, pb), side="right") == [d[1] for d in prueba]
+    salida["humedad"] = {
+        "PESO_SATURACION": float(ps), "PESO_BRILLO": float(pb), "UMBRALES_HUMEDAD": (round(u1, 1), round(u2, 1)),
+        "exactitud_ajuste": round(exactitud, 3), "exactitud_prueba": round(float(aciertos.mean()), 3),
+    }
+    return salida
+
+
+def guardar_muestras(directorio: str, por_combinacion: int) -> int:
+    from PIL import Image
+
+    os.makedirs(directorio, exist_ok=True)
+    n = 0
+    with open(os.path.join(directorio, "etiquetas.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["archivo", "raices", "humedad", "semilla"])
+        for raices, humedad, semilla, rgb in muestras(por_combinacion, SEMILLA_EVALUACION):
+            nombre = f"{raices}_{humedad}_{semilla:04d}.jpg"
+            buf = io.BytesIO()
+            Image.fromarray(rgb).save(buf, "JPEG", quality=92)
+            with open(os.path.join(directorio, nombre), "wb") as img:
+                img.write(buf.getvalue())
+            writer.writerow([nombre, raices, humedad, semilla])
+            n += 1
+    return n
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Exactitud y latencia de la estimación de raíces y humedad.")
+    parser.add_argument("--por-combinacion", type=int, default=6, help="muestras por par (raíces, humedad)")
+    parser.add_argument("--calibrar", action="store_true", help="ajustar umbrales y pesos (no modifica el código)")
+    parser.add_argument("--guardar", metavar="DIR", help="escribir las muestras de evaluación y terminar")
+    parser.add_argument("--minimo", type=float, default=0.0, help="exactitud mínima; si no se alcanza, código 1")
+    parser.add_argument("--salida", help="JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    if args.guardar:
+        print(f"{guardar_muestras(args.guardar, args.por_combinacion)} muestras → {args.guardar}")
+        return 0
+    if args.calibrar:
+        print(json.dumps(calibrar(args.por_combinacion), indent=2))
+        return 0
+
+    resultado = evaluar(args.por_combinacion)
+    resultado["foto_12mp"] = medir_foto_grande()
+    for atributo in ("raices", "humedad"):
+        r = resultado[atributo]
+        print(f"{atributo:<8} exactitud {r['exactitud']:.0%} · p50 {r['p50_ms']} ms · p95 {r['p95_ms']} ms · "
+              f"confianza aciertos {r['confianza_aciertos']} / errores {r['confianza_errores']}")
+        for clase, fila in zip(OPCIONES[atributo], r["confusion"]):
+            print(f"    {clase:<11} {fila}")
+    g = resultado["foto_12mp"]
+    print(f"12 MP sin reducir: {g['ms']} ms · pico NumPy {g['pico_numpy_mb']} MB")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+    minima = min(resultado["raices"]["exactitud"], resultado["humedad"]["exactitud"])
+    return 1 if minima < args.minimo else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
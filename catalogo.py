@@ -0,0 +1,82 @@
+"""Catálogo de imágenes de referencia (referencias/<categoria>/<carpeta>).
+
+El árbol de referencias se recorre una sola vez y se comparte entre sesiones.
+La firma de directorios (mtime de cada carpeta) permite detectar cuándo se
+agregan o eliminan fotos sin reiniciar la aplicación.
+"""
+import os
+
+EXTENSIONES_IMAGEN = (".png", ".jpg", ".jpeg")
+
+
+# ================================
+# FIRMA DE DIRECTORIOS
+# ================================
+def firma_directorios(base: str, categorias) -> tuple:
+    """Devuelve una tupla (ruta, mtime_ns) de cada carpeta bajo `base/<categoria>`.
+
+    Agregar, quitar o renombrar una imagen cambia el mtime de su carpeta, por lo
+    que la firma sirve como clave de caché del catálogo. Solo hace `os.stat`
+    (sin listar archivos); recursos.py la recalcula como mucho cada pocos segundos.
+    """
+    firma = []
+    for categoria in categorias:
+        ruta_cat = os.path.join(base, categoria)
+        try:
+            firma.append((ruta_cat, os.stat(ruta_cat).st_mtime_ns))
+            with os.scandir(ruta_cat) as it:
+                for entrada in it:
+                    if entrada.is_dir():
+                        firma.append((entrada.path, entrada.stat().st_mtime_ns))
+        except FileNotFoundError:
+            firma.append((ruta_cat, None))
+    return tuple(sorted(firma, key=lambda x: x[0]))
+
+
+# ================================
+# CONSTRUCCIÓN DEL CATÁLOGO
+# ================================
+def _listar_imagenes(ruta: str) -> list:
+    with os.scandir(ruta) as it:
+        return sorted(
+            entrada.path for entrada in it
+            if entrada.is_file() and entrada.name.lower().endswith(EXTENSIONES_IMAGEN)
+        )
+
+
+def construir_catalogo(base: str, carpetas_por_categoria: dict) -> dict:
+    """Recorre `base` y arma el catálogo de referencias.
+
+    `carpetas_por_categoria` indica, para cada categoría, las carpetas canónicas
+    que espera la app (los IDs de opciones.py). También se incluyen las
+    carpetas presentes en disco aunque no correspondan a ninguna opción.
+
+    Devuelve un dict con:
+      - "imagenes": {(categoria, carpeta): [rutas ordenadas]}
+      - "faltantes": [(categoria, carpeta)] mapeadas pero sin carpeta
+      - "vacias": [(categoria, carpeta)] mapeadas pero sin imágenes
+    """
+    imagenes = {}
+    for categoria in carpetas_por_categoria:
+        ruta_cat = os.path.join(base, categoria)
+        en_disco = set()
+        if os.path.isdir(ruta_cat):
+            with os.scandir(ruta_cat) as it:
+                en_disco = {e.name for e in it if e.is_dir()}
+        for carpeta in sorted(en_disco):
+            imagenes[(categoria, carpeta)] = _listar_imagenes(os.path.join(ruta_cat, carpeta))
+
+    faltantes, vacias = [], []
+    for categoria, esperadas in carpetas_por_categoria.items():
+        for carpeta in sorted(set(esperadas)):
+            if (categoria, carpeta) not in imagenes:
+                faltantes.append((categoria, carpeta))
+            elif not imagenes[(categoria, carpeta)]:
+                vacias.append((categoria, carpeta))
+
+    return {"imagenes": imagenes, "faltantes": faltantes, "vacias": vacias}
+
+
+def imagenes_de(catalogo: dict, categoria: str, carpeta: str):
+    """Lista de imágenes de una carpeta, o None si la carpeta no existe."""
+    return catalogo["imagenes"].get((categoria, carpeta))
@@ -0,0 +1,151 @@
+"""Estimación automática del color Munsell a partir de la foto del suelo.
+
+Etapas (vectorizadas con NumPy/OpenCV):
+  1. Se descartan píxeles de brillo especular y de sombra.
+  2. Los píxeles restantes se agrupan con k-means en CIELAB.
+  3. El centro del grupo dominante se compara con una tabla precalculada de
+     fichas Munsell de suelos (búsqueda de vecino más cercano por ΔE76).
+
+La tabla cubre las hojas usuales de una carta de suelos (10R a 5Y, valores 2-8,
+cromas 1-8 y neutros N). Las coordenadas Lab de cada ficha se aproximan: L* sale
+del valor Munsell (polinomio ASTM D1535); el ángulo de tono por hoja y el factor
+C*ab por paso de croma se ajustaron con las fichas rotuladas de
+`referencias/color/`. Alcanza para ubicar la clase de color de la app; no
+reemplaza a la carta física.
+"""
+import numpy as np
+
+HOJAS = ("10R", "2.5YR", "5YR", "7.5YR", "10YR", "2.5Y", "5Y")
+# Ángulo de tono aproximado (grados, CIELAB) de cada hoja a croma moderado.
+ANGULO_HOJA = {"10R": 40.0, "2.5YR": 46.0, "5YR": 53.0, "7.5YR": 61.0, "10YR": 69.0, "2.5Y": 78.0, "5Y": 87.0}
+# C*ab por cada paso de croma Munsell.
+FACTOR_CROMA = 6.3
+VALORES = (2.0, 2.5, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0)
+CROMAS = (1, 2, 3, 4, 6, 8)
+
+MAX_PIXELES_ANALISIS = 250_000   # se submuestrea antes de pasar a Lab
+MAX_PIXELES_KMEANS = 20_000
+K_GRUPOS = 4
+DELTA_E_MAX = 25.0               # a partir de esta distancia la confianza es 0
+
+
+# ================================
+# TABLA DE FICHAS MUNSELL
+# ================================
+def _l_de_valor(v):
+    v = np.asarray(v, dtype=np.float64)
+    y = 1.1914 * v - 0.22533 * v**2 + 0.23352 * v**3 - 0.020484 * v**4 + 0.00081939 * v**5
+    return 116.0 * np.cbrt(y / 100.0) - 16.0
+
+
+def clase_de_ficha(hoja: str, valor: float, croma: int) -> str:
+    """ID de color de la app (opciones.OPCIONES["color"]) que corresponde a una ficha."""
+    if croma <= 1:
+        if valor >= 7:
+            return "blanco"
+        return "negro" if valor <= 2.5 else "gris"
+    if valor >= 8 and croma <= 2:
+        return "blanco"
+    if hoja in ("10R", "2.5YR") and croma >= 4:
+        return "rojo-intenso"
+    if hoja in ("5YR", "7.5YR") and croma >= 6:
+        return "rojo-amarillento"
+    if hoja in ("10YR", "2.5Y", "5Y") and valor >= 6 and croma >= 4:
+        return "amarillo"
+    if valor <= 3 and croma <= 3:
+        return "pardo-marron"
+    return "marron"
+
+
+def _formatear(hoja: str, valor: float, croma: int) -> str:
+    v = f"{valor:g}"
+    return f"N {v}/" if croma == 0 else f"{hoja} {v}/{croma}"
+
+
+def construir_tabla():
+    """Devuelve (codigos, clases, lab) con lab como matriz float32 (n, 3)."""
+    codigos, clases, filas = [], [], []
+    for hoja in HOJAS:
+        h = np.deg2rad(ANGULO_HOJA[hoja])
+        for valor in VALORES:
+            l = float(_l_de_valor(valor))
+            for croma in CROMAS:
+                c = croma * FACTOR_CROMA
+                codigos.append(_formatear(hoja, valor, croma))
+                clases.append(clase_de_ficha(hoja, valor, croma))
+                filas.append((l, c * np.cos(h), c * np.sin(h)))
+    for valor in VALORES:
+        codigos.append(_formatear("N", valor, 0))
+        clases.append(clase_de_ficha("N", valor, 0))
+        filas.append((float(_l_de_valor(valor)), 0.0, 0.0))
+    return codigos, clases, np.asarray(filas, dtype=np.float32)
+
+
+CODIGOS, CLASES, LAB_FICHAS = construir_tabla()
+_NORMA_FICHAS = (LAB_FICHAS.astype(np.float64) ** 2).sum(axis=1)
+
+
+def fichas_mas_cercanas(lab):
+    """Índice y ΔE76 de la ficha más cercana para cada fila de `lab` (n, 3).
+
+    Las distancias de todo el lote se obtienen con un único producto matricial.
+    """
+    lab = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+    d2 = (lab ** 2).sum(axis=1)[:, None] - 2.0 * lab @ LAB_FICHAS.T.astype(np.float64) + _NORMA_FICHAS[None, :]
+    idx = d2.argmin(axis=1)
+    return idx, np.sqrt(np.maximum(d2[np.arange(len(idx)), idx], 0.0))
+
+
+# ================================
+# ESTIMACIÓN A PARTIR DE LA IMAGEN
+# ================================
+def mascara_suelo(rgb: np.ndarray, lab: np.ndarray) -> np.ndarray:
+    """True en los píxeles útiles: ni brillo especular ni sombra profunda."""
+    l = lab[..., 0]
+    brillo = (rgb.max(axis=-1) >= 250) | (l >= 92)
+    mediana = np.median(l)
+    sombra = (l < 0.45 * mediana) & (l < 25)
+    return ~(brillo | sombra)
+
+
+def estimar_munsell(rgb: np.ndarray, semilla: int = 0):
+    """Estima el color Munsell de una imagen RGB uint8 (alto, ancho, 3).
+
+    Devuelve None si no quedan suficientes píxeles de suelo, o un dict con
+    "munsell" (p. ej. "10YR 3/4"), "clase" (carpeta de color), "confianza"
+    (0-1: participación del grupo dominante × cercanía a la ficha), "delta_e"
+    y "lab" del grupo dominante.
+    """
+    import cv2
+
+    paso = max(1, int(np.ceil(np.sqrt(rgb.shape[0] * rgb.shape[1] / MAX_PIXELES_ANALISIS))))
+    rgb = np.ascontiguousarray(rgb[::paso, ::paso, :3])
+    lab = cv2.cvtColor(rgb.astype(np.float32) / 255.0, cv2.COLOR_RGB2Lab)
+
+    pixeles = lab[mascara_suelo(rgb, lab)]
+    if len(pixeles) < 500:
+        return None
+    rng = np.random.default_rng(semilla)
+    if len(pixeles) > MAX_PIXELES_KMEANS:
+        pixeles = pixeles[rng.choice(len(pixeles), MAX_PIXELES_KMEANS, replace=False)]
+
+    cv2.setRNGSeed(semilla)
+    criterio = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 0.5)
+    _, etiquetas, centros = cv2.kmeans(
+        np.ascontiguousarray(pixeles, dtype=np.float32), K_GRUPOS, None, criterio, 2, cv2.KMEANS_PP_CENTERS
+    )
+    conteos = np.bincount(etiquetas.ravel(), minlength=K_GRUPOS)
+    dominante = int(conteos.argmax())
+    centro = centros[dominante]
+
+    idx, delta_e = fichas_mas_cercanas(centro)
+    idx, delta_e = int(idx[0]), float(delta_e[0])
+    participacion = conteos[dominante] / conteos.sum()
+    confianza = float(participacion * max(0.0, 1.0 - delta_e / DELTA_E_MAX))
+    return {
+        "munsell": CODIGOS[idx],
+        "clase": CLASES[idx],
+        "confianza": round(confianza, 3),
+        "delta_e": round(delta_e, 2),
+        "lab": tuple(round(float(x), 2) for x in centro),
+    }
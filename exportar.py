@@ -0,0 +1,51 @@
+"""Exportación a Excel (XLSX).
+
+`excel_reporte` arma el reporte de un análisis en memoria. `exportar_historial_xlsx`
+escribe el historial de análisis guardados en modo write-only de openpyxl: las
+filas se consumen de un iterable y se vuelcan a disco a medida que llegan, así
+que la memoria usada no depende de la cantidad de filas.
+"""
+import io
+
+from openpyxl import Workbook
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def excel_reporte(titulo, fecha, bloques) -> bytes:
+    """Reporte de un análisis. `bloques` es una secuencia de (título, [líneas])."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Análisis de suelo"
+
+    ws.append([titulo])
+    ws.append([fecha])
+    for titulo_bloque, lineas in bloques:
+        ws.append([])
+        ws.append([titulo_bloque])
+        for linea in lineas:
+            ws.append([linea])
+
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def exportar_historial_xlsx(hojas, destino) -> int:
+    """Escribe el historial en `destino` (ruta o archivo binario abierto).
+
+    `hojas` es un iterable de (nombre_hoja, encabezados, filas), donde `filas`
+    puede ser un generador. Devuelve la cantidad de filas escritas.
+    """
+    wb = Workbook(write_only=True)
+    total = 0
+    for nombre, encabezados, filas in hojas:
+        ws = wb.create_sheet(title=nombre[:31])
+        ws.append(list(encabezados))
+        for fila in filas:
+            ws.append(list(fila))
+            total += 1
+    if not wb.worksheets:
+        wb.create_sheet(title="Historial")
+    wb.save(destino)
+    return total
@@ -0,0 +1,176 @@
+"""Copia columnar (Parquet) del historial de análisis para cargas rápidas en frío.
+
+Leer cientos de miles de filas desde SQLite y convertirlas a DataFrame lleva
+segundos; desde Parquet, una fracción. La copia se mantiene en partes:
+
+    historial_parquet/parte-000000000001-000000005000.parquet   (ids 1 a 5000)
+    historial_parquet/parte-000000005001-000000005012.parquet   ...
+
+Cada carga solo lee de SQLite las filas con id mayor al de la última parte y
+las agrega como una parte nueva. Cuando hay demasiadas partes se compactan en
+una sola. La carpeta va junto al archivo de la base. El almacén es de solo
+agregado; si la base tiene menos filas que la copia (por ejemplo, se borró) o
+sus datos se migraron (almacen.VERSION_DATOS), la copia se rehace.
+
+En memoria el historial se guarda igual, como lista de partes (DataFrames):
+agregar_nuevas suma solo las filas nuevas como una parte más y unir_partes las
+junta cuando hace falta un único DataFrame.
+"""
+import glob
+import os
+import threading
+
+from almacen import COLUMNAS
+
+DIR_PARQUET = "historial_parquet"
+MAX_PARTES = 16
+ARCHIVO_VERSION = "version"
+COLUMNAS_CATEGORICAS = ("idioma", "color", "textura", "estructura", "humedad", "raices", "munsell", "origen")
+_lock = threading.Lock()
+
+
+def _partes(directorio: str) -> list:
+    return sorted(glob.glob(os.path.join(directorio, "parte-*-*.parquet")))
+
+
+def _primer_id_de(parte: str) -> int:
+    return int(os.path.basename(parte).split("-")[1])
+
+
+def _ultimo_id_de(parte: str) -> int:
+    return int(os.path.basename(parte)[:-len(".parquet")].split("-")[2])
+
+
+def _esquema():
+    import pyarrow as pa
+
+    # Fijo: una parte con una columna toda vacía no debe cambiar de tipo.
+    return pa.schema(
+        [("id", pa.int64()), ("fecha", pa.timestamp("us"))]
+        + [(c, pa.string()) for c in COLUMNAS if c != "fecha"]
+    )
+
+
+def _a_tabla(filas):
+    import pandas as pd
+    import pyarrow as pa
+
+    df = pd.DataFrame.from_records(filas, columns=("id", *COLUMNAS))
+    df["fecha"] = pd.to_datetime(df["fecha"], errors="coerce")
+    return pa.Table.from_pandas(df, schema=_esquema(), preserve_index=False)
+
+
+def _escribir(tabla, directorio: str, primero: int, ultimo: int) -> str:
+    import pyarrow.parquet as pq
+
+    destino = os.path.join(directorio, f"parte-{primero:012d}-{ultimo:012d}.parquet")
+    tmp = destino + ".tmp"
+    pq.write_table(tabla, tmp, compression="zstd")
+    os.replace(tmp, destino)
+    return destino
+
+
+def _leer(partes: list):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    return pa.concat_tables([pq.read_table(p, schema=_esquema()) for p in partes])
+
+
+def _version_copia(directorio: str):
+    try:
+        with open(os.path.join(directorio, ARCHIVO_VERSION)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def directorio_de(almacen) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(almacen.ruta)), DIR_PARQUET)
+
+
+def actualizar(almacen, directorio: str = None) -> list:
+    """Agrega a la copia las filas nuevas del almacén y devuelve las partes vigentes."""
+    directorio = directorio or directorio_de(almacen)
+    with _lock:
+        os.makedirs(directorio, exist_ok=True)
+        partes = _partes(directorio)
+        ultimo = _ultimo_id_de(partes[-1]) if partes else 0
+        version = almacen.version_datos()
+        if almacen.ultimo_id() < ultimo or _version_copia(directorio) != version:
+            for parte in partes:
+                os.remove(parte)
+            partes, ultimo = [], 0
+            with open(os.path.join(directorio, ARCHIVO_VERSION), "w") as f:
+                f.write(str(version))
+
+        nuevas = list(almacen.iterar_desde(ultimo))
+        if nuevas:
+            partes.append(_escribir(_a_tabla(nuevas), directorio, nuevas[0][0], nuevas[-1][0]))
+
+        if len(partes) > MAX_PARTES:
+            compacta = _escribir(_leer(partes), directorio, _primer_id_de(partes[0]), _ultimo_id_de(partes[-1]))
+            for parte in partes:
+                if parte != compacta:
+                    os.remove(parte)
+            partes = [compacta]
+        return partes
+
+
+def _a_pandas(tabla, version: int):
+    import pandas as pd
+
+    df = tabla.to_pandas()
+    for columna in COLUMNAS_CATEGORICAS:
+        df[columna] = df[columna].astype(pd.CategoricalDtype())
+    df.attrs["version_datos"] = version
+    df.attrs["ultimo_id"] = int(df["id"].max()) if len(df) else 0
+    return df
+
+
+def cargar_historial(almacen, directorio: str = None):
+    """Historial completo como DataFrame (columnas: id + COLUMNAS), al día con el almacén."""
+    version = almacen.version_datos()
+    partes = actualizar(almacen, directorio)
+    with _lock:
+        tabla = _leer(partes) if partes else _a_tabla([])
+    return _a_pandas(tabla, version)
+
+
+def unir_partes(partes: list):
+    """Un solo DataFrame con las filas de `partes`, sin perder las columnas categóricas."""
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    if len(partes) == 1:
+        return partes[0]
+    # concat de categóricas con categorías distintas daría object: se unen aparte.
+    otras = [c for c in partes[0].columns if c not in COLUMNAS_CATEGORICAS]
+    unido = pd.concat([p[otras] for p in partes], ignore_index=True)
+    for columna in COLUMNAS_CATEGORICAS:
+        unido[columna] = union_categoricals([p[columna] for p in partes])
+    unido = unido[list(partes[0].columns)]
+    unido.attrs.update(partes[-1].attrs)
+    return unido
+
+
+def agregar_nuevas(almacen, partes: list, directorio: str = None) -> list:
+    """`partes` (de cargar_historial y llamadas anteriores) más las filas guardadas después.
+
+    Solo se leen y convierten las filas nuevas, que quedan como una parte más: se
+    devuelve una lista nueva (no modifica `partes`, que puede estar compartida) o la
+    misma si no hay filas nuevas. Con más de MAX_PARTES partes se compactan en una.
+    La copia Parquet se pone al día en la próxima carga (cargar_historial). Si la
+    base se migró o tiene menos filas, se recarga todo.
+    """
+    version = partes[-1].attrs["version_datos"]
+    ultimo = partes[-1].attrs["ultimo_id"]
+    ultimo_db = almacen.ultimo_id()
+    if ultimo_db == ultimo and almacen.version_datos() == version:
+        return partes
+    if ultimo_db < ultimo or almacen.version_datos() != version:
+        return [cargar_historial(almacen, directorio)]
+
+    nuevas = list(almacen.iterar_desde(ultimo))
+    partes = partes + [_a_pandas(_a_tabla(nuevas), version)]
+    return [unir_partes(partes)] if len(partes) > MAX_PARTES else partes
@@ -0,0 +1,79 @@
+"""Decodificación única de la imagen de suelo subida por el estudiante.
+
+La foto (a menudo 12+ MP desde el celular) se decodifica una sola vez por
+contenido: se corrige la orientación EXIF, se reduce a un presupuesto de
+píxeles y se generan las vistas JPEG que muestra la app. El resultado se
+reutiliza en cada rerun y en cualquier análisis posterior.
+"""
+import hashlib
+import io
+
+LIMITE_BYTES = 25 * 1024 * 1024          # archivos más grandes se rechazan sin leerlos
+LIMITE_PIXELES_ORIGEN = 100_000_000      # protección contra "bombas" de descompresión
+PRESUPUESTO_PIXELES = 2_000_000          # tamaño del arreglo usado para análisis
+ANCHO_VISTA = 1280                       # imagen subida (ancho de contenedor)
+ANCHO_RESUMEN = 250                      # miniatura del bloque "Resumen"
+CALIDAD_VISTA = 85
+
+
+class ImagenInvalida(ValueError):
+    """La imagen no se puede procesar. `motivo` es "tamano", "dimensiones" o "corrupta"."""
+
+    def __init__(self, motivo: str, detalle: str = ""):
+        super().__init__(detalle or motivo)
+        self.motivo = motivo
+
+
+def sha256_bytes(datos: bytes) -> str:
+    return hashlib.sha256(datos).hexdigest()
+
+
+def _jpeg(img, ancho: int) -> bytes:
+    from PIL import Image
+
+    if img.width > ancho:
+        img = img.resize((ancho, max(1, round(img.height * ancho / img.width))), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=CALIDAD_VISTA, optimize=True)
+    return buf.getvalue()
+
+
+def procesar_imagen(datos: bytes, presupuesto: int = PRESUPUESTO_PIXELES) -> dict:
+    """Decodifica, orienta y reduce `datos`.
+
+    Devuelve un dict con:
+      - "sha256": hash del contenido original
+      - "array": np.ndarray uint8 (alto, ancho, 3) RGB de a lo sumo `presupuesto` píxeles
+      - "vista", "resumen": JPEG listos para st.image (no se reescalan al mostrarlos)
+      - "tamano_original": (ancho, alto) antes de reducir
+    Lanza ImagenInvalida si el archivo es demasiado grande o no es una imagen válida.
+    """
+    import numpy as np
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    if len(datos) > LIMITE_BYTES:
+        raise ImagenInvalida("tamano", f"{len(datos)} bytes")
+
+    try:
+        img = Image.open(io.BytesIO(datos))
+        ancho, alto = img.size
+        if ancho * alto > LIMITE_PIXELES_ORIGEN:
+            raise ImagenInvalida("dimensiones", f"{ancho}x{alto}")
+        escala = min(1.0, (presupuesto / (ancho * alto)) ** 0.5)
+        # En JPEG, draft() decodifica directamente a 1/2, 1/4 u 1/8 de la resolución.
+        img.draft("RGB", (int(ancho * escala), int(alto * escala)))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise ImagenInvalida("corrupta", str(e)) from e
+
+    if img.width * img.height > presupuesto:
+        escala = (presupuesto / (img.width * img.height)) ** 0.5
+        img = img.resize((max(1, int(img.width * escala)), max(1, int(img.height * escala))), Image.LANCZOS)
+
+    return {
+        "sha256": sha256_bytes(datos),
+        "array": np.asarray(img, dtype=np.uint8),
+        "vista": _jpeg(img, ANCHO_VISTA),
+        "resumen": _jpeg(img, ANCHO_RESUMEN),
+        "tamano_original": (ancho, alto),
+    }
@@ -0,0 +1,196 @@
+"""Instrumentación de latencia por sección (desactivada por defecto).
+
+Se activa con la variable de entorno SUELOS_METRICAS=1. Desactivada, `tramo()`
+devuelve siempre el mismo contexto vacío y `contar()`/`observar()` retornan de
+inmediato, así que el costo es una comparación por llamada.
+
+Activada, registra:
+  - tramos con nombre (duración en ms) en histogramas acumulados y en una
+    ventana móvil (últimos VENTANA_S segundos) para p50/p95;
+  - contadores globales y por sesión (reruns, bytes de imagen entregados a
+    st.image, Excel generados).
+
+Exportación:
+  - texto_prometheus(): formato de texto de Prometheus;
+  - SUELOS_METRICAS_PUERTO=9108 sirve ese texto en http://127.0.0.1:9108/metrics
+    (sin autenticación: solo local salvo SUELOS_METRICAS_HOST=0.0.0.0 u otra interfaz);
+  - SUELOS_METRICAS_JSONL=ruta agrega una línea JSON por rerun.
+"""
+import bisect
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+
+ACTIVO = os.environ.get("SUELOS_METRICAS", "").lower() in ("1", "true", "si", "sí", "yes")
+LIMITES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+VENTANA_S = 300
+MAX_MUESTRAS_VENTANA = 4096
+SESION_INACTIVA_S = 1800
+
+_NULO = contextlib.nullcontext()
+_lock = threading.Lock()
+_histogramas = {}          # nombre -> [conteos por límite + Inf, suma_ms, n]
+_ventanas = {}             # nombre -> deque[(t, ms)]
+_contadores = Counter()    # nombre -> total del proceso
+_sesiones = {}             # id de sesión -> {"visto": t, "contadores": Counter}
+_servidor = None
+_error_servidor = None   # OSError al abrir el puerto (p. ej. ya en uso): no se reintenta
+
+
+# ================================
+# REGISTRO
+# ================================
+def observar(nombre: str, ms: float) -> None:
+    if not ACTIVO:
+        return
+    ahora = time.monotonic()
+    with _lock:
+        h = _histogramas.get(nombre)
+        if h is None:
+            h = _histogramas[nombre] = [[0] * (len(LIMITES_MS) + 1), 0.0, 0]
+            _ventanas[nombre] = deque(maxlen=MAX_MUESTRAS_VENTANA)
+        h[0][bisect.bisect_left(LIMITES_MS, ms)] += 1
+        h[1] += ms
+        h[2] += 1
+        _ventanas[nombre].append((ahora, ms))
+
+
+class _Tramo:
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observar(self.nombre, (time.perf_counter() - self.inicio) * 1000.0)
+        return False
+
+
+def tramo(nombre: str):
+    """Context manager que mide la duración del bloque bajo `nombre`."""
+    return _Tramo(nombre) if ACTIVO else _NULO
+
+
+def contar(nombre: str, n: int = 1, sesion: str = None) -> None:
+    """Suma `n` al contador global `nombre` y, si se indica, al de la sesión."""
+    if not ACTIVO:
+        return
+    with _lock:
+        _contadores[nombre] += n
+        if sesion is not None:
+            s = _sesiones.get(sesion)
+            if s is None:
+                s = _sesiones[sesion] = {"visto": 0.0, "contadores": Counter()}
+            s["visto"] = time.monotonic()
+            s["contadores"][nombre] += n
+
+
+# ================================
+# CONSULTA
+# ================================
+def _percentil(valores, q):
+    if not valores:
+        return None
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(q * len(valores)))]
+
+
+def resumen() -> dict:
+    """Estado actual: tramos (ventana móvil), contadores y sesiones activas."""
+    ahora = time.monotonic()
+    with _lock:
+        for sid in [s for s, d in _sesiones.items() if ahora - d["visto"] > SESION_INACTIVA_S]:
+            del _sesiones[sid]
+        tramos = {}
+        for nombre, ventana in _ventanas.items():
+            while ventana and ahora - ventana[0][0] > VENTANA_S:
+                ventana.popleft()
+            ms = [v for _, v in ventana]
+            tramos[nombre] = {
+                "n_total": _histogramas[nombre][2],
+                "n_ventana": len(ms),
+                "p50_ms": _percentil(ms, 0.50),
+                "p95_ms": _percentil(ms, 0.95),
+                "max_ms": max(ms) if ms else None,
+            }
+        return {
+            "tramos": tramos,
+            "contadores": dict(_contadores),
+            "sesiones_activas": sum(1 for d in _sesiones.values() if ahora - d["visto"] <= VENTANA_S),
+            "sesiones": {sid: dict(d["contadores"]) for sid, d in _sesiones.items()},
+        }
+
+
+def texto_prometheus() -> str:
+    lineas = []
+    with _lock:
+        lineas.append("# TYPE suelos_tramo_ms histogram")
+        for nombre, (conteos, suma, n) in sorted(_histogramas.items()):
+            acumulado = 0
+            for limite, c in zip(LIMITES_MS + ("+Inf",), conteos):
+                acumulado += c
+                lineas.append(f'suelos_tramo_ms_bucket{{tramo="{nombre}",le="{limite}"}} {acumulado}')
+            lineas.append(f'suelos_tramo_ms_sum{{tramo="{nombre}"}} {suma:.3f}')
+            lineas.append(f'suelos_tramo_ms_count{{tramo="{nombre}"}} {n}')
+        lineas.append("# TYPE suelos_total counter")
+        for nombre, valor in sorted(_contadores.items()):
+            lineas.append(f'suelos_total{{contador="{nombre}"}} {valor}')
+        lineas.append("# TYPE suelos_sesiones gauge")
+        lineas.append(f"suelos_sesiones {len(_sesiones)}")
+    return "\n".join(lineas) + "\n"
+
+
+def volcar_jsonl(ruta: str, registro: dict) -> None:
+    """Agrega `registro` (más una marca de tiempo) como una línea JSON en `ruta`."""
+    if not ACTIVO or not ruta:
+        return
+    with _lock, open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"t": time.time(), **registro}, ensure_ascii=False) + "\n")
+
+
+# ================================
+# SERVIDOR /metrics
+# ================================
+def iniciar_servidor(puerto: int, host: str = "127.0.0.1") -> None:
+    """Sirve texto_prometheus() en /metrics desde un hilo (una vez por proceso).
+
+    No hay autenticación: por defecto escucha solo en la interfaz local. Si el puerto
+    no se puede abrir (ya en uso, sin permiso) se avisa una vez en el log y la app
+    sigue sin /metrics; los reruns siguientes no lo vuelven a intentar.
+    """
+    global _servidor, _error_servidor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            cuerpo = texto_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _servidor is not None or _error_servidor is not None:
+            return
+        try:
+            _servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+        except OSError as e:
+            _error_servidor = e
+            logging.warning("Métricas sin /metrics: no se pudo abrir %s:%d (%s)", host, puerto, e)
+            return
+    threading.Thread(target=_servidor.serve_forever, name="metricas-http", daemon=True).start()
@@ -0,0 +1,60 @@
+"""IDs canónicos de las opciones, independientes del idioma.
+
+El mismo ID se usa en los selectores (format_func), como nombre de carpeta de
+referencias, como clave de las interpretaciones y reglas, y en la base de
+datos. Las traducciones (textos.ETIQUETAS) solo se usan para mostrar.
+"""
+import unicodedata
+
+from textos import ETIQUETAS
+
+ATRIBUTOS = ("color", "textura", "estructura", "humedad", "raices")
+OPCIONES = {
+    "color": ("rojo-intenso", "rojo-amarillento", "amarillo", "marron", "pardo-marron", "negro", "gris", "blanco"),
+    "textura": ("arcilloso", "arenoso", "franco", "limoso"),
+    "estructura": ("granular", "migajosa", "bloques", "prismatica-columnar", "laminar", "masiva", "suelto"),
+    "humedad": ("baja", "media", "alta"),
+    "raices": ("ausentes", "escasas", "abundantes"),
+}
+# Atributo → categoría (carpeta) dentro de referencias/.
+CATEGORIA_REFERENCIA = {"color": "color", "textura": "textura", "estructura": "forma-estructura"}
+
+
+def etiqueta(atributo: str, id_opcion, lang_code: str) -> str:
+    """Texto a mostrar para un ID (si no es un ID conocido, el valor tal cual)."""
+    if id_opcion is None:
+        return ""
+    return ETIQUETAS[lang_code][atributo].get(id_opcion, str(id_opcion))
+
+
+def _normalizar(texto: str) -> str:
+    sin_tildes = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return sin_tildes.strip().lower().replace(" ", "-")
+
+
+def _construir_alias() -> dict:
+    alias = {a: {} for a in ATRIBUTOS}
+    for atributo, ids in OPCIONES.items():
+        for id_opcion in ids:
+            alias[atributo][_normalizar(id_opcion)] = id_opcion
+        for textos in ETIQUETAS.values():
+            for id_opcion, texto in textos[atributo].items():
+                alias[atributo][_normalizar(texto)] = id_opcion
+    return alias
+
+
+_ALIAS = _construir_alias()
+
+
+def id_canonico(atributo: str, valor):
+    """ID de un valor guardado o escrito a mano: un ID, una etiqueta en cualquier
+    idioma o un texto de versiones anteriores como "Gris / azulados (gley)"
+    (se toma la primera palabra). None si no se reconoce."""
+    if not valor:
+        return None
+    alias = _ALIAS[atributo]
+    clave = _normalizar(str(valor))
+    if clave in alias:
+        return alias[clave]
+    primera = _normalizar(str(valor).split("/")[0].split("(")[0])
+    return alias.get(primera)
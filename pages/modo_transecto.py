@@ -0,0 +1,157 @@
+import streamlit as st
+import io
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from functools import partial
+
+from exportar import MIME_XLSX, exportar_historial_xlsx
+from imagen_muestra import LIMITE_BYTES, ImagenInvalida
+from recursos import obtener_analizador_transecto, obtener_indice_similitud
+from textos import TEXT_CONTENT
+from transecto import MAX_GRUPOS, MAX_MUESTRAS, analizar_transecto, hojas_transecto
+
+# ================================
+# CONFIG INICIAL
+# ================================
+st.set_page_config(page_title="Transecto", page_icon="🧭", layout="wide")
+
+lang = st.sidebar.radio("🌍 Idioma / Language", ["es", "pt"], index=0)
+t = TEXT_CONTENT[lang]
+
+st.title(t["tr_title"])
+st.caption(t["tr_intro"].format(max=MAX_MUESTRAS))
+
+
+# ================================
+# FUNCIONES
+# ================================
+def enviar_fotos(archivos) -> list:
+    """Encola el análisis de cada foto y devuelve [(nombre, sha256 o None)] en orden.
+
+    Cada archivo se lee y se hashea una sola vez por sesión; si su resultado ya
+    se descartó del analizador, se vuelve a encolar.
+    """
+    analizador = obtener_analizador_transecto()
+    conocidos = st.session_state.setdefault("tr_shas", {})
+    fotos = []
+    for archivo in archivos:
+        if archivo.size > LIMITE_BYTES:
+            fotos.append((archivo.name, None))
+            continue
+        sha = conocidos.get(archivo.file_id)
+        if sha is None or sha not in analizador:
+            sha = conocidos[archivo.file_id] = analizador.enviar(archivo.getvalue(), sha)
+        fotos.append((archivo.name, sha))
+    return fotos
+
+
+@st.fragment(run_every=0.5)
+def esperar_fotos(shas: list, lang_code: str):
+    # Mientras se analizan las fotos solo este bloque se repite; al terminar
+    # se vuelve a ejecutar la página para mostrar los grupos.
+    analizador = obtener_analizador_transecto()
+    listos = sum(analizador.listo(sha) for sha in shas)
+    if listos == len(shas):
+        st.rerun()
+    st.progress(listos / len(shas), text=f"{TEXT_CONTENT[lang_code]['tr_progress']}: {listos}/{len(shas)}")
+
+
+def _excel(nombres, muestras, resultado, lang_code) -> bytes:
+    buf = io.BytesIO()
+    exportar_historial_xlsx(hojas_transecto(nombres, muestras, resultado, lang_code), buf)
+    return buf.getvalue()
+
+
+@st.fragment
+def mostrar_transecto(nombres: list, muestras: list, lang_code: str):
+    # Fragmento: cambiar la cantidad de grupos no vuelve a leer las fotos.
+    t = TEXT_CONTENT[lang_code]
+    tope = min(MAX_GRUPOS, len(muestras) - 1)
+    grupos = st.select_slider(
+        t["tr_groups"], options=[None, *range(1, tope + 1)], key="tr_grupos",
+        format_func=lambda k: t["tr_auto"] if k is None else str(k),
+    )
+    resultado = analizar_transecto(muestras, obtener_indice_similitud(), lang_code, grupos)
+    d, etiquetas = resultado["distancias"], resultado["etiquetas"]
+    k = len(resultado["grupos"])
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric(t["tr_samples"], len(muestras))
+    col2.metric(t["tr_n_groups"], k)
+    col3.metric(t["tr_silhouette"], f"{resultado['siluetas'][k]:.2f}" if k in resultado["siluetas"] else "—")
+
+    # Saltos grandes entre fotos vecinas marcan cambios de suelo a lo largo del transecto.
+    st.markdown(f"**{t['tr_profile']}**")
+    st.line_chart(pd.Series(np.diag(d, 1), index=range(2, len(muestras) + 1), name=t["tr_profile"]))
+
+    for g, grupo in enumerate(resultado["grupos"]):
+        miembros, rep = grupo["miembros"], grupo["representativa"]
+        with st.container(border=True):
+            st.markdown(f"#### {t['tr_group']} {g + 1} · {len(miembros)} {t['tr_samples'].lower()}")
+            st.image(
+                [muestras[i]["resumen"] for i in miembros],
+                caption=[f"{i + 1}. {nombres[i]}" for i in miembros], width=110,
+            )
+            munsell = (muestras[rep].get("munsell") or {}).get("munsell", "")
+            st.caption(f"{t['tr_representative']}: **{rep + 1}. {nombres[rep]}** · Munsell {munsell}")
+            resumen, piezas, recs = grupo["reporte"]
+            for col, titulo, lineas in zip(
+                st.columns(3),
+                (t["summary_title"], t["interpret_block_title"], t["recs_title"]),
+                (resumen, [p for p in piezas if p], recs),
+            ):
+                with col:
+                    st.markdown(f"**{titulo}**")
+                    for linea in lineas:
+                        st.write(f"- {linea}")
+
+    with st.expander(t["tr_distances"]):
+        orden = np.argsort(etiquetas, kind="stable")
+        rotulos = [f"{i + 1}. {nombres[i]}" for i in orden]
+        st.dataframe(pd.DataFrame(d[np.ix_(orden, orden)].round(2), index=rotulos, columns=rotulos))
+
+    st.download_button(
+        t["tr_excel_button"],
+        data=partial(_excel, nombres, muestras, resultado, lang_code),
+        file_name=f"transecto_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+        mime=MIME_XLSX,
+        on_click="ignore",
+    )
+
+
+# ================================
+# APP
+# ================================
+archivos = st.file_uploader(
+    t["tr_upload"], type=["jpg", "jpeg", "png"], accept_multiple_files=True, key="tr_archivos",
+)
+if not archivos:
+    st.stop()
+if len(archivos) > MAX_MUESTRAS:
+    st.warning(t["tr_too_many"].format(max=MAX_MUESTRAS))
+    archivos = archivos[:MAX_MUESTRAS]
+
+fotos = enviar_fotos(archivos)
+analizador = obtener_analizador_transecto()
+pendientes = [sha for _, sha in fotos if sha and not analizador.listo(sha)]
+if pendientes:
+    esperar_fotos([sha for _, sha in fotos if sha], lang)
+    st.stop()
+
+nombres, muestras, invalidas = [], [], []
+for nombre, sha in fotos:
+    try:
+        if sha is None:
+            raise ImagenInvalida("tamano")
+        muestras.append(analizador.resultado(sha))
+        nombres.append(nombre)
+    except ImagenInvalida:
+        invalidas.append(nombre)
+if invalidas:
+    st.warning(f"{t['tr_invalid']}: {', '.join(invalidas)}")
+if len(muestras) < 2:
+    st.info(t["tr_need_two"])
+    st.stop()
+
+mostrar_transecto(nombres, muestras, lang)
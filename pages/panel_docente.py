@@ -0,0 +1,145 @@
+import streamlit as st
+import pandas as pd
+from datetime import date, timedelta
+from functools import partial
+
+from almacen import ATRIBUTOS_AGREGADOS
+from historial_columnar import agregar_nuevas, cargar_historial, unir_partes
+from opciones import ATRIBUTOS, etiqueta
+from recursos import acceso_docente, obtener_almacen
+from reglas import TABLA, frecuencia_reglas
+from textos import TEXT_CONTENT
+
+# ================================
+# CONFIG INICIAL
+# ================================
+st.set_page_config(page_title="Panel docente", page_icon="📊", layout="wide")
+
+lang = st.sidebar.radio("🌍 Idioma / Language", ["es", "pt"], index=0)
+t = TEXT_CONTENT[lang]
+NOMBRES = {
+    "color": t["color_label"], "textura": t["texture_label"], "estructura": t["aggregation_label"],
+    "humedad": t["moisture_label"], "raices": t["roots_label"],
+}
+
+
+def _texto(atributo):
+    # Los valores se guardan como IDs (opciones.py); se muestran en el idioma del panel.
+    return partial(etiqueta, atributo, lang_code=lang)
+
+
+st.title(t["dash_title"])
+# Muestra las respuestas de todos los estudiantes: solo con ?admin=<SUELOS_ADMIN_TOKEN>.
+if not acceso_docente():
+    st.warning(t["dash_restricted"])
+    st.stop()
+st.caption(t["dash_intro"])
+
+almacen = obtener_almacen()
+primer_dia, ultimo_dia = almacen.rango_dias()
+if primer_dia is None:
+    st.info(t["dash_empty"])
+    st.stop()
+
+# ================================
+# FILTROS
+# ================================
+col1, col2 = st.columns([1, 2])
+with col1:
+    idioma = st.selectbox(t["dash_language"], [None, "es", "pt"], format_func=lambda x: x or t["dash_all"])
+with col2:
+    rango = st.date_input(
+        t["dash_dates"],
+        value=(date.fromisoformat(primer_dia), date.fromisoformat(ultimo_dia)),
+    )
+# Mientras se elige el rango, date_input devuelve solo la primera fecha.
+desde, hasta = (rango[0], rango[-1]) if isinstance(rango, (tuple, list)) and rango else (None, None)
+filtro = {"desde": desde, "hasta": hasta, "idioma": idioma}
+
+total = sum(n for _, n in almacen.conteos("color", **filtro))
+st.metric(t["dash_total"], total)
+
+# ================================
+# DISTRIBUCIONES (conteos incrementales)
+# ================================
+st.subheader(t["dash_distributions"])
+for col, atributo in zip(st.columns(3), ("color", "textura", "estructura")):
+    with col:
+        st.markdown(f"**{NOMBRES[atributo]}**")
+        conteos = almacen.conteos(atributo, **filtro)
+        st.bar_chart(pd.Series({etiqueta(atributo, v, lang): n for v, n in conteos}, name="n"), horizontal=True)
+
+# ================================
+# CO-OCURRENCIAS
+# ================================
+st.subheader(t["dash_cooc"])
+col1, col2 = st.columns(2)
+with col1:
+    atr_a = st.selectbox("A", ATRIBUTOS_AGREGADOS, index=1, format_func=NOMBRES.get)
+with col2:
+    atr_b = st.selectbox("B", [a for a in ATRIBUTOS_AGREGADOS if a != atr_a], index=2, format_func=NOMBRES.get)
+pares = almacen.coocurrencia(atr_a, atr_b, **filtro)
+if pares:
+    pares = pd.DataFrame(pares, columns=[atr_a, atr_b, "n"])
+    pares[atr_a], pares[atr_b] = pares[atr_a].map(_texto(atr_a)), pares[atr_b].map(_texto(atr_b))
+    matriz = pares.pivot_table(
+        index=atr_a, columns=atr_b, values="n", aggfunc="sum", fill_value=0
+    )
+    st.dataframe(matriz.rename_axis(index=NOMBRES[atr_a], columns=NOMBRES[atr_b]), width="stretch")
+
+# ================================
+# TENDENCIAS
+# ================================
+st.subheader(t["dash_trends"])
+col1, col2 = st.columns([2, 1])
+with col1:
+    atr_serie = st.selectbox(t["dash_trends"], ATRIBUTOS_AGREGADOS, format_func=NOMBRES.get, label_visibility="collapsed")
+with col2:
+    periodo = st.radio(t["dash_group_by"], list(t["dash_periods"]), index=1, format_func=t["dash_periods"].get, horizontal=True)
+serie = almacen.serie(atr_serie, **filtro)
+if serie:
+    tabla = pd.DataFrame(serie, columns=["dia", "valor", "n"])
+    tabla["dia"] = pd.to_datetime(tabla["dia"], errors="coerce")
+    tabla["valor"] = tabla["valor"].map(_texto(atr_serie))
+    tabla = tabla.pivot_table(index="dia", columns="valor", values="n", aggfunc="sum", fill_value=0)
+    st.line_chart(tabla.resample(periodo).sum())
+
+# ================================
+# DETALLE (copia columnar del historial)
+# ================================
+@st.cache_resource(show_spinner=False)
+def _historial():
+    # Compartido entre sesiones; cada guardado nuevo se le agrega como una parte más.
+    return {"partes": [cargar_historial(obtener_almacen())]}
+
+
+def _filtrar(parte):
+    if desde and hasta:
+        parte = parte[(parte["fecha"] >= pd.Timestamp(desde)) & (parte["fecha"] < pd.Timestamp(hasta + timedelta(days=1)))]
+    if idioma:
+        parte = parte[parte["idioma"] == idioma]
+    return parte
+
+
+historial = _historial()
+historial["partes"] = partes = agregar_nuevas(almacen, historial["partes"])
+seleccion = unir_partes([_filtrar(p) for p in partes])
+
+col1, col2 = st.columns(2)
+with col1:
+    st.markdown(f"**{t['dash_munsell']}**")
+    # value_counts de una categórica lista también las categorías sin filas en la selección.
+    munsell = seleccion["munsell"].value_counts()
+    st.bar_chart(munsell[munsell > 0].head(15), horizontal=True)
+with col2:
+    # Las mismas reglas compiladas que el reporte, sobre todas las filas a la vez.
+    st.markdown(f"**{t['dash_recs']}**")
+    titulos = {r["id"]: r["titulo"][lang] for r in TABLA["reglas"]}
+    frecuencia = frecuencia_reglas(seleccion)
+    st.bar_chart(pd.Series({titulos[r]: n for r, n in frecuencia.items()}, name="n", dtype="int64"), horizontal=True)
+
+st.markdown(f"**{t['dash_recent']}**")
+recientes = seleccion.sort_values("id", ascending=False).head(200).drop(columns=["id"])
+for atributo in ATRIBUTOS:
+    recientes[atributo] = recientes[atributo].map(_texto(atributo), na_action="ignore")
+st.dataframe(recientes, hide_index=True, width="stretch")
@@ -0,0 +1,255 @@
+"""Paquete de miniaturas (referencias + logo) listo para servir.
+
+Paso offline:
+    python paquete_miniaturas.py
+
+Genera, para cada imagen de `referencias/` y para `logo.png`, una miniatura JPEG
+del tamaño en que se muestra (st.image la entrega sin recodificar) y las concatena
+en un único archivo `miniaturas/paquete.bin` con un índice `miniaturas/indice.json`.
+Cada entrada guarda el sha256 de la imagen original: al volver a ejecutar el paso
+solo se recodifican las imágenes cuyo hash cambió, y si nada cambió no se reescribe.
+
+En tiempo de ejecución `cargar_paquete` abre el binario con mmap y
+`miniatura` devuelve los bytes ya codificados, sin decodificar la imagen.
+
+La miniatura del logo se copia además a `static/logo.jpg`: con
+server.enableStaticServing la sirve Streamlit como archivo estático, que el
+navegador cachea entre sesiones.
+"""
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import os
+import sys
+
+from catalogo import EXTENSIONES_IMAGEN
+from rutas import RAIZ
+
+# Las claves del índice son relativas a RAIZ ("referencias/color/x.jpg", "logo.png").
+DIR_PAQUETE = os.path.join(RAIZ, "miniaturas")
+ARCHIVO_PAQUETE = "paquete.bin"
+ARCHIVO_INDICE = "indice.json"
+VERSION_INDICE = 2   # 2: solo JPEG (la 1 guardaba además un WebP que nadie servía)
+LOGO_ESTATICO = os.path.join(RAIZ, "static", "logo.jpg")
+
+# Ancho máximo (px) de cada grupo. Las referencias se muestran con width=320:
+# st.image reescala todo lo que supere ese ancho, así que la miniatura JPEG
+# debe tener exactamente ese tamaño para pasar sin recodificarse.
+ANCHOS = {"referencias": 320, "logo": 600}
+CALIDAD_JPEG = 82
+# Fondo usado al aplanar imágenes con transparencia para el JPEG (fondo del sidebar).
+FONDO_JPEG = (240, 242, 246)
+
+
+# ================================
+# UTILIDADES
+# ================================
+def sha256_archivo(ruta: str) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 16), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def fuentes_por_defecto(base_referencias: str = os.path.join(RAIZ, "referencias"),
+                        logo: str = os.path.join(RAIZ, "logo.png")) -> dict:
+    """{ruta_fuente: grupo} para todas las imágenes a empaquetar."""
+    fuentes = {}
+    for raiz, _dirs, archivos in os.walk(base_referencias):
+        for nombre in archivos:
+            if nombre.lower().endswith(EXTENSIONES_IMAGEN):
+                fuentes[os.path.join(raiz, nombre)] = "referencias"
+    if os.path.exists(logo):
+        fuentes[logo] = "logo"
+    return dict(sorted(fuentes.items()))
+
+
+def _codificar(ruta: str, ancho_max: int) -> dict:
+    from PIL import Image, ImageOps
+
+    with Image.open(ruta) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode == "P":
+            img = img.convert("RGBA")
+        if img.width > ancho_max:
+            alto = max(1, round(img.height * ancho_max / img.width))
+            img = img.resize((ancho_max, alto), Image.LANCZOS)
+        if img.mode in ("RGBA", "LA"):
+            plano = Image.new("RGB", img.size, FONDO_JPEG)
+            plano.paste(img, mask=img.getchannel("A"))
+        else:
+            plano = img.convert("RGB")
+        jpeg = io.BytesIO()
+        plano.save(jpeg, format="JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+
+    return {"ancho": img.width, "alto": img.height, "jpeg": jpeg.getvalue()}
+
+
+def _leer_indice(dir_paquete: str):
+    """Índice del paquete, o None si falta, es de otra versión o no tiene su binario."""
+    ruta = os.path.join(dir_paquete, ARCHIVO_INDICE)
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            indice = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if indice.get("version") != VERSION_INDICE:
+        return None
+    # Un índice sin paquete.bin (borrado o copia a medias) vale como "sin paquete previo".
+    if not os.path.exists(os.path.join(dir_paquete, ARCHIVO_PAQUETE)):
+        return None
+    return indice
+
+
+# ================================
+# CONSTRUCCIÓN (offline)
+# ================================
+def construir_paquete(fuentes: dict, dir_paquete: str = DIR_PAQUETE) -> bool:
+    """Construye o actualiza el paquete. Devuelve True si se reescribió."""
+    anterior = _leer_indice(dir_paquete)
+    blobs_previos = {}
+    if anterior:
+        with open(os.path.join(dir_paquete, ARCHIVO_PAQUETE), "rb") as f:
+            datos_previos = f.read()
+        for sha, ent in anterior["blobs"].items():
+            if ent["parametros"] == _parametros(ent["grupo"]):
+                inicio, largo = ent["jpeg"]
+                blobs_previos[sha] = (ent, datos_previos[inicio:inicio + largo])
+
+    archivos, blobs, recodificados = {}, {}, 0
+    for ruta, grupo in fuentes.items():
+        sha = sha256_archivo(ruta)
+        st_fuente = os.stat(ruta)
+        archivos[_normalizar(ruta)] = {"sha256": sha, "tamano": st_fuente.st_size, "mtime_ns": st_fuente.st_mtime_ns}
+        if sha in blobs:
+            continue
+        if sha in blobs_previos and blobs_previos[sha][0]["grupo"] == grupo:
+            blobs[sha] = blobs_previos[sha]
+        else:
+            cod = _codificar(ruta, ANCHOS[grupo])
+            meta = {"grupo": grupo, "parametros": _parametros(grupo), "ancho": cod["ancho"], "alto": cod["alto"]}
+            blobs[sha] = (meta, cod["jpeg"])
+            recodificados += 1
+
+    mismos_hashes = anterior is not None and {
+        r: a["sha256"] for r, a in anterior["archivos"].items()
+    } == {r: a["sha256"] for r, a in archivos.items()}
+    if mismos_hashes and recodificados == 0:
+        return False
+
+    os.makedirs(dir_paquete, exist_ok=True)
+    indice = {"version": VERSION_INDICE, "archivos": archivos, "blobs": {}}
+    ruta_bin = os.path.join(dir_paquete, ARCHIVO_PAQUETE)
+    ruta_idx = os.path.join(dir_paquete, ARCHIVO_INDICE)
+    with open(ruta_bin + ".tmp", "wb") as f:
+        desplazamiento = 0
+        for sha, (meta, jpeg) in sorted(blobs.items()):
+            entrada = {k: meta[k] for k in ("grupo", "parametros", "ancho", "alto")}
+            f.write(jpeg)
+            entrada["jpeg"] = [desplazamiento, len(jpeg)]
+            desplazamiento += len(jpeg)
+            indice["blobs"][sha] = entrada
+    with open(ruta_idx + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False, indent=1)
+    # Reemplazo atómico: un proceso que ya tiene el binario mapeado sigue leyendo el anterior.
+    os.replace(ruta_bin + ".tmp", ruta_bin)
+    os.replace(ruta_idx + ".tmp", ruta_idx)
+    return True
+
+
+def _parametros(grupo: str) -> list:
+    return [ANCHOS[grupo], CALIDAD_JPEG]
+
+
+def _normalizar(ruta: str) -> str:
+    if os.path.isabs(ruta):
+        ruta = os.path.relpath(ruta, RAIZ)
+    return os.path.normpath(ruta).replace(os.sep, "/")
+
+
+# ================================
+# CARGA (en tiempo de ejecución)
+# ================================
+def cargar_paquete(dir_paquete: str = DIR_PAQUETE):
+    """Abre el paquete con mmap. Devuelve None si no existe.
+
+    Las entradas cuya imagen original cambió después de construir el paquete
+    se descartan (se compara tamaño/mtime y, si difieren, el sha256), de modo
+    que esas imágenes se sirven desde el original hasta reconstruir.
+    """
+    indice = _leer_indice(dir_paquete)
+    if indice is None:
+        return None
+    with open(os.path.join(dir_paquete, ARCHIVO_PAQUETE), "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    vigentes = {}
+    for ruta, arch in indice["archivos"].items():
+        try:
+            st_fuente = os.stat(os.path.join(RAIZ, ruta))
+        except FileNotFoundError:
+            continue
+        if (st_fuente.st_size, st_fuente.st_mtime_ns) != (arch["tamano"], arch["mtime_ns"]):
+            if st_fuente.st_size != arch["tamano"] or sha256_archivo(os.path.join(RAIZ, ruta)) != arch["sha256"]:
+                continue
+        vigentes[ruta] = indice["blobs"][arch["sha256"]]
+    return {"mm": mm, "entradas": vigentes}
+
+
+def miniatura(paquete, ruta: str):
+    """Bytes JPEG de la miniatura de `ruta`, o None."""
+    if paquete is None:
+        return None
+    entrada = paquete["entradas"].get(_normalizar(ruta))
+    if entrada is None:
+        return None
+    inicio, largo = entrada["jpeg"]
+    return paquete["mm"][inicio:inicio + largo]
+
+
+def exportar_logo(paquete, ruta_logo: str, destino: str = LOGO_ESTATICO) -> bool:
+    """Escribe la miniatura JPEG del logo en `destino`. Devuelve True si cambió."""
+    datos = miniatura(paquete, ruta_logo)
+    if datos is None:
+        return False
+    try:
+        with open(destino, "rb") as f:
+            if f.read() == datos:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    with open(destino + ".tmp", "wb") as f:
+        f.write(datos)
+    os.replace(destino + ".tmp", destino)
+    return True
+
+
+# ================================
+# CLI
+# ================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Genera el paquete de miniaturas de referencias y logo.")
+    parser.add_argument("--referencias", default=os.path.join(RAIZ, "referencias"))
+    parser.add_argument("--logo", default=os.path.join(RAIZ, "logo.png"))
+    parser.add_argument("--salida", default=DIR_PAQUETE)
+    args = parser.parse_args(argv)
+
+    fuentes = fuentes_por_defecto(args.referencias, args.logo)
+    if construir_paquete(fuentes, args.salida):
+        tam = os.path.getsize(os.path.join(args.salida, ARCHIVO_PAQUETE))
+        print(f"Paquete actualizado: {len(fuentes)} imágenes, {tam / 1024:.0f} KB → {args.salida}/")
+    else:
+        print("Paquete al día: ninguna imagen cambió.")
+    if exportar_logo(cargar_paquete(args.salida), args.logo):
+        print(f"Logo → {os.path.relpath(LOGO_ESTATICO)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Estimación de raíces y humedad a partir de la foto del suelo.
+
+Raíces: las raíces finas se ven como estructuras delgadas y más claras que la
+matriz del suelo. La imagen se reduce a LADO_RAICES px y se recorre en teselas
+(con un margen que evita cortes en los bordes): en cada una se calcula la
+respuesta de cresta de la matriz Hessiana a dos escalas (el autovalor negativo
+grande de una línea clara, penalizado si el otro también es grande, como en una
+mancha). Las crestas que superan el umbral se unen en componentes y se
+conservan las alargadas y finas (ancho y largo desde la transformada de
+distancia); su largo total relativo a la diagonal de la imagen decide entre
+ausentes, escasas y abundantes. La memoria de trabajo es la de una tesela, no
+la de la foto.
+
+Humedad: un suelo húmedo se ve más oscuro (L* menor) y más saturado que el
+mismo suelo seco, y a veces con brillos. El índice combina la mediana de L*, la
+saturación de los píxeles de suelo y los reflejos blancos (a 1024 px); pesos y
+umbrales se calibraron con las muestras rotuladas de
+bench/exactitud_raices_humedad.py (`--calibrar`). Es un indicio: sin una
+referencia seca del mismo suelo, un suelo oscuro seco puede pasar por húmedo.
+
+Ambas estimaciones devuelven la clase (ID de opciones.py) y una confianza 0-1.
+"""
+import numpy as np
+
+from color_munsell import mascara_suelo
+
+# ---------- raíces ----------
+LADO_RAICES = 1024
+LADO_TESELA = 256
+SIGMAS_RAICES = (1.0, 2.0)          # px a LADO_RAICES: raíces de ~2 a ~6 px de ancho
+CONTRASTE_MINIMO = 4.0              # respuesta de cresta mínima (unidades de L*)
+FACTOR_RUIDO = 3.0                  # ... y al menos este múltiplo de la respuesta típica de la textura
+LARGO_MINIMO = 12                   # px: componentes más cortos son granos o poros
+ANCHO_MAXIMO = 6.0                  # px: más ancho es una mancha o un terrón, no una raíz
+UMBRALES_RAICES = (0.41, 1.6)       # largo total / diagonal: ausentes < 0.41 ≤ escasas < 1.6 ≤ abundantes
+
+# ---------- humedad ----------
+LADO_HUMEDAD = 256
+LADO_BRILLOS = 1024                 # los brillos son puntos de pocos px: se buscan a más resolución
+BRILLO_MINIMO = 235                 # los tres canales RGB por encima: reflejo blanco de la película de agua
+PESO_SATURACION = 10.0              # puntos de índice por unidad de saturación HSV
+PESO_BRILLO = 6.0                   # puntos de índice por píxel de brillo cada 10 000
+UMBRALES_HUMEDAD = (-46.8, -36.0)   # índice: baja < -46.8 ≤ media < -36 ≤ alta
+
+# Margen (en escala logarítmica o de índice) a partir del cual la confianza es 1.
+_MARGEN_RAICES = np.log(3.0)
+_MARGEN_HUMEDAD = 12.0
+
+
+def _reducir(rgb: np.ndarray, lado: int) -> np.ndarray:
+    import cv2
+
+    alto, ancho = rgb.shape[:2]
+    escala = lado / max(alto, ancho)
+    if escala < 1:
+        rgb = cv2.resize(rgb, (max(1, int(ancho * escala)), max(1, int(alto * escala))), interpolation=cv2.INTER_AREA)
+    return np.ascontiguousarray(rgb[..., :3])
+
+
+def _clase(valor: float, umbrales, clases, margen: float) -> tuple:
+    """(clase, confianza): confianza 0.5 sobre un umbral y 1 a `margen` o más de él."""
+    i = int(np.searchsorted(umbrales, valor, side="right"))
+    distancia = min(abs(valor - u) for u in umbrales)
+    return clases[i], round(0.5 + 0.5 * min(1.0, distancia / margen), 3)
+
+
+# ================================
+# RAÍCES
+# ================================
+def _crestas(gris: np.ndarray) -> np.ndarray:
+    """Respuesta de cresta clara (float32, ≥ 0) de una tesela, máximo entre escalas."""
+    import cv2
+
+    respuesta = np.zeros(gris.shape, np.float32)
+    for sigma in SIGMAS_RAICES:
+        suave = cv2.GaussianBlur(gris, (0, 0), sigma)
+        dxx = cv2.Sobel(suave, cv2.CV_32F, 2, 0, ksize=3)
+        dyy = cv2.Sobel(suave, cv2.CV_32F, 0, 2, ksize=3)
+        dxy = cv2.Sobel(suave, cv2.CV_32F, 1, 1, ksize=3)
+        raiz = np.sqrt((dxx - dyy) ** 2 + 4.0 * dxy ** 2)
+        mayor = 0.5 * (dxx + dyy - raiz)          # el más negativo: curvatura a través de la línea
+        menor = 0.5 * (dxx + dyy + raiz)          # a lo largo de la línea (≈ 0 en una cresta)
+        # Normalizada por escala (σ²); se descuenta |menor| para no premiar manchas redondas.
+        cresta = sigma ** 2 * (np.maximum(-mayor, 0.0) - np.abs(menor))
+        np.maximum(respuesta, cresta, out=respuesta)
+    return respuesta
+
+
+def mascara_raices(rgb: np.ndarray) -> np.ndarray:
+    """Máscara bool (a LADO_RAICES px) de las crestas claras, calculada por teselas."""
+    import cv2
+
+    rgb = _reducir(rgb, LADO_RAICES)
+    # L* (0-100) como intensidad: el contraste queda en las mismas unidades que CONTRASTE_MINIMO.
+    gris = cv2.cvtColor(rgb, cv2.COLOR_RGB2Lab)[..., 0].astype(np.float32) * (100.0 / 255.0)
+    alto, ancho = gris.shape
+    margen = int(3 * max(SIGMAS_RAICES)) + 2
+    respuesta = np.zeros((alto, ancho), np.float16)
+    for y in range(0, alto, LADO_TESELA):
+        for x in range(0, ancho, LADO_TESELA):
+            y0, x0 = max(0, y - margen), max(0, x - margen)
+            y1, x1 = min(alto, y + LADO_TESELA + margen), min(ancho, x + LADO_TESELA + margen)
+            tesela = _crestas(gris[y0:y1, x0:x1])
+            h, w = min(LADO_TESELA, alto - y), min(LADO_TESELA, ancho - x)
+            respuesta[y:y + h, x:x + w] = tesela[y - y0:y - y0 + h, x - x0:x - x0 + w]
+
+    positivas = respuesta[respuesta > 0]
+    ruido = float(np.median(positivas)) if positivas.size else 0.0
+    return respuesta > max(CONTRASTE_MINIMO, FACTOR_RUIDO * ruido)
+
+
+def estimar_raices(rgb: np.ndarray) -> dict:
+    """Clase de raíces ("ausentes", "escasas", "abundantes") de una imagen RGB uint8.
+
+    Devuelve "clase", "confianza" (0.5-1), "indice" (largo total de raíces /
+    diagonal de la imagen) y "segmentos" (cantidad de trazos detectados).
+    """
+    import cv2
+
+    mascara = mascara_raices(rgb).astype(np.uint8)
+    n, etiquetas, stats, _ = cv2.connectedComponentsWithStats(mascara, connectivity=8)
+    area = stats[1:, cv2.CC_STAT_AREA].astype(np.float64)
+    # En un trazo de ancho w la distancia media al borde es ≈ w/4: así se mide el
+    # ancho y el largo (área / ancho) también de redes ramificadas, sin esqueletizar.
+    distancia = cv2.distanceTransform(mascara, cv2.DIST_L2, 3)
+    suma = np.bincount(etiquetas.ravel(), weights=distancia.ravel(), minlength=n)[1:]
+    ancho = np.maximum(4.0 * suma / np.maximum(area, 1.0), 1.0)
+    largo = area / ancho
+    raices = (largo >= LARGO_MINIMO) & (ancho <= ANCHO_MAXIMO)
+    indice = float(largo[raices].sum() / np.hypot(*mascara.shape))
+    clase, confianza = _clase(
+        np.log(max(indice, 1e-3)), np.log(UMBRALES_RAICES), ("ausentes", "escasas", "abundantes"), _MARGEN_RAICES
+    )
+    return {"clase": clase, "confianza": confianza, "indice": round(indice, 3), "segmentos": int(raices.sum())}
+
+
+# ================================
+# HUMEDAD
+# ================================
+def rasgos_humedad(rgb: np.ndarray) -> dict:
+    """Mediana de L* y de saturación HSV de los píxeles de suelo, y brillos cada 10 000 px."""
+    import cv2
+
+    rgb_original, rgb = rgb, _reducir(rgb, LADO_HUMEDAD)
+    lab = cv2.cvtColor(rgb.astype(np.float32) / 255.0, cv2.COLOR_RGB2Lab)
+    suelo = mascara_suelo(rgb, lab)
+    if suelo.sum() < 100:
+        suelo = np.ones(suelo.shape, bool)
+    saturacion = cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)[..., 1].astype(np.float32) / 255.0
+    brillo = _reducir(rgb_original, LADO_BRILLOS).min(axis=-1) >= BRILLO_MINIMO
+    return {
+        "l": float(np.median(lab[..., 0][suelo])),
+        "saturacion": float(np.median(saturacion[suelo])),
+        "brillo": float(brillo.mean() * 1e4),
+    }
+
+
+def indice_humedad(rasgos: dict) -> float:
+    """Más alto = más húmedo: -L* + saturación y brillos ponderados."""
+    return -rasgos["l"] + PESO_SATURACION * rasgos["saturacion"] + PESO_BRILLO * rasgos["brillo"]
+
+
+def estimar_humedad(rgb: np.ndarray) -> dict:
+    """Clase de humedad ("baja", "media", "alta") de una imagen RGB uint8.
+
+    Devuelve "clase", "confianza" (0.5-1), "indice" y los rasgos usados.
+    """
+    rasgos = rasgos_humedad(rgb)
+    indice = indice_humedad(rasgos)
+    clase, confianza = _clase(indice, UMBRALES_HUMEDAD, ("baja", "media", "alta"), _MARGEN_HUMEDAD)
+    return {"clase": clase, "confianza": confianza, "indice": round(indice, 2), **{k: round(v, 3) for k, v in rasgos.items()}}
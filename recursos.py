@@ -0,0 +1,249 @@
+"""Recursos de Streamlit compartidos por app4.py y las páginas de pages/.
+
+Una función con st.cache_resource definida acá devuelve el mismo objeto en la
+app y en las páginas (en app4.py quedaría atada al script principal).
+
+`precalentar` llena esas cachés antes de la primera sesión (lo llama
+servidor.py en el mismo proceso que el servidor de Streamlit).
+"""
+import base64
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+
+import streamlit as st
+
+from almacen import ARCHIVO_DB, AlmacenAnalisis
+from analisis import CARPETAS_REFERENCIA, REFERENCIAS_DIR, analizar_imagen, indice_de_catalogo
+from analisis_fondo import AnalisisEnFondo
+from catalogo import construir_catalogo, firma_directorios
+from paquete_miniaturas import ARCHIVO_INDICE, DIR_PAQUETE, LOGO_ESTATICO, cargar_paquete
+from rutas import RAIZ
+from textos import TEXT_CONTENT
+from transecto import MAX_MUESTRAS, analizar_muestra
+
+ARCHIVO_ESTILOS = os.path.join(RAIZ, "static", "estilos.css")   # Streamlit sirve static/ desde la carpeta de app4.py
+URL_ESTATICA = "app/static"   # server.enableStaticServing (.streamlit/config.toml)
+
+
+# ================================
+# ACCESO DOCENTE (?admin=<SUELOS_ADMIN_TOKEN>)
+# ================================
+def acceso_docente() -> bool:
+    """True si la URL trae el token de SUELOS_ADMIN_TOKEN; sin token configurado, nadie entra."""
+    token = os.environ.get("SUELOS_ADMIN_TOKEN")
+    # En bytes: con str, compare_digest falla (TypeError) si hay caracteres no ASCII (?admin=ñ).
+    return bool(token) and hmac.compare_digest(st.query_params.get("admin", "").encode(), token.encode())
+
+
+# ================================
+# ALMACÉN DE ANÁLISIS (SQLite, compartido entre sesiones)
+# ================================
+@st.cache_resource(show_spinner=False)
+def obtener_almacen():
+    almacen = AlmacenAnalisis(ARCHIVO_DB)
+    if almacen.contar() == 0:
+        # Primera ejecución: se importan una sola vez los CSV de versiones anteriores.
+        for lang_code in TEXT_CONTENT:
+            file_csv = os.path.join(os.path.dirname(os.path.abspath(ARCHIVO_DB)), TEXT_CONTENT[lang_code]["csv_file"])
+            if os.path.exists(file_csv):
+                logging.info("Importando %s: %d filas", file_csv, almacen.importar_csv(file_csv))
+    return almacen
+
+
+# ================================
+# CATÁLOGO DE REFERENCIAS (compartido entre sesiones)
+# ================================
+# La firma completa (un stat por carpeta de referencias) se recalcula como mucho
+# cada FIRMA_TTL_S segundos, no en cada llamada ni en cada rerun. La clave de
+# caché es un número de versión que cambia con la firma: hashear la tupla
+# completa en cada llamada a st.cache_resource costaba más que los stat.
+FIRMA_TTL_S = 5.0
+_firma = {"valor": None, "mtimes": {}, "version": 0, "instante": 0.0}
+_firma_lock = threading.Lock()
+
+
+def _version_referencias(forzar: bool = False) -> int:
+    ahora = time.monotonic()
+    with _firma_lock:
+        if forzar or _firma["valor"] is None or ahora - _firma["instante"] > FIRMA_TTL_S:
+            firma = firma_directorios(REFERENCIAS_DIR, CARPETAS_REFERENCIA)
+            if firma != _firma["valor"]:
+                _firma.update(valor=firma, mtimes=dict(firma), version=_firma["version"] + 1)
+            _firma["instante"] = ahora
+        return _firma["version"]
+
+
+def _vigente(clave: str, version: int, construir):
+    # El último objeto entregado por versión: evita el costo de la búsqueda en
+    # st.cache_resource (hashear argumentos) en cada llamada del rerun.
+    actual = _firma.get(clave)
+    if actual is None or actual[0] != version:
+        actual = _firma[clave] = (version, construir(version))
+    return actual[1]
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _catalogo_para(version):
+    # `version` solo actúa como clave: cuando cambia un mtime se reconstruye.
+    catalogo = construir_catalogo(REFERENCIAS_DIR, CARPETAS_REFERENCIA)
+    for categoria, carpeta in catalogo["faltantes"]:
+        logging.warning("Carpeta de referencia inexistente: %s", os.path.join(REFERENCIAS_DIR, categoria, carpeta))
+    for categoria, carpeta in catalogo["vacias"]:
+        logging.warning("Carpeta de referencia sin imágenes: %s", os.path.join(REFERENCIAS_DIR, categoria, carpeta))
+    return catalogo
+
+
+def obtener_catalogo(categoria: str = None, carpeta: str = None):
+    """Catálogo vigente. Con `categoria` y `carpeta` se hace stat solo de esa
+    carpeta: si cambió desde la última firma, se nota sin esperar el TTL."""
+    version = _version_referencias()
+    if categoria is not None:
+        ruta = os.path.join(REFERENCIAS_DIR, categoria, carpeta)
+        try:
+            mtime = os.stat(ruta).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if _firma["mtimes"].get(ruta) != mtime:
+            version = _version_referencias(forzar=True)
+    return _vigente("catalogo", version, _catalogo_para)
+
+
+# Índice de rasgos para ordenar referencias por similitud con la imagen subida.
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _indice_para(version):
+    indice = indice_de_catalogo(_catalogo_para(version))
+    if not indice["rutas"]:
+        logging.error("Índice de similitud vacío: no hay imágenes de referencia en %s", REFERENCIAS_DIR)
+    return indice
+
+
+def obtener_indice_similitud():
+    return _vigente("indice", _version_referencias(), _indice_para)
+
+
+# ================================
+# PAQUETE DE MINIATURAS (python paquete_miniaturas.py)
+# ================================
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _paquete_para(mtime_indice):
+    return cargar_paquete(DIR_PAQUETE)
+
+
+def _mtime_indice():
+    try:
+        return os.stat(os.path.join(DIR_PAQUETE, ARCHIVO_INDICE)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def obtener_paquete():
+    mtime = _mtime_indice()
+    return _paquete_para(mtime) if mtime is not None else None
+
+
+# ================================
+# ESTÁTICOS (static/)
+# ================================
+def _estaticos_servidos() -> bool:
+    # .streamlit/config.toml se lee desde el directorio de trabajo: lanzada desde otra
+    # carpeta, la app no sirve app/static/ aunque los archivos estén junto al código.
+    return bool(st.get_option("server.enableStaticServing"))
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_estilos() -> str:
+    """Bloque <style> de static/estilos.css, leído una vez por proceso.
+
+    Las url() del CSS son relativas a static/; en la página pasan a app/static/. Sin
+    archivos estáticos servidos se quitan y quedan las fuentes locales o del sistema.
+    """
+    with open(ARCHIVO_ESTILOS, encoding="utf-8") as f:
+        css = f.read()
+    if _estaticos_servidos():
+        css = css.replace("url('fonts/", f"url('{URL_ESTATICA}/fonts/")
+    else:
+        css = re.sub(r",\s*url\('fonts/[^)]*\) format\('woff2'\)", "", css)
+    return f"<style>\n{css}</style>"
+
+
+@st.cache_resource(show_spinner=False)
+def _logo_en_linea(mtime: float) -> str:
+    with open(LOGO_ESTATICO, "rb") as f:
+        return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode("ascii")
+
+
+def url_logo():
+    """URL del logo ya reducido, o None si todavía no se generó.
+
+    La estática de app/static/ si el servidor la sirve; si no, el mismo JPEG en línea
+    (data:), codificado una vez por versión del archivo.
+    """
+    try:
+        mtime = os.path.getmtime(LOGO_ESTATICO)
+    except OSError:
+        return None
+    if _estaticos_servidos():
+        return f"{URL_ESTATICA}/{os.path.basename(LOGO_ESTATICO)}"
+    return _logo_en_linea(mtime)
+
+
+# ================================
+# ANÁLISIS DE TRANSECTOS (pages/modo_transecto.py)
+# ================================
+@st.cache_resource(show_spinner=False)
+def obtener_analizador_transecto():
+    # Resultados livianos (sin arreglos de píxeles): caben varios transectos completos.
+    return AnalisisEnFondo(analizar_muestra, max_resultados=4 * MAX_MUESTRAS)
+
+
+# ================================
+# PRECALENTAMIENTO (antes de la primera sesión)
+# ================================
+def _modulos_diferidos():
+    # Módulos que se importan recién en la primera sesión: metricas (solo app4.py)
+    # y la tabla de emojis con que Streamlit valida el page_icon (~0,1 s).
+    import importlib
+
+    for modulo in ("metricas", "streamlit.emojis"):
+        try:
+            importlib.import_module(modulo)
+        except ImportError:
+            logging.info("Precalentamiento: no se pudo importar %s", modulo)
+
+
+def _analisis_de_prueba():
+    # Un análisis completo sobre una imagen chica: inicializa OpenCV y los
+    # caminos de NumPy que de otro modo pagaría la primera foto subida.
+    import cv2
+    import numpy as np
+
+    suelo = np.full((240, 320, 3), (70, 100, 140), np.uint8)
+    suelo += np.random.default_rng(0).integers(0, 20, suelo.shape, dtype=np.uint8)
+    analizar_imagen(cv2.imencode(".jpg", suelo)[1].tobytes())
+
+
+def precalentar() -> dict:
+    """Carga módulos diferidos, almacén, catálogo, índice de similitud, miniaturas, estilos y modelos.
+
+    Devuelve {paso: ms}. Sin runtime de Streamlit, st.cache_resource guarda en
+    la misma caché de proceso que después usan las sesiones.
+    """
+    pasos = {
+        "modulos": _modulos_diferidos,
+        "almacen": obtener_almacen,
+        "catalogo": obtener_catalogo,
+        "indice_similitud": obtener_indice_similitud,
+        "miniaturas": obtener_paquete,
+        "estilos": obtener_estilos,
+        "analisis": _analisis_de_prueba,
+    }
+    tiempos = {}
+    for nombre, paso in pasos.items():
+        inicio = time.perf_counter()
+        paso()
+        tiempos[nombre] = round((time.perf_counter() - inicio) * 1000.0, 1)
+    return tiempos
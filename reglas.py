@@ -0,0 +1,269 @@
+"""Recomendaciones de manejo según la combinación de atributos.
+
+Las reglas se declaran como datos (qué IDs de cada atributo las activan) y se
+compilan una vez en una tabla de decisión con una fila por combinación posible
+de (color, textura, estructura, humedad, raíces), incluido "sin dato" en cada
+atributo: 9 × 5 × 8 × 4 × 4 = 5760 filas. Evaluar un reporte es calcular un
+índice y leer una fila; reevaluar el historial completo es la misma lectura
+vectorizada sobre todas las filas.
+
+    python reglas.py --idioma es --excel recomendaciones.xlsx   # reevaluar el historial
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from opciones import ATRIBUTOS, OPCIONES
+
+# "si": IDs admitidos por atributo (atributo ausente = cualquiera).
+# "prioridad": orden de aparición (mayor primero).
+# "excluye": reglas que dejan de mostrarse cuando esta se activa (más específica).
+# "titulo": nombre corto para el panel docente; "texto": la recomendación.
+REGLAS = (
+    {
+        "id": "drenaje",
+        "si": {"color": {"gris"}, "humedad": {"alta"}, "estructura": {"masiva", "laminar", "prismatica-columnar"}},
+        "prioridad": 100,
+        "excluye": ("anegamiento",),
+        "titulo": {"es": "Drenaje", "pt": "Drenagem"},
+        "texto": {
+            "es": "Mejorar el drenaje (zanjas, camellones o subsolado) y no transitar con maquinaria sobre suelo húmedo: hay signos de saturación prolongada y poca porosidad.",
+            "pt": "Melhorar a drenagem (valas, camalhões ou subsolagem) e não transitar com máquinas sobre solo úmido: há sinais de saturação prolongada e pouca porosidade.",
+        },
+    },
+    {
+        "id": "anegamiento",
+        "si": {"color": {"gris", "negro"}, "humedad": {"alta"}},
+        "prioridad": 80,
+        "titulo": {"es": "Anegamiento", "pt": "Encharcamento"},
+        "texto": {
+            "es": "Vigilar el encharcamiento y el nivel freático; preferir cultivos tolerantes a la humedad en esta zona.",
+            "pt": "Monitorar o encharcamento e o nível freático; preferir culturas tolerantes à umidade nesta área.",
+        },
+    },
+    {
+        "id": "compactacion",
+        "si": {"estructura": {"masiva", "laminar"}, "raices": {"ausentes", "escasas"}},
+        "prioridad": 90,
+        "titulo": {"es": "Compactación", "pt": "Compactação"},
+        "texto": {
+            "es": "Descompactar (labranza vertical o subsolado) e incluir cultivos de cobertura con raíces profundas para recuperar la porosidad.",
+            "pt": "Descompactar (escarificação ou subsolagem) e incluir plantas de cobertura com raízes profundas para recuperar a porosidade.",
+        },
+    },
+    {
+        "id": "laboreo_humedo",
+        "si": {"textura": {"arcilloso"}, "humedad": {"alta"}},
+        "prioridad": 70,
+        "titulo": {"es": "Laboreo en húmedo", "pt": "Preparo úmido"},
+        "texto": {
+            "es": "No labrar con el suelo húmedo: en texturas arcillosas se compacta y forma terrones; esperar a que esté friable.",
+            "pt": "Não preparar o solo úmido: em texturas argilosas ele compacta e forma torrões; esperar o ponto de friabilidade.",
+        },
+    },
+    {
+        "id": "encostramiento",
+        "si": {"textura": {"limoso"}, "estructura": {"laminar", "masiva", "suelto"}},
+        "prioridad": 60,
+        "titulo": {"es": "Encostramiento", "pt": "Encrostamento"},
+        "texto": {
+            "es": "Mantener cobertura (rastrojos o mulch) para evitar el encostramiento superficial por impacto de la lluvia.",
+            "pt": "Manter cobertura (palhada ou mulch) para evitar o encrostamento superficial pelo impacto da chuva.",
+        },
+    },
+    {
+        "id": "riego_arenoso",
+        "si": {"textura": {"arenoso"}, "humedad": {"baja", "media"}},
+        "prioridad": 65,
+        "excluye": ("conservar_humedad",),
+        "titulo": {"es": "Riego en arenosos", "pt": "Irrigação em arenosos"},
+        "texto": {
+            "es": "Regar con frecuencia y en dosis pequeñas, y cubrir el suelo para reducir la evaporación: retiene poca agua.",
+            "pt": "Irrigar com frequência e em doses pequenas, e cobrir o solo para reduzir a evaporação: retém pouca água.",
+        },
+    },
+    {
+        "id": "fertilidad_baja",
+        "si": {"color": {"blanco", "amarillo"}, "textura": {"arenoso"}},
+        "prioridad": 55,
+        "titulo": {"es": "Materia orgánica", "pt": "Matéria orgânica"},
+        "texto": {
+            "es": "Aportar materia orgánica (compost, abonos verdes) y fraccionar la fertilización para reducir la lixiviación.",
+            "pt": "Adicionar matéria orgânica (composto, adubos verdes) e parcelar a adubação para reduzir a lixiviação.",
+        },
+    },
+    {
+        "id": "suelo_suelto",
+        "si": {"estructura": {"suelto"}},
+        "prioridad": 40,
+        "titulo": {"es": "Erosión", "pt": "Erosão"},
+        "texto": {
+            "es": "Proteger el suelo de la erosión (viento y agua) con cobertura permanente o barreras vivas.",
+            "pt": "Proteger o solo da erosão (vento e água) com cobertura permanente ou barreiras vivas.",
+        },
+    },
+    {
+        "id": "oxidico",
+        "si": {"color": {"rojo-intenso", "rojo-amarillento"}, "textura": {"arcilloso"}},
+        "prioridad": 50,
+        "titulo": {"es": "Fijación de fósforo", "pt": "Fixação de fósforo"},
+        "texto": {
+            "es": "Suelo oxídico: puede fijar fósforo; corregir la acidez según análisis de laboratorio y aplicar el fósforo localizado.",
+            "pt": "Solo oxídico: pode fixar fósforo; corrigir a acidez conforme análise de laboratório e aplicar o fósforo localizado.",
+        },
+    },
+    {
+        "id": "conservar_humedad",
+        "si": {"humedad": {"baja"}},
+        "prioridad": 45,
+        "titulo": {"es": "Conservar humedad", "pt": "Conservar umidade"},
+        "texto": {
+            "es": "Conservar la humedad: cobertura del suelo, menos laboreo y siembra en la época de lluvias.",
+            "pt": "Conservar a umidade: cobertura do solo, menos revolvimento e plantio na época das chuvas.",
+        },
+    },
+    {
+        "id": "sin_raices",
+        "si": {"raices": {"ausentes"}},
+        "prioridad": 30,
+        "titulo": {"es": "Análisis de laboratorio", "pt": "Análise de laboratório"},
+        "texto": {
+            "es": "Sin raíces visibles: hacer un análisis de laboratorio (pH, salinidad, nutrientes) para descartar limitaciones químicas.",
+            "pt": "Sem raízes visíveis: fazer análise de laboratório (pH, salinidade, nutrientes) para descartar limitações químicas.",
+        },
+    },
+    {
+        "id": "buenas_condiciones",
+        "si": {"estructura": {"granular", "migajosa"}, "raices": {"abundantes"}, "humedad": {"media"}},
+        "prioridad": 20,
+        "titulo": {"es": "Buenas condiciones", "pt": "Boas condições"},
+        "texto": {
+            "es": "Buenas condiciones físicas: mantenerlas con rotaciones, cobertura y mínimo laboreo.",
+            "pt": "Boas condições físicas: mantê-las com rotações, cobertura e mínimo revolvimento.",
+        },
+    },
+)
+# Se muestra cuando ninguna regla se activa.
+RECOMENDACION_GENERAL = {
+    "es": "Mantener buenas prácticas de conservación.",
+    "pt": "Manter boas práticas de conservação.",
+}
+
+
+# ================================
+# COMPILACIÓN
+# ================================
+def compilar(reglas=REGLAS) -> dict:
+    """Tabla de decisión: "activa" (combinaciones × reglas, bool), con las reglas
+    ordenadas por prioridad y las exclusiones ya resueltas."""
+    reglas = sorted(reglas, key=lambda r: -r["prioridad"])
+    dims = tuple(len(OPCIONES[a]) + 1 for a in ATRIBUTOS)   # la última posición es "sin dato"
+    combinaciones = np.indices(dims).reshape(len(dims), -1).T
+    posicion = {a: {id_opcion: i for i, id_opcion in enumerate(OPCIONES[a])} for a in ATRIBUTOS}
+
+    coincide = np.ones((len(combinaciones), len(reglas)), dtype=bool)
+    for j, regla in enumerate(reglas):
+        for k, atributo in enumerate(ATRIBUTOS):
+            admitidos = regla["si"].get(atributo)
+            if admitidos:
+                mascara = np.zeros(dims[k], dtype=bool)
+                mascara[[posicion[atributo][i] for i in admitidos]] = True
+                coincide[:, j] &= mascara[combinaciones[:, k]]
+
+    columna = {r["id"]: j for j, r in enumerate(reglas)}
+    activa = coincide.copy()
+    for j, regla in enumerate(reglas):
+        for excluida in regla.get("excluye", ()):
+            activa[coincide[:, j], columna[excluida]] = False
+    return {"activa": activa, "dims": dims, "reglas": reglas, "posicion": posicion}
+
+
+TABLA = compilar()
+
+
+# ================================
+# EVALUACIÓN
+# ================================
+def _codigos(tabla: dict, columnas: dict) -> np.ndarray:
+    """Índice de fila de la tabla para cada registro (`columnas`: atributo → IDs)."""
+    import pandas as pd
+
+    posiciones = []
+    for k, atributo in enumerate(ATRIBUTOS):
+        # -1 para valores fuera de OPCIONES (p. ej. textos heredados como "Normal"), sin avisos de pandas.
+        opciones, valores = pd.Index(OPCIONES[atributo]), columnas[atributo]
+        if isinstance(getattr(valores, "dtype", None), pd.CategoricalDtype):
+            # Columnas categóricas (historial_columnar): solo se buscan las categorías; el -1 final es para NaN.
+            pos = np.append(opciones.get_indexer(valores.cat.categories), -1)[np.asarray(valores.cat.codes)]
+        else:
+            pos = opciones.get_indexer(valores)
+        pos = pos.astype(np.int64)
+        pos[pos < 0] = tabla["dims"][k] - 1
+        posiciones.append(pos)
+    return np.ravel_multi_index(posiciones, tabla["dims"])
+
+
+def reglas_activas(selecciones: dict, tabla: dict = TABLA) -> list:
+    """Reglas (dicts de REGLAS) activas para un reporte, por prioridad."""
+    pos = tuple(
+        tabla["posicion"][a].get(selecciones.get(a), tabla["dims"][k] - 1) for k, a in enumerate(ATRIBUTOS)
+    )
+    fila = tabla["activa"][np.ravel_multi_index(pos, tabla["dims"])]
+    return [tabla["reglas"][j] for j in np.flatnonzero(fila)]
+
+
+def recomendaciones(selecciones: dict, lang_code: str, tabla: dict = TABLA) -> list:
+    """Textos de recomendación para {atributo: ID}, en el idioma."""
+    return [r["texto"][lang_code] for r in reglas_activas(selecciones, tabla)] or [RECOMENDACION_GENERAL[lang_code]]
+
+
+def evaluar_lote(columnas: dict, tabla: dict = TABLA) -> np.ndarray:
+    """Matriz bool (registros × reglas, en el orden de tabla["reglas"]) para muchos registros a la vez."""
+    return tabla["activa"][_codigos(tabla, columnas)]
+
+
+def frecuencia_reglas(columnas: dict, tabla: dict = TABLA) -> dict:
+    """{id de regla: cantidad de registros en que se activa}."""
+    if not len(columnas[ATRIBUTOS[0]]):
+        return {}
+    conteos = evaluar_lote(columnas, tabla).sum(axis=0)
+    return {r["id"]: int(n) for r, n in zip(tabla["reglas"], conteos) if n}
+
+
+# ================================
+# REEVALUACIÓN DEL HISTORIAL (CLI)
+# ================================
+def main(argv=None) -> int:
+    from almacen import ARCHIVO_DB, COLUMNAS, AlmacenAnalisis
+    from exportar import exportar_historial_xlsx
+
+    parser = argparse.ArgumentParser(description="Reevalúa las recomendaciones de todo el historial guardado.")
+    parser.add_argument("--db", default=ARCHIVO_DB)
+    parser.add_argument("--idioma", choices=sorted(RECOMENDACION_GENERAL), default="es")
+    parser.add_argument("--excel", help="libro con cada análisis y sus recomendaciones")
+    args = parser.parse_args(argv)
+
+    filas = list(AlmacenAnalisis(args.db).iterar())
+    pos = {c: i for i, c in enumerate(COLUMNAS)}
+    columnas = {a: [f[pos[a]] for f in filas] for a in ATRIBUTOS}
+    activa = evaluar_lote(columnas) if filas else np.zeros((0, len(TABLA["reglas"])), dtype=bool)
+    for regla, n in zip(TABLA["reglas"], activa.sum(axis=0)):
+        print(f"{regla['id']:<20} {int(n):>8}")
+    print(f"{'(general)':<20} {int((~activa.any(axis=1)).sum()):>8}")
+
+    if args.excel:
+        textos = [r["texto"][args.idioma] for r in TABLA["reglas"]]
+
+        def salida():
+            for fila, act in zip(filas, activa):
+                recs = [textos[j] for j in np.flatnonzero(act)] or [RECOMENDACION_GENERAL[args.idioma]]
+                yield [*fila, "\n".join(recs)]
+
+        n = exportar_historial_xlsx([("Recomendaciones", [*COLUMNAS, "recomendaciones"], salida())], args.excel)
+        print(f"{n} filas → {args.excel}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""Carpeta del código, base de las rutas del proyecto.
+
+referencias/, static/, miniaturas/ y la base de datos por defecto se ubican
+desde RAIZ y no desde el directorio de trabajo: app4.py, servidor.py y
+analisis_lote.py funcionan lanzados desde cualquier carpeta.
+"""
+import os
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
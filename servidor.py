@@ -0,0 +1,33 @@
+"""Arranque del servidor con precalentamiento.
+
+    python servidor.py                          # igual que `streamlit run app4.py`
+    python servidor.py --server.port 8502       # las opciones pasan a `streamlit run`
+
+Antes de aceptar conexiones carga, en el mismo proceso, lo que de otro modo pagaría
+la primera sesión: módulos, almacén, catálogo e índice de similitud de las
+referencias, miniaturas, estilos y un análisis de prueba (recursos.precalentar).
+Las sesiones encuentran todo en la caché de st.cache_resource.
+"""
+import os
+import sys
+import time
+
+
+def main() -> int:
+    inicio = time.perf_counter()
+    from recursos import precalentar
+
+    tiempos = precalentar()
+    total = (time.perf_counter() - inicio) * 1000.0
+    print(f"Precalentado en {total:.0f} ms: " + ", ".join(f"{k} {v:.0f} ms" for k, v in tiempos.items()), flush=True)
+
+    from streamlit.web import cli
+
+    from rutas import RAIZ
+
+    sys.argv = ["streamlit", "run", os.path.join(RAIZ, "app4.py"), *sys.argv[1:]]
+    return cli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
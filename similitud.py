@@ -0,0 +1,189 @@
+"""Búsqueda de referencias similares (textura y forma/estructura).
+
+Cada imagen se resume en un vector float32 compacto:
+  - histograma HSV (8×3×3 = 72 bins),
+  - histogramas LBP uniformes invariantes a rotación (radios 1 y 3, 10 bins c/u),
+  - energía media y desvío de filtros de Gabor (4 orientaciones × 2 escalas).
+
+Los vectores de todas las referencias forman una matriz que se calcula una sola
+vez. Para una consulta basta una resta y una norma sobre toda la matriz: con eso
+se ordenan las referencias y se sugiere la clase más probable por voto ponderado
+entre los vecinos más cercanos.
+"""
+import numpy as np
+
+LADO_MAX = 320
+BINS_HSV = (8, 3, 3)
+RADIOS_LBP = (1, 3)
+ORIENTACIONES_GABOR = 4
+LONGITUDES_GABOR = (6.0, 12.0)
+VECINOS_VOTO = 5
+
+# Bloques del vector (para ponderarlos por igual al normalizar).
+_DIM_HSV = int(np.prod(BINS_HSV))
+_DIM_LBP = 10 * len(RADIOS_LBP)
+_DIM_GABOR = 2 * ORIENTACIONES_GABOR * len(LONGITUDES_GABOR)
+BLOQUES = ((0, _DIM_HSV), (_DIM_HSV, _DIM_HSV + _DIM_LBP), (_DIM_HSV + _DIM_LBP, _DIM_HSV + _DIM_LBP + _DIM_GABOR))
+DIMENSION = BLOQUES[-1][1]
+
+
+# ================================
+# DESCRIPTORES
+# ================================
+def _reducir(rgb: np.ndarray, mascara: np.ndarray = None):
+    import cv2
+
+    alto, ancho = rgb.shape[:2]
+    escala = LADO_MAX / max(alto, ancho)
+    if escala < 1:
+        tam = (max(1, int(ancho * escala)), max(1, int(alto * escala)))
+        rgb = cv2.resize(rgb, tam, interpolation=cv2.INTER_AREA)
+        if mascara is not None:
+            mascara = cv2.resize(mascara.astype(np.uint8), tam, interpolation=cv2.INTER_NEAREST).astype(bool)
+    return np.ascontiguousarray(rgb), mascara
+
+
+def _tabla_riu2() -> np.ndarray:
+    # Código LBP (8 vecinos) → bin "uniforme invariante a rotación": 0-8 según
+    # cantidad de unos si hay ≤2 transiciones, 9 para los no uniformes.
+    codigos = np.arange(256)
+    bits = (codigos[:, None] >> np.arange(8)) & 1
+    transiciones = (bits != np.roll(bits, 1, axis=1)).sum(axis=1)
+    return np.where(transiciones <= 2, bits.sum(axis=1), 9).astype(np.intp)
+
+
+_RIU2 = _tabla_riu2()
+
+
+def _lbp_hist(gris: np.ndarray, radio: int, mascara) -> np.ndarray:
+    g = gris.astype(np.int16)
+    alto, ancho = g.shape
+    centro = g[radio:alto - radio, radio:ancho - radio]
+    codigo = np.zeros(centro.shape, dtype=np.uint8)
+    desplazamientos = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+    for bit, (dy, dx) in enumerate(desplazamientos):
+        vecino = g[radio + dy * radio:alto - radio + dy * radio, radio + dx * radio:ancho - radio + dx * radio]
+        codigo |= ((vecino >= centro).astype(np.uint8) << bit)
+    bins = _RIU2[codigo]
+    if mascara is not None:
+        bins = bins[mascara[radio:alto - radio, radio:ancho - radio]]
+    hist = np.bincount(bins.ravel(), minlength=10).astype(np.float32)
+    return hist / max(hist.sum(), 1.0)
+
+
+def _gabor(gris: np.ndarray, mascara) -> np.ndarray:
+    import cv2
+
+    g = gris.astype(np.float32) / 255.0
+    salida = []
+    for lambd in LONGITUDES_GABOR:
+        for k in range(ORIENTACIONES_GABOR):
+            nucleo = cv2.getGaborKernel((21, 21), 0.56 * lambd, np.pi * k / ORIENTACIONES_GABOR, lambd, 0.5, 0)
+            resp = np.abs(cv2.filter2D(g, cv2.CV_32F, nucleo))
+            if mascara is not None:
+                resp = resp[mascara]
+            salida.extend((resp.mean(), resp.std()))
+    return np.asarray(salida, dtype=np.float32)
+
+
+def rasgos_imagen(rgb: np.ndarray, mascara: np.ndarray = None) -> np.ndarray:
+    """Vector de rasgos (float32, DIMENSION) de una imagen RGB uint8.
+
+    `mascara` (bool, mismo alto/ancho) limita el cálculo a los píxeles válidos,
+    por ejemplo los no transparentes de un PNG.
+    """
+    import cv2
+
+    rgb, mascara = _reducir(rgb[..., :3], mascara)
+    if mascara is not None and mascara.sum() < 64:
+        mascara = None
+
+    hsv = cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)
+    m8 = None if mascara is None else mascara.astype(np.uint8)
+    hist_hsv = cv2.calcHist([hsv], [0, 1, 2], m8, list(BINS_HSV), [0, 180, 0, 256, 0, 256]).ravel()
+    hist_hsv /= max(float(hist_hsv.sum()), 1.0)
+
+    gris = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    lbp = np.concatenate([_lbp_hist(gris, r, mascara) for r in RADIOS_LBP])
+    return np.concatenate([hist_hsv, lbp, _gabor(gris, mascara)]).astype(np.float32)
+
+
+def rasgos_archivo(ruta: str) -> np.ndarray:
+    from PIL import Image
+
+    with Image.open(ruta) as img:
+        img = img.convert("RGBA")
+        arr = np.asarray(img)
+    mascara = arr[..., 3] > 0
+    return rasgos_imagen(arr[..., :3], None if mascara.all() else mascara)
+
+
+# ================================
+# ÍNDICE
+# ================================
+def normalizacion(crudo: np.ndarray):
+    """(media, escala) para estandarizar vectores de rasgos (filas de `crudo`).
+
+    Cada bloque pesa lo mismo en la distancia, sin importar cuántas dimensiones tenga.
+    """
+    media = crudo.mean(axis=0) if len(crudo) else np.zeros(DIMENSION, np.float32)
+    desvio = crudo.std(axis=0) if len(crudo) else np.ones(DIMENSION, np.float32)
+    escala = np.where(desvio > 1e-6, desvio, 1.0)
+    for inicio, fin in BLOQUES:
+        escala[inicio:fin] *= np.sqrt(fin - inicio)
+    return media.astype(np.float32), escala.astype(np.float32)
+
+
+def construir_indice(entradas) -> dict:
+    """`entradas`: iterable de (categoria, carpeta, ruta).
+
+    Devuelve un dict con la matriz normalizada "matriz" (n, DIMENSION) float32,
+    las listas paralelas "categorias", "carpetas", "rutas" y los parámetros de
+    normalización "media"/"escala" que se aplican también a las consultas.
+    """
+    entradas = list(entradas)
+    crudo = np.stack([rasgos_archivo(r) for _, _, r in entradas]) if entradas else np.zeros((0, DIMENSION), np.float32)
+    media, escala = normalizacion(crudo)
+    return {
+        "matriz": ((crudo - media) / escala).astype(np.float32),
+        "media": media.astype(np.float32),
+        "escala": escala.astype(np.float32),
+        "categorias": [c for c, _, _ in entradas],
+        "carpetas": [c for _, c, _ in entradas],
+        "rutas": [r for _, _, r in entradas],
+    }
+
+
+def distancias(indice: dict, rasgos: np.ndarray) -> np.ndarray:
+    """Distancia euclídea de `rasgos` a todas las referencias (un solo cálculo)."""
+    q = (np.asarray(rasgos, dtype=np.float32) - indice["media"]) / indice["escala"]
+    return np.linalg.norm(indice["matriz"] - q, axis=1)
+
+
+def sugerir(indice: dict, rasgos: np.ndarray) -> dict:
+    """Ranking y clase sugerida por categoría.
+
+    Devuelve {categoria: {"carpeta", "confianza", "ranking": [(ruta, distancia), ...]}}.
+    """
+    d = distancias(indice, rasgos)
+    categorias = np.asarray(indice["categorias"])
+    resultado = {}
+    for categoria in dict.fromkeys(indice["categorias"]):
+        pos = np.flatnonzero(categorias == categoria)
+        orden = pos[np.argsort(d[pos])]
+        votos = {}
+        for i in orden[:VECINOS_VOTO]:
+            votos[indice["carpetas"][i]] = votos.get(indice["carpetas"][i], 0.0) + 1.0 / (1e-3 + d[i])
+        carpeta = max(votos, key=votos.get)
+        resultado[categoria] = {
+            "carpeta": carpeta,
+            "confianza": round(votos[carpeta] / sum(votos.values()), 3),
+            "ranking": [(indice["rutas"][i], float(d[i])) for i in orden],
+        }
+    return resultado
+
+
+def ordenar_rutas(rutas, ranking) -> list:
+    """Reordena `rutas` según `ranking` (las que no figuran quedan al final)."""
+    posicion = {ruta: i for i, (ruta, _) in enumerate(ranking)}
+    return sorted(rutas, key=lambda r: posicion.get(r, len(posicion)))
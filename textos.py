@@ -0,0 +1,263 @@
+"""Textos de la interfaz, etiquetas de las opciones e interpretaciones (ES/PT).
+
+Todo se indexa por los IDs canónicos de opciones.py: los textos solo se usan para mostrar.
+"""
+
+# ================================
+# ETIQUETAS DE LAS OPCIONES (ID canónico → texto en cada idioma; ver opciones.py)
+# ================================
+ETIQUETAS = {
+    "es": {
+        "color": {"rojo-intenso": "rojo-intenso", "rojo-amarillento": "rojo-amarillento", "amarillo": "amarillo", "marron": "marrón", "pardo-marron": "pardo-marrón", "negro": "negro", "gris": "gris", "blanco": "blanco"},
+        "textura": {"arcilloso": "arcilloso", "arenoso": "arenoso", "franco": "franco", "limoso": "limoso"},
+        "estructura": {"granular": "granular", "migajosa": "migajosa", "bloques": "bloques", "prismatica-columnar": "prismatica-columnar", "laminar": "laminar", "masiva": "masiva", "suelto": "suelto"},
+        "humedad": {"baja": "Baja", "media": "Media", "alta": "Alta"},
+        "raices": {"ausentes": "Ausentes", "escasas": "Escasas", "abundantes": "Abundantes"},
+    },
+    "pt": {
+        "color": {"rojo-intenso": "vermelho-intenso", "rojo-amarillento": "vermelho-amarelado", "amarillo": "amarelo", "marron": "marrom", "pardo-marron": "pardo-marrom", "negro": "preto", "gris": "cinza", "blanco": "branco"},
+        "textura": {"arcilloso": "argiloso", "arenoso": "arenoso", "franco": "franco", "limoso": "siltoso"},
+        "estructura": {"granular": "granular", "migajosa": "migajosa", "bloques": "blocos", "prismatica-columnar": "prismática-colunar", "laminar": "laminar", "masiva": "maciça", "suelto": "solto"},
+        "humedad": {"baja": "Baixa", "media": "Média", "alta": "Alta"},
+        "raices": {"ausentes": "Ausentes", "escasas": "Escassas", "abundantes": "Abundantes"},
+    },
+}
+
+# ================================
+# TEXTOS
+# ================================
+TEXT_CONTENT = {
+    "es": {
+        "app_title": "🌱 Análisis Visual de Suelos",
+        "start_btn": "🚀 Comenzar análisis",
+        "intro": """
+**Bienvenido/a a esta plataforma educativa para explorar el mundo del suelo de manera visual e interactiva.**
+Aquí podrás analizar algunas de sus principales características físicas y comprender cómo influyen en su interpretación.
+
+👉 Elige primero el **idioma que prefieras** y luego:
+1. **Sube una imagen de suelo** que quieras analizar.  
+2. **Selecciona sus características** (color, textura, estructura, humedad, raíces).  
+3. **Compara con las referencias visuales** que irán apareciendo en cada categoría.
+
+Tendrás una experiencia guiada paso a paso, como si fuera una “lupa virtual” para comprender mejor el suelo. 🚀
+""",
+        "upload_label": "📤 Subir imagen de suelo",
+        "uploaded_caption": "📸 Imagen subida",
+        "munsell_estimate": "🎨 Munsell estimado",
+        "moisture_estimate": "💧 Humedad estimada desde la foto",
+        "roots_estimate": "🌱 Raíces estimadas desde la foto",
+        "confidence": "confianza",
+        "similar_hint": "🔎 Más parecido en las referencias",
+        "color_label": "🎨 Color del suelo",
+        "texture_label": "🌾 Textura del suelo",
+        "aggregation_label": "🧱 Forma / Estructura",
+        "moisture_label": "💧 Humedad",
+        "roots_label": "🌱 Presencia de raíces",
+        "select_phrase": "👉 Selecciona tu opción comparando con la referencia:",
+        "summary_title": "1️⃣ Resumen",
+        "interpret_block_title": "2️⃣ Interpretación técnica",
+        "recs_title": "3️⃣ Recomendaciones de manejo",
+        "save_button": "💾 Guardar análisis",
+        "excel_button": "📥 Descargar en Excel",
+        "history_button": "📚 Historial en Excel",
+        "history_csv_button": "📄 Historial en CSV",
+        "saved_msg": "✅ Análisis guardado",
+        "csv_file": "analisis_suelos.csv",
+        "placeholder": "Seleccionar opción",
+        "no_images_msg": "No se encontraron imágenes en la carpeta",
+        "no_folder_msg": "No existe carpeta de referencia para",
+        "upload_too_big": "La imagen supera el tamaño máximo permitido",
+        "upload_too_many_pixels": "La imagen supera la resolución máxima permitida",
+        "upload_invalid": "No se pudo leer la imagen. Sube un archivo JPG o PNG válido.",
+        "analyzing": "⏳ Analizando la imagen… puedes seguir completando el formulario.",
+        "dash_title": "📊 Panel docente",
+        "dash_intro": "Resumen de los análisis guardados por los estudiantes.",
+        "dash_language": "Idioma de los análisis",
+        "dash_all": "Todos",
+        "dash_dates": "Período",
+        "dash_total": "Análisis en el período",
+        "dash_distributions": "Distribuciones",
+        "dash_cooc": "Co-ocurrencias",
+        "dash_trends": "Tendencia en el tiempo",
+        "dash_group_by": "Agrupar por",
+        "dash_periods": {"D": "Día", "W": "Semana", "MS": "Mes"},
+        "dash_munsell": "Códigos Munsell más frecuentes",
+        "dash_recs": "Recomendaciones más frecuentes",
+        "dash_recent": "Últimos análisis",
+        "dash_empty": "Todavía no hay análisis guardados.",
+        "dash_restricted": "Panel solo para docentes: ábrelo con el enlace que incluye ?admin=<token>.",
+        "tr_title": "🧭 Modo transecto",
+        "tr_intro": "Sube todas las fotos de un transecto o de varias parcelas (hasta {max}) para compararlas y agruparlas. El orden de subida se toma como el orden en el terreno.",
+        "tr_upload": "📸 Fotos del transecto",
+        "tr_too_many": "Se analizan solo las primeras {max} fotos.",
+        "tr_progress": "Analizando fotos",
+        "tr_invalid": "No se pudieron analizar",
+        "tr_need_two": "Se necesitan al menos dos fotos válidas para comparar.",
+        "tr_groups": "Cantidad de grupos",
+        "tr_auto": "Automático",
+        "tr_samples": "Muestras",
+        "tr_n_groups": "Grupos",
+        "tr_silhouette": "Separación (silueta)",
+        "tr_profile": "Cambio entre fotos consecutivas",
+        "tr_group": "Grupo",
+        "tr_representative": "Muestra representativa",
+        "tr_distances": "Matriz de distancias",
+        "tr_excel_button": "📥 Descargar transecto (Excel)",
+    },
+   "pt": {
+        "app_title": "🌱 Análise Visual de Solos",
+        "start_btn": "🚀 Iniciar análise",
+        "intro": """
+**Bem-vindo(a) a esta plataforma educativa para explorar o mundo do solo de forma visual e interativa.**
+Aqui você poderá analisar algumas de suas principais características físicas e entender como elas influenciam na interpretação do solo.
+
+👉 Primeiro, escolha o **idioma de sua preferência** e depois:
+1. **Envie uma imagem do solo** que deseja analisar.  
+2. **Selecione suas características** (cor, textura, estrutura, umidade, raízes).  
+3. **Compare com as referências visuais** que aparecerão em cada categoria.
+
+Você terá uma experiência guiada passo a passo, como uma “lupa virtual” para compreender melhor o solo. 🚀
+""",
+        "upload_label": "📤 Enviar imagem do solo",
+        "uploaded_caption": "📸 Imagem enviada",
+        "munsell_estimate": "🎨 Munsell estimado",
+        "moisture_estimate": "💧 Umidade estimada pela foto",
+        "roots_estimate": "🌱 Raízes estimadas pela foto",
+        "confidence": "confiança",
+        "similar_hint": "🔎 Mais parecido nas referências",
+        "color_label": "🎨 Cor do solo",
+        "texture_label": "🌾 Textura do solo",
+        "aggregation_label": "🧱 Forma / Estrutura",
+        "moisture_label": "💧 Umidade",
+        "roots_label": "🌱 Presença de raízes",
+        "select_phrase": "👉 Selecione sua opção comparando com a referência:",
+        "summary_title": "1️⃣ Resumo",
+        "interpret_block_title": "2️⃣ Interpretação técnica",
+        "recs_title": "3️⃣ Recomendações de manejo",
+        "save_button": "💾 Salvar análise",
+        "excel_button": "📥 Baixar em Excel",
+        "history_button": "📚 Histórico em Excel",
+        "history_csv_button": "📄 Histórico em CSV",
+        "saved_msg": "✅ Análise salva",
+        "csv_file": "analises_solos.csv",
+        "placeholder": "Selecionar opção",
+        "no_images_msg": "Não foram encontradas imagens na pasta",
+        "no_folder_msg": "Não existe pasta de referência para",
+        "upload_too_big": "A imagem excede o tamanho máximo permitido",
+        "upload_too_many_pixels": "A imagem excede a resolução máxima permitida",
+        "upload_invalid": "Não foi possível ler a imagem. Envie um arquivo JPG ou PNG válido.",
+        "analyzing": "⏳ Analisando a imagem… você pode continuar preenchendo o formulário.",
+        "dash_title": "📊 Painel do professor",
+        "dash_intro": "Resumo das análises salvas pelos estudantes.",
+        "dash_language": "Idioma das análises",
+        "dash_all": "Todos",
+        "dash_dates": "Período",
+        "dash_total": "Análises no período",
+        "dash_distributions": "Distribuições",
+        "dash_cooc": "Coocorrências",
+        "dash_trends": "Tendência ao longo do tempo",
+        "dash_group_by": "Agrupar por",
+        "dash_periods": {"D": "Dia", "W": "Semana", "MS": "Mês"},
+        "dash_munsell": "Códigos Munsell mais frequentes",
+        "dash_recs": "Recomendações mais frequentes",
+        "dash_recent": "Últimas análises",
+        "dash_empty": "Ainda não há análises salvas.",
+        "dash_restricted": "Painel só para professores: abra com o link que inclui ?admin=<token>.",
+        "tr_title": "🧭 Modo transecto",
+        "tr_intro": "Envie todas as fotos de um transecto ou de várias parcelas (até {max}) para compará-las e agrupá-las. A ordem de envio é tomada como a ordem no terreno.",
+        "tr_upload": "📸 Fotos do transecto",
+        "tr_too_many": "Apenas as primeiras {max} fotos são analisadas.",
+        "tr_progress": "Analisando fotos",
+        "tr_invalid": "Não foi possível analisar",
+        "tr_need_two": "São necessárias pelo menos duas fotos válidas para comparar.",
+        "tr_groups": "Número de grupos",
+        "tr_auto": "Automático",
+        "tr_samples": "Amostras",
+        "tr_n_groups": "Grupos",
+        "tr_silhouette": "Separação (silhueta)",
+        "tr_profile": "Mudança entre fotos consecutivas",
+        "tr_group": "Grupo",
+        "tr_representative": "Amostra representativa",
+        "tr_distances": "Matriz de distâncias",
+        "tr_excel_button": "📥 Baixar transecto (Excel)",
+    },
+}
+# ================================
+# INTERPRETACIONES DETALLADAS (ES/PT)
+# ================================
+INTERP = {
+    "es": {
+        "color": {
+            "rojo-intenso": "El color rojo intenso suele reflejar abundancia de óxidos de hierro (hematita), asociado a buen drenaje y ambientes bien aireados; puede indicar baja materia orgánica si los tonos son muy vivos.",
+            "rojo-amarillento": "El color rojo-amarillento indica presencia de óxidos de hierro hidratados (goethita) y condiciones de oxidación moderadas; sugiere drenaje de medio a bueno.",
+            "amarillo": "El color amarillo está vinculado a goethita y a veces a condiciones de drenaje menos eficientes; puede aparecer en suelos lixiviados con fertilidad moderada.",
+            "marron": "El color marrón suele reflejar contenido moderado de materia orgánica y complejos Fe-Humus; frecuentemente asociado a fertilidad intermedia y actividad biológica moderada.",
+            "pardo-marron": "El pardo-marrón es una transición con influencia tanto de compuestos férricos como de materia orgánica; sugiere fertilidad aceptable y buena estabilidad estructural superficial.",
+            "negro": "El color negro indica alto contenido de carbono orgánico y humificación avanzada; suelos fértiles, con alta capacidad de intercambio catiónico pero susceptibles a anegamiento si la estructura es deficiente.",
+            "gris": "El color gris sugiere condiciones reductoras por saturación de agua (gley), con hierro reducido; drenaje deficiente y posible anoxia radicular.",
+            "blanco": "El color blanco se relaciona con arenas muy lavadas o acumulación de sales/carbonatos; indica baja fertilidad y escasa capacidad de retener agua y nutrientes.",
+        },
+        "textura": {
+            "arcilloso": "Textura arcillosa: alta retención de agua y nutrientes; drenaje lento y riesgo de compactación; plasticidad y pegajosidad elevadas.",
+            "arenoso": "Textura arenosa: drenaje muy rápido, baja retención de agua y nutrientes; susceptible a sequía y lixiviación de fertilizantes.",
+            "franco": "Textura franca: equilibrio entre arena, limo y arcilla; buena aireación y retención, ideal para la mayoría de cultivos.",
+            "limoso": "Textura limosa: mayor retención de agua que arenosos, pero estructura menos estable; riesgo de encostramiento superficial.",
+        },
+        "estructura": {
+            "granular": "Estructura granular: agregados pequeños y redondeados con alta porosidad; excelente para aireación, infiltración y crecimiento radicular (común en horizontes A ricos en MO).",
+            "migajosa": "Estructura migajosa: similar a la granular pero más porosa e irregular; muy deseable en suelos agrícolas por equilibrio aire-agua.",
+            "bloques": "Estructura en bloques (subangular/angular): agregados cúbicos/poliédricos; moderada a fuerte; puede restringir el crecimiento radicular si se compacta.",
+            "prismatica-columnar": "Estructura prismática/columnar: agregados verticales con tope plano (prismática) o redondeado (columnar); asociados a horizontes B con arcillas y/o sodicidad; drenaje limitado.",
+            "laminar": "Estructura laminar: agregados en láminas horizontales; muy restrictiva para infiltración y raíces; típica de compactación o horizontes E.",
+            "masiva": "Estructura masiva: sin agregación discernible; baja porosidad y drenaje deficiente; limita la aireación y el desarrollo radicular.",
+            "suelto": "Sin estructura (suelto): partículas individuales; alta permeabilidad pero baja fertilidad y escasa retención de agua (típico de suelos arenosos).",
+        },
+        "humedad": {
+            "baja": "Humedad baja: potencial estrés hídrico, mayor esfuerzo para establecimiento de plántulas.",
+            "media": "Humedad media: condición intermedia adecuada para la mayoría de cultivos si la estructura acompaña.",
+            "alta": "Humedad alta: riesgo de anegamiento y anoxia; procesos reductores y pérdida de estructura.",
+        },
+        "raices": {
+            "ausentes": "Raíces ausentes: puede indicar limitaciones físicas (compactación) o químicas (toxicidad, salinidad), o manejo reciente del suelo.",
+            "escasas": "Raíces escasas: actividad biológica limitada y posible restricción de aireación o nutrientes.",
+            "abundantes": "Raíces abundantes: condición favorable de aireación, porosidad y disponibilidad de agua/nutrientes.",
+        },
+    },
+    "pt": {
+        "color": {
+            "rojo-intenso": "A cor vermelha intensa reflete abundância de óxidos de ferro (hematita), associada a boa drenagem e aeração; pode indicar baixa matéria orgânica quando os tons são muito vivos.",
+            "rojo-amarillento": "A cor vermelho-amarelada indica presença de óxidos de ferro hidratados (goethita) e condições de oxidação moderadas; drenagem de média a boa.",
+            "amarillo": "A cor amarela está ligada à goethita e, às vezes, a drenagem menos eficiente; pode ocorrer em solos lixiviados com fertilidade moderada.",
+            "marron": "A cor marrom reflete teor moderado de matéria orgânica e complexos Fe-Humus; frequentemente associada à fertilidade intermediária e atividade biológica moderada.",
+            "pardo-marron": "O pardo-marrom é transicional com influência de compostos férricos e de MO; sugere fertilidade aceitável e boa estabilidade estrutural superficial.",
+            "negro": "A cor preta indica alto teor de carbono orgânico e humificação avançada; solos férteis, com alta CTC, porém suscetíveis a encharcamento se a estrutura for deficiente.",
+            "gris": "A cor cinza sugere condições redutoras por saturação hídrica (glei), com ferro reduzido; drenagem deficiente e possível anoxia radicular.",
+            "blanco": "A cor branca relaciona-se a areias muito lavadas ou acúmulo de sais/carbonatos; baixa fertilidade e fraca retenção de água e nutrientes.",
+        },
+        "textura": {
+            "arcilloso": "Textura argilosa: alta retenção de água e nutrientes; drenagem lenta e risco de compactação; elevada plasticidade e pegajosidade.",
+            "arenoso": "Textura arenosa: drenagem muito rápida, baixa retenção de água e nutrientes; suscetível à seca e à lixiviação de fertilizantes.",
+            "franco": "Textura franca: equilíbrio entre areia, silte e argila; boa aeração e retenção, ideal para a maioria das culturas.",
+            "limoso": "Textura siltosa: maior retenção de água que arenosos, mas estrutura menos estável; risco de formação de crostas superficiais.",
+        },
+        "estructura": {
+            "granular": "Estrutura granular: agregados pequenos e arredondados com alta porosidade; excelente para aeração, infiltração e crescimento radicular.",
+            "migajosa": "Estrutura migajosa: semelhante à granular, porém mais porosa e irregular; muito desejável em solos agrícolas.",
+            "bloques": "Estrutura em blocos (subangular/angular): agregados cúbicos/poliedros; moderada a forte; pode restringir o crescimento radicular se compactada.",
+            "prismatica-columnar": "Estrutura prismática/colunar: agregados verticais com topo plano (prismática) ou arredondado (colunar); associados a horizontes B argilosos e/ou sódicos; drenagem limitada.",
+            "laminar": "Estrutura laminar: agregados em lâminas horizontais; muito restritiva à infiltração e às raízes; típica de compactação ou horizontes E.",
+            "masiva": "Estrutura maciça: sem agregação discernível; baixa porosidade e drenagem deficiente; limita a aeração e o desenvolvimento radicular.",
+            "suelto": "Sem estrutura (solto): partículas individuais; alta permeabilidade, baixa fertilidade e retenção de água (solos arenosos).",
+        },
+        "humedad": {
+            "baja": "Baixa umidade: potencial estresse hídrico e dificuldade de estabelecimento de plântulas.",
+            "media": "Umidade média: condição intermediária adequada para a maioria das culturas se a estrutura ajudar.",
+            "alta": "Alta umidade: risco de encharcamento e anoxia; processos redutores e perda de estrutura.",
+        },
+        "raices": {
+            "ausentes": "Raízes ausentes: pode indicar limitações físicas (compactação) ou químicas (toxicidade, salinidade) ou manejo recente do solo.",
+            "escasas": "Raízes escassas: atividade biológica limitada e possível restrição de aeração ou nutrientes.",
+            "abundantes": "Raízes abundantes: condição favorável de aeração, porosidade e disponibilidade de água/nutrientes.",
+        },
+    },
+}
@@ -0,0 +1,257 @@
+"""Modo transecto: comparar y agrupar muchas muestras de campo a la vez.
+
+Cada foto se reduce a un vector compacto: los rasgos de similitud
+(similitud.rasgos_imagen, estandarizados como en el índice de referencias) más
+el color Lab dominante de la estimación Munsell, como un bloque más. Con los
+vectores de todas las muestras se calcula la matriz de distancias en una sola
+operación matricial y se agrupan por enlace promedio (aglomerativo); la
+cantidad de grupos se elige por silueta si no se indica. Cada grupo recibe la
+interpretación de 3 bloques (analisis.armar_reporte) de su combinación más
+frecuente.
+
+Sin dependencias de Streamlit: lo usa pages/modo_transecto.py.
+"""
+from collections import Counter
+
+import numpy as np
+
+from analisis import armar_reporte
+from color_munsell import estimar_munsell
+from imagen_muestra import procesar_imagen
+from opciones import ATRIBUTOS, CATEGORIA_REFERENCIA, OPCIONES, etiqueta
+from raices_humedad import estimar_humedad, estimar_raices
+from similitud import normalizacion, rasgos_imagen, sugerir
+
+MAX_MUESTRAS = 50
+# Los rasgos se calculan a 320 px y el Munsell sobre una muestra de píxeles:
+# alcanza con decodificar a ~0,4 MP (JPEG decodifica directo a 1/4 u 1/8).
+PRESUPUESTO_TRANSECTO = 400_000
+MAX_GRUPOS = 6
+SILUETA_MINIMA = 0.2   # por debajo, el transecto se considera un solo grupo
+
+ENCABEZADOS_MUESTRAS = [
+    "Posición", "Archivo", "Grupo", "Munsell", "Confianza color", "Color", "Textura", "Estructura",
+    "Humedad", "Raíces", "Distancia al representativo",
+]
+ENCABEZADOS_GRUPOS = [
+    "Grupo", "Muestras", "Archivos", "Representativa", "Munsell", "Color", "Textura", "Estructura",
+    "Humedad", "Raíces", "Dispersión", "Resumen", "Interpretación", "Recomendaciones",
+]
+
+
+# ================================
+# RASGOS POR MUESTRA
+# ================================
+def analizar_muestra(datos: bytes) -> dict:
+    """Análisis liviano de una foto del transecto (sin arreglos de píxeles).
+
+    Devuelve "sha256", "resumen" (miniatura JPEG), "munsell" (o None), "raices",
+    "humedad" y "rasgos".
+    Lanza imagen_muestra.ImagenInvalida si la imagen no se puede leer.
+    """
+    muestra = procesar_imagen(datos, PRESUPUESTO_TRANSECTO)
+    return {
+        "sha256": muestra["sha256"],
+        "resumen": muestra["resumen"],
+        "munsell": estimar_munsell(muestra["array"]),
+        "raices": estimar_raices(muestra["array"]),
+        "humedad": estimar_humedad(muestra["array"]),
+        "rasgos": rasgos_imagen(muestra["array"]),
+    }
+
+
+def matriz_rasgos(muestras: list, indice: dict = None) -> np.ndarray:
+    """Vectores (n, DIMENSION + 3) listos para distancias euclídeas.
+
+    Los rasgos se estandarizan con los parámetros del índice de referencias (o
+    con los de las propias muestras si no hay índice); el Lab dominante se
+    estandariza entre las muestras y pesa como un bloque de rasgos.
+    """
+    crudo = np.stack([m["rasgos"] for m in muestras]).astype(np.float32)
+    if indice is not None and len(indice["matriz"]):
+        media, escala = indice["media"], indice["escala"]
+    else:
+        media, escala = normalizacion(crudo)
+    rasgos = (crudo - media) / escala
+
+    lab = np.array([m["munsell"]["lab"] if m.get("munsell") else (np.nan,) * 3 for m in muestras], dtype=np.float64)
+    faltantes = np.isnan(lab)
+    if faltantes.all():
+        lab[:] = 0.0
+    else:
+        lab[faltantes] = np.take(np.nanmean(lab, axis=0), np.nonzero(faltantes)[1])
+    desvio = lab.std(axis=0)
+    lab = (lab - lab.mean(axis=0)) / np.where(desvio > 1e-6, desvio, 1.0) / np.sqrt(3)
+    return np.hstack([rasgos, lab]).astype(np.float32)
+
+
+def matriz_distancias(x: np.ndarray) -> np.ndarray:
+    """Distancias euclídeas entre todas las filas de `x` (n, n), en una pasada."""
+    x = np.asarray(x, dtype=np.float64)
+    cuadrados = np.einsum("ij,ij->i", x, x)
+    d2 = cuadrados[:, None] + cuadrados[None, :] - 2.0 * (x @ x.T)
+    np.maximum(d2, 0.0, out=d2)
+    np.fill_diagonal(d2, 0.0)
+    return np.sqrt(d2)
+
+
+# ================================
+# AGRUPAMIENTO
+# ================================
+def _renumerar(etiquetas) -> np.ndarray:
+    # Grupos numerados por orden de aparición en el transecto (0 = el de la primera foto).
+    primeras = {}
+    return np.array([primeras.setdefault(e, len(primeras)) for e in etiquetas], dtype=np.intp)
+
+
+def jerarquia(distancias: np.ndarray, max_grupos: int) -> dict:
+    """Enlace promedio: {k: etiquetas} para k = 1..max_grupos."""
+    n = len(distancias)
+    d = distancias.astype(np.float64, copy=True)
+    np.fill_diagonal(d, np.inf)
+    tamanos = np.ones(n)
+    etiquetas = np.arange(n)
+    particiones = {n: _renumerar(etiquetas)} if n <= max_grupos else {}
+    for k in range(n - 1, 0, -1):
+        i, j = sorted(np.unravel_index(np.argmin(d), d.shape))
+        # Lance-Williams: distancia promedio del grupo unido a cada uno de los demás.
+        fila = (tamanos[i] * d[i] + tamanos[j] * d[j]) / (tamanos[i] + tamanos[j])
+        d[i, :] = fila
+        d[:, i] = fila
+        d[i, i] = np.inf
+        d[j, :] = np.inf
+        d[:, j] = np.inf
+        tamanos[i] += tamanos[j]
+        etiquetas[etiquetas == j] = i
+        if k <= max_grupos:
+            particiones[k] = _renumerar(etiquetas)
+    return particiones
+
+
+def silueta(distancias: np.ndarray, etiquetas: np.ndarray) -> float:
+    """Silueta media (-1 a 1) de una partición, calculada de forma matricial."""
+    n = len(etiquetas)
+    k = int(etiquetas.max()) + 1 if n else 0
+    if k < 2 or k >= n:
+        return 0.0
+    pertenencia = np.eye(k)[etiquetas]                  # (n, k)
+    sumas = distancias @ pertenencia                    # distancia total de cada muestra a cada grupo
+    tamanos = pertenencia.sum(axis=0)
+    filas = np.arange(n)
+    propio = tamanos[etiquetas]
+    a = sumas[filas, etiquetas] / np.maximum(propio - 1, 1)
+    medias = sumas / tamanos
+    medias[filas, etiquetas] = np.inf
+    b = medias.min(axis=1)
+    s = (b - a) / np.maximum(np.maximum(a, b), 1e-12)
+    s[propio == 1] = 0.0
+    return float(s.mean())
+
+
+def agrupar(distancias: np.ndarray, grupos: int = None):
+    """(etiquetas, {k: silueta}). Con `grupos=None` se elige k por la mejor silueta."""
+    n = len(distancias)
+    if n < 3:
+        return np.zeros(n, dtype=np.intp), {}
+    tope = min(MAX_GRUPOS, n - 1)
+    particiones = jerarquia(distancias, tope)
+    siluetas = {k: silueta(distancias, particiones[k]) for k in range(2, tope + 1)}
+    if grupos is None:
+        mejor = max(siluetas, key=siluetas.get)
+        grupos = mejor if siluetas[mejor] >= SILUETA_MINIMA else 1
+    return particiones[min(max(1, grupos), tope)], siluetas
+
+
+# ================================
+# RESUMEN POR GRUPO
+# ================================
+def _mas_frecuente(valores):
+    valores = [v for v in valores if v]
+    return Counter(valores).most_common(1)[0][0] if valores else None
+
+
+def selecciones_de(muestra: dict, sugerencias: dict) -> dict:
+    """{atributo: ID} estimado desde la imagen."""
+    elegidas = dict.fromkeys(ATRIBUTOS)
+    if muestra.get("munsell"):
+        elegidas["color"] = muestra["munsell"]["clase"]
+    for atributo in ("humedad", "raices"):
+        if muestra.get(atributo):
+            elegidas[atributo] = muestra[atributo]["clase"]
+    for atributo in ("textura", "estructura"):
+        sug = sugerencias.get(CATEGORIA_REFERENCIA[atributo])
+        if sug and sug["carpeta"] in OPCIONES[atributo]:
+            elegidas[atributo] = sug["carpeta"]
+    return elegidas
+
+
+def analizar_transecto(muestras: list, indice: dict, lang_code: str, grupos: int = None) -> dict:
+    """Distancias, grupos y reporte por grupo de las muestras (en orden del transecto).
+
+    Devuelve un dict con "distancias" (n, n), "etiquetas" (grupo por muestra),
+    "siluetas", "selecciones" (por muestra) y "grupos": lista de dicts con
+    "miembros", "representativa" (medoide), "selecciones", "dispersion" y
+    "reporte" (resumen, interpretación, recomendaciones).
+    """
+    distancias = matriz_distancias(matriz_rasgos(muestras, indice))
+    etiquetas, siluetas = agrupar(distancias, grupos)
+    hay_indice = indice is not None and len(indice["matriz"])
+    selecciones = [selecciones_de(m, sugerir(indice, m["rasgos"]) if hay_indice else {}) for m in muestras]
+
+    resumen = []
+    for g in range(int(etiquetas.max()) + 1 if len(etiquetas) else 0):
+        miembros = np.flatnonzero(etiquetas == g)
+        internas = distancias[np.ix_(miembros, miembros)]
+        representativa = int(miembros[internas.sum(axis=1).argmin()])
+        elegidas = {a: _mas_frecuente(selecciones[i][a] for i in miembros) for a in ATRIBUTOS}
+        resumen.append({
+            "miembros": miembros.tolist(),
+            "representativa": representativa,
+            "selecciones": elegidas,
+            "dispersion": float(internas.sum() / max(1, len(miembros) * (len(miembros) - 1))),
+            "reporte": armar_reporte(lang_code, tuple(elegidas[a] for a in ATRIBUTOS)),
+        })
+    return {
+        "distancias": distancias, "etiquetas": etiquetas, "siluetas": siluetas,
+        "selecciones": selecciones, "grupos": resumen,
+    }
+
+
+# ================================
+# EXPORTACIÓN (hojas para exportar.exportar_historial_xlsx)
+# ================================
+def hojas_transecto(nombres: list, muestras: list, resultado: dict, lang_code: str) -> list:
+    """Hojas "Muestras", "Grupos" y "Distancias" del libro del transecto."""
+    d, etiquetas = resultado["distancias"], resultado["etiquetas"]
+    grupos = resultado["grupos"]
+
+    def filas_muestras():
+        for i, (nombre, muestra) in enumerate(zip(nombres, muestras)):
+            munsell = muestra.get("munsell") or {}
+            sel = resultado["selecciones"][i]
+            g = int(etiquetas[i])
+            yield [
+                i + 1, nombre, g + 1, munsell.get("munsell", ""), munsell.get("confianza", ""),
+                *(etiqueta(a, sel[a], lang_code) for a in ATRIBUTOS),
+                round(float(d[i, grupos[g]["representativa"]]), 3),
+            ]
+
+    def filas_grupos():
+        for g, grupo in enumerate(grupos):
+            rep = grupo["representativa"]
+            resumen, piezas, recs = grupo["reporte"]
+            sel = grupo["selecciones"]
+            yield [
+                g + 1, len(grupo["miembros"]), ", ".join(nombres[i] for i in grupo["miembros"]), nombres[rep],
+                (muestras[rep].get("munsell") or {}).get("munsell", ""),
+                *(etiqueta(a, sel[a], lang_code) for a in ATRIBUTOS),
+                round(grupo["dispersion"], 3),
+                "\n".join(resumen), "\n".join(p for p in piezas if p), "\n".join(recs),
+            ]
+
+    filas_distancias = ([nombre, *np.round(fila, 3).tolist()] for nombre, fila in zip(nombres, d))
+    return [
+        ("Muestras", ENCABEZADOS_MUESTRAS, filas_muestras()),
+        ("Grupos", ENCABEZADOS_GRUPOS, filas_grupos()),
+        ("Distancias", ["", *nombres], filas_distancias),
+    ]